@@ -4,7 +4,9 @@ import aiosmtplib
 from typing import Optional
 from contextlib import asynccontextmanager
 
+import deadlines
 from config import settings
+from exceptions import DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
@@ -70,12 +72,22 @@ class SMTPConnectionPool:
         """
         Context manager to acquire a connection from the pool.
         Handles reconnection if the acquired connection is closed.
+        Waits for a free connection no longer than the message deadline allows.
         """
         # Ensure pool is initialized (lazy init safety)
         if not self._pool_created:
             await self.connect()
 
-        client = await self.pool.get()
+        left = deadlines.remaining()
+        if left is None:
+            client = await self.pool.get()
+        else:
+            deadlines.check("smtp acquire")
+            try:
+                client = await asyncio.wait_for(self.pool.get(), left)
+            except asyncio.TimeoutError:
+                deadlines.DEADLINE_EXCEEDED.inc(operation="smtp acquire")
+                raise DeadlineExceededError(f"No SMTP connection free within the deadline ({left:.2f}s)")
         try:
             # Check health / Reconnect if needed
             if not client.is_connected:
@@ -4,21 +4,32 @@ import asyncio
 import aiosmtplib
 from email.message import EmailMessage
 from jinja2 import Environment, FileSystemLoader
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+import deadlines
 from config import settings
-from models.models import Alert, Recipient
+from models.models import Alert, FullAlert, Recipient, SEVERITY_PRIORITY
 from adapters.email.pool import SMTPConnectionPool
-from exceptions import SMTPConnectError, SMTPDeliveryError, TemplateRenderError
+from adapters.retry_budget import RetryBudget, RetryPolicy
+from exceptions import DeadlineExceededError, SMTPConnectError, SMTPDeliveryError, TemplateRenderError
 
 
 logger = logging.getLogger(__name__)
 
+_RETRYABLE_SMTP_ERRORS = (aiosmtplib.SMTPException, ConnectionError, OSError, asyncio.TimeoutError, SMTPConnectError, SMTPDeliveryError)
+
+smtp_retry = RetryPolicy(
+    lambda e: isinstance(e, _RETRYABLE_SMTP_ERRORS),
+    attempts=settings.RETRY_ATTEMPTS,
+    base=settings.RETRY_BACKOFF_BASE,
+    cap=settings.RETRY_BACKOFF_CAP,
+)
+
 
 class EmailSender:
     def __init__(self, pool: SMTPConnectionPool):
         self.pool = pool
         self.from_addr = settings.EMAIL_FROM
+        self.retry_budget = RetryBudget.from_settings("smtp")
         
         # Initialize Jinja2 with FileSystemLoader
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -26,7 +37,7 @@ class EmailSender:
         
         self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
 
-    def _prepare_email_message(self, recipient: Recipient, alert: Alert) -> EmailMessage:
+    def render_email(self, recipient: Recipient, alert: Alert) -> EmailMessage:
         """
         Prepare the EmailMessage object with dynamic template selection.
         """
@@ -107,6 +118,68 @@ class EmailSender:
             
         return message
 
+    def render_digest(self, alerts: list[FullAlert], subject_prefix: str = "Alert digest") -> EmailMessage:
+        """
+        Prepare one EmailMessage summarizing several alerts for the same recipients.
+        """
+        first = alerts[0]
+        firing = sum(1 for alert in alerts if alert.status == "firing")
+        severities = {alert.severity for alert in alerts}
+        top_severity = max(severities, key=lambda s: SEVERITY_PRIORITY.get(s.lower(), 0))
+
+        message = EmailMessage()
+        message["From"] = self.from_addr
+        message["To"] = ", ".join(first.alert_groups)
+        message["Subject"] = f"{subject_prefix}: {len(alerts)} alerts ({firing} firing) - {top_severity.upper()}"
+
+        lines = [
+            f"- [{alert.severity}] {alert.labels.get('alertname', 'Unknown Alert')} "
+            f"({alert.status}) {alert.environment}/{alert.site}: {alert.annotations.get('description', '')}"
+            for alert in alerts
+        ]
+        message.set_content(f"{subject_prefix}:\n--------------\n" + "\n".join(lines))
+
+        try:
+            template = self.jinja_env.get_template("digest.html")
+            body_html = template.render(
+                alerts=alerts,
+                firing=firing,
+                project_name=first.project_name,
+                app_env=settings.ENVIRONMENT,
+            )
+            message.add_alternative(body_html, subtype='html')
+        except Exception as e:
+            logger.error(f"Failed to render digest template: {e}")
+
+        return message
+
+    def render_suppressed_summary(
+        self, recipient: Recipient, count: int, alertnames: dict[str, int], severities: dict[str, int]
+    ) -> EmailMessage:
+        """
+        Prepare the periodic "N alerts suppressed" email for a rate-limited recipient set.
+        """
+        message = EmailMessage()
+        message["From"] = self.from_addr
+        message["To"] = ", ".join(recipient.alert_groups)
+        message["Subject"] = f"{count} alerts suppressed for {recipient.project_name}"
+
+        top = "\n".join(
+            f"  {name}: {n}" for name, n in sorted(alertnames.items(), key=lambda item: -item[1])[:20]
+        )
+        by_severity = ", ".join(f"{severity}: {n}" for severity, n in severities.items())
+        message.set_content(
+            f"""
+        {count} alerts for project {recipient.project_name} ({recipient.project_id})
+        were not emailed individually because the notification rate limit was exceeded.
+
+        Severities: {by_severity}
+        Most frequent alerts:
+{top}
+        """
+        )
+        return message
+
     # Proxy methods to pool for backward compatibility / Orchestrator convenience
     async def connect(self):
         await self.pool.connect()
@@ -114,25 +187,29 @@ class EmailSender:
     async def close(self):
         await self.pool.close()
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((aiosmtplib.SMTPException, ConnectionError, OSError, asyncio.TimeoutError, SMTPConnectError, SMTPDeliveryError)),
-    )
     async def send_email(self, recipient: Recipient, alert: Alert):
         """
-        Send an email using a pooled connection.
+        Render and send an email using a pooled connection.
         """
         if not recipient.alert_groups:
              logger.warning(f"No recipients for alert {alert.fingerprint}, skipping email.")
              return
 
-        message = self._prepare_email_message(recipient, alert)
-        
+        deadlines.check("send_email")
+        await self.deliver_email(self.render_email(recipient, alert), recipient, alert)
+
+    @smtp_retry
+    async def deliver_email(self, message: EmailMessage, recipient: Recipient, alert: Alert):
+        """
+        Send an already rendered email using a pooled connection.
+        The SMTP timeout is shrunk to what is left of the message deadline.
+        """
         try:
             async with self.pool.acquire() as client:
-                await client.send_message(message)
+                await client.send_message(message, timeout=deadlines.timeout(self.pool.timeout, "smtp send"))
                 logger.info(f"Email sent to {len(recipient.alert_groups)} recipients for alert {alert.fingerprint}")
+        except DeadlineExceededError:
+            raise
         except (aiosmtplib.SMTPException, ConnectionError, OSError, asyncio.TimeoutError) as e:
              logger.error(f"SMTP error sending to {len(recipient.alert_groups)} recipients: {e}")
              raise SMTPDeliveryError(f"Failed to deliver email: {e}") from e
@@ -1,8 +1,21 @@
+import asyncio
+import json
+import logging
+from typing import Union
+
+import httpx
+
 from config import settings
 from adapters.http.base import BaseHTTPClient
+from adapters.http.hedging import hedge_policy
 from models.models import Alert, AlertStatus
 from exceptions import DatabaseError
 
+logger = logging.getLogger(__name__)
+
+# Responses meaning the server has no bulk endpoint (as opposed to a failed request)
+_BULK_UNSUPPORTED = {404, 405, 501}
+
 class AlertDBClient(BaseHTTPClient):
     """
     Client for interacting with the Alert DB API (Persistence & Deduplication).
@@ -12,12 +25,28 @@ class AlertDBClient(BaseHTTPClient):
             base_url=settings.ALERT_DB_API_URL,
             timeout=settings.ALERT_DB_API_TIMEOUT,
             verify_ssl=settings.SSL_VERIFY,
+            name="alert_db",
+            hedge=hedge_policy(
+                "alert_db",
+                settings.ALERT_DB_HEDGE_PERCENTILE,
+                settings.ALERT_DB_HEDGE_MAX_RATIO,
+                settings.ALERT_DB_HEDGE_MIN_SAMPLES,
+            ),
         )
+        # POST /alerts is a dedup insert, not idempotent: a duplicate racing the original could be
+        # answered "dedup" and drop a new alert's email. Only hedged when the server honours Idempotency-Key.
+        self.hedge_persist = settings.ALERT_DB_HEDGE_IDEMPOTENCY_KEYS
+        self.bulk_chunk_size = settings.ALERT_DB_BULK_CHUNK_SIZE
+        self.bulk_concurrency = settings.ALERT_DB_BULK_CONCURRENCY
+        # Flipped off the first time the server turns out not to have /alerts/bulk
+        self.bulk_supported = settings.ALERT_DB_BULK_ENABLED
+        self.bulk_status_supported = settings.ALERT_DB_BULK_ENABLED
 
     async def persist_alert(self, alert: Alert) -> AlertStatus:
         """
         Persist the alert and check for deduplication.
         Returns AlertStatus.OK or AlertStatus.DEDUP.
+        Hedged only with ALERT_DB_HEDGE_IDEMPOTENCY_KEYS (see __init__).
         """
         # Note: model_dump(by_alias=True) ensures 'dedup_key' is sent as 'fingerprint' if needed by DB
         json_payload = alert.model_dump(by_alias=True, mode="json")
@@ -25,18 +54,83 @@ class AlertDBClient(BaseHTTPClient):
         try:
             response = await self._post(
                 endpoint="/alerts",
-                json_payload=json_payload
+                json_payload=json_payload,
+                hedge=self.hedge_persist,
             )
             data = response.json()
         except Exception as e:
             raise DatabaseError(f"Failed to persist alert in DB: {e}") from e
         status_str = data.get("status", "ok")
         
+        return self._status(status_str)
+
+    @staticmethod
+    def _status(status_str: str) -> AlertStatus:
         # Map DB response to Enum
         if status_str == "dedup":
             return AlertStatus.DEDUP
         return AlertStatus.OK
 
+    async def persist_alerts(self, alerts: list[Alert]) -> list[Union[AlertStatus, DatabaseError]]:
+        """
+        Persist many alerts with chunked POSTs to /alerts/bulk.
+        Returns one entry per alert, in input order: AlertStatus.OK / DEDUP,
+        or the DatabaseError for the chunk (or single request) that failed.
+
+        Falls back to concurrent single persist_alert calls, capped at
+        `bulk_concurrency`, when the server has no bulk endpoint.
+        """
+        if not alerts:
+            return []
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+
+        if self.bulk_supported:
+            chunks = [alerts[i:i + self.bulk_chunk_size] for i in range(0, len(alerts), self.bulk_chunk_size)]
+            try:
+                # The first chunk goes alone: if the endpoint is missing nothing has been persisted
+                # yet, so falling back can't turn already stored alerts into DEDUPs
+                first = await self._persist_chunk(chunks[0])
+            except _BulkUnsupported:
+                logger.warning("AlertDB has no bulk endpoint, falling back to single requests")
+                self.bulk_supported = False
+            else:
+                async def send(chunk: list[Alert]) -> list[Union[AlertStatus, DatabaseError]]:
+                    async with semaphore:
+                        try:
+                            return await self._persist_chunk(chunk)
+                        except _BulkUnsupported as e:
+                            return [DatabaseError(f"Bulk endpoint disappeared: {e.__cause__}")] * len(chunk)
+
+                rest = await asyncio.gather(*(send(chunk) for chunk in chunks[1:]))
+                return first + [status for chunk_results in rest for status in chunk_results]
+
+        async def persist_one(alert: Alert) -> Union[AlertStatus, DatabaseError]:
+            async with semaphore:
+                try:
+                    return await self.persist_alert(alert)
+                except DatabaseError as e:
+                    return e
+
+        return list(await asyncio.gather(*(persist_one(alert) for alert in alerts)))
+
+    async def _persist_chunk(self, chunk: list[Alert]) -> list[Union[AlertStatus, DatabaseError]]:
+        # Serialize straight to one JSON array buffer; no intermediate per-alert dicts
+        body = b"[" + b",".join(alert.model_dump_json(by_alias=True).encode() for alert in chunk) + b"]"
+        try:
+            response = await self._send_json_bytes("post", endpoint="/alerts/bulk", content=body)
+            results = response.json()["results"]
+            if len(results) != len(chunk):
+                raise ValueError(f"expected {len(chunk)} results, got {len(results)}")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in _BULK_UNSUPPORTED:
+                raise _BulkUnsupported() from e
+            error = DatabaseError(f"Failed to persist {len(chunk)} alerts in DB: {e}")
+            return [error] * len(chunk)
+        except Exception as e:
+            error = DatabaseError(f"Failed to persist {len(chunk)} alerts in DB: {e}")
+            return [error] * len(chunk)
+        return [self._status(result.get("status", "ok")) for result in results]
+
     async def update_status(self, dedup_key: str, status: str):
         """
         Update the status of an alert (e.g., 'sent', 'failed').
@@ -56,3 +150,47 @@ class AlertDBClient(BaseHTTPClient):
             # User requirement: "process alert to update email status".
             # If it fails, we should probably know.
             raise DatabaseError(f"Failed to update alert status in DB: {e}") from e
+
+    async def update_statuses(self, updates: dict[str, str]) -> dict[str, DatabaseError]:
+        """
+        Apply many status updates ({fingerprint: status}) with one PATCH to /alerts/bulk.
+        Falls back to concurrent single update_status calls, capped at `bulk_concurrency`,
+        when the server has no bulk endpoint.
+        Returns the updates that failed, keyed by fingerprint (empty on full success).
+        """
+        if not updates:
+            return {}
+
+        if self.bulk_status_supported:
+            body = json.dumps(
+                [{"fingerprint": key, "status": status} for key, status in updates.items()]
+            ).encode()
+            try:
+                await self._send_json_bytes("patch", endpoint="/alerts/bulk", content=body)
+                return {}
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in _BULK_UNSUPPORTED:
+                    error = DatabaseError(f"Failed to update {len(updates)} alert statuses in DB: {e}")
+                    return {key: error for key in updates}
+                logger.warning("AlertDB has no bulk status endpoint, falling back to single requests")
+                self.bulk_status_supported = False
+            except Exception as e:
+                error = DatabaseError(f"Failed to update {len(updates)} alert statuses in DB: {e}")
+                return {key: error for key in updates}
+
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+        failures: dict[str, DatabaseError] = {}
+
+        async def update_one(key: str, status: str):
+            async with semaphore:
+                try:
+                    await self.update_status(key, status)
+                except DatabaseError as e:
+                    failures[key] = e
+
+        await asyncio.gather(*(update_one(key, status) for key, status in updates.items()))
+        return failures
+
+
+class _BulkUnsupported(Exception):
+    """Raised internally when /alerts/bulk does not exist on the server."""
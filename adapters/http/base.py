@@ -1,7 +1,16 @@
+import asyncio
 import httpx
 import logging
+import uuid
 from typing import Optional, Any
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_exception
+
+import deadlines
+from adapters.http.circuit_breaker import CircuitBreaker
+from adapters.http.hedging import HedgePolicy
+from adapters.http.transport import InstrumentedTransport, transport_options
+from adapters.retry_budget import RetryBudget, RetryPolicy
+from config import settings
+from exceptions import DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
@@ -21,25 +30,47 @@ def _should_retry(e: BaseException) -> bool:
         return code >= 500 or code == 429 or code == 408
     return False
 
-# Reusable Retry Policy
-http_retry = retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception(_should_retry),
+# Reusable Retry Policy, drawing on each client's retry budget
+http_retry = RetryPolicy(
+    _should_retry,
+    attempts=settings.RETRY_ATTEMPTS,
+    base=settings.RETRY_BACKOFF_BASE,
+    cap=settings.RETRY_BACKOFF_CAP,
 )
 
 class BaseHTTPClient:
     """
     Base generic HTTP client handling common logic like:
-    - Retry policies
+    - Retry policies (jittered, within a per-client retry budget)
+    - Circuit breaking (fail fast while the dependency is down)
+    - Optional request hedging for idempotent calls
+    - Tunable, instrumented connection pool with startup warmup
     - SSL verification configuration
     - Error logging
     """
-    def __init__(self, base_url: str, timeout: float, verify_ssl: bool = True):
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float,
+        verify_ssl: bool = True,
+        name: Optional[str] = None,
+        hedge: Optional[HedgePolicy] = None,
+    ):
         self.base_url = base_url
         self.timeout = timeout
         self.verify_ssl = verify_ssl
+        self.name = name or httpx.URL(base_url).host or base_url
         self.client: Optional[httpx.AsyncClient] = None
+        self.transport: Optional[InstrumentedTransport] = None
+        self.breaker = CircuitBreaker(
+            self.name,
+            failure_threshold=settings.HTTP_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.HTTP_CIRCUIT_RESET_TIMEOUT,
+            half_open_calls=settings.HTTP_CIRCUIT_HALF_OPEN_CALLS,
+        )
+        self.retry_budget = RetryBudget.from_settings(self.name)
+        self.hedge = hedge
+        self.transport_options = transport_options(self.name)
 
     def _build_url(self, endpoint: str) -> str:
         """Construct full URL."""
@@ -48,10 +79,45 @@ class BaseHTTPClient:
     async def start(self):
         """
         Initialize the persistent HTTP client.
-        httpx.AsyncClient manages a connection pool automatically.
+        httpx.AsyncClient manages a connection pool, sized by the transport options.
         """
         if self.client is None or self.client.is_closed:
-            self.client = httpx.AsyncClient(timeout=self.timeout, verify=self.verify_ssl)
+            options = self.transport_options
+            self.transport = InstrumentedTransport(
+                self.name,
+                verify=self.verify_ssl,
+                http2=options["http2"],
+                limits=httpx.Limits(
+                    max_connections=options["max_connections"],
+                    max_keepalive_connections=options["max_keepalive_connections"],
+                    keepalive_expiry=options["keepalive_expiry"],
+                ),
+            )
+            self.client = httpx.AsyncClient(timeout=self.timeout, verify=self.verify_ssl, transport=self.transport)
+
+    async def warmup(self) -> int:
+        """
+        Open `warmup_connections` pooled connections with concurrent GETs to HTTP_WARMUP_PATH,
+        so the first alerts don't pay for TCP/TLS handshakes. Any HTTP status will do;
+        failures are only logged. Returns the number of requests that got a response.
+        """
+        count = self.transport_options["warmup_connections"]
+        if count <= 0:
+            return 0
+        await self.start()
+        url = self._build_url(settings.HTTP_WARMUP_PATH)
+
+        async def touch() -> bool:
+            try:
+                await self.client.get(url)
+                return True
+            except httpx.HTTPError as e:
+                logger.warning(f"Warmup request to {url} failed: {e}")
+                return False
+
+        warmed = sum(await asyncio.gather(*(touch() for _ in range(count))))
+        logger.info(f"Warmed up {warmed}/{count} connections to {self.name}")
+        return warmed
 
     async def close(self):
         """Close the persistent HTTP client."""
@@ -59,43 +125,88 @@ class BaseHTTPClient:
             await self.client.aclose()
 
     @http_retry
-    async def _request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+    async def _request(self, method: str, endpoint: str, hedge: bool = False, **kwargs) -> httpx.Response:
         """
         Generic internal helper for making HTTP requests with retries and error logging.
         Returns the raw httpx.Response object.
+        With a HedgePolicy, a slow GET is raced against a second identical one.
+        Other methods are only hedged when the caller passes `hedge` for a call
+        it knows to be idempotent.
+        Raises CircuitOpenError (not retried) while the circuit breaker is open, and
+        DeadlineExceededError once the message deadline has passed; the timeout is
+        shrunk to the time left before it.
         """
         url = self._build_url(endpoint)
+        timeout = deadlines.timeout(self.timeout, f"{self.name} request")
+        self.breaker.before_call()
         
         await self.start()
             
         try:
             if method.lower() == "post":
-                response = await self.client.post(url, **kwargs)
+                send = lambda: self.client.post(url, timeout=timeout, **kwargs)
             elif method.lower() == "get":
-                response = await self.client.get(url, **kwargs)
+                send = lambda: self.client.get(url, timeout=timeout, **kwargs)
             elif method.lower() == "patch":
-                response = await self.client.patch(url, **kwargs)
+                send = lambda: self.client.patch(url, timeout=timeout, **kwargs)
             else:
                 raise ValueError(f"Unsupported method: {method}")
-                
+
+            if self.hedge is not None and (hedge or method.lower() == "get"):
+                response = await self.hedge.run(send)
+            else:
+                response = await send()
             response.raise_for_status()
+            self.breaker.record_success()
             return response
         except httpx.HTTPStatusError as e:
+            # Only failures that say the dependency is unhealthy count; a 4xx is a healthy answer
+            if _should_retry(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
             if e.response.status_code >= 500:
                 logger.warning(f"Server Error {e.response.status_code} calling {url}: {e}. Retrying...")
             else:
                 logger.error(f"Client Error {e.response.status_code} calling {url}: {e}")
             raise
+        except httpx.TimeoutException as e:
+            if timeout >= self.timeout:
+                self.breaker.record_failure()
+                logger.warning(f"Timeout calling {url}: {e}. Retrying...")
+                raise
+            # Cut short by the message deadline, not a slow dependency
+            self.breaker.record_ignored()
+            deadlines.DEADLINE_EXCEEDED.inc(operation=f"{self.name} request")
+            raise DeadlineExceededError(f"Deadline exceeded calling {url} ({timeout:.2f}s left)") from e
         except httpx.RequestError as e:
+            self.breaker.record_failure()
             logger.warning(f"Connection Error calling {url}: {e}. Retrying...")
             raise
+        except BaseException:
+            # Cancelled or not an HTTP outcome: says nothing about the dependency
+            self.breaker.record_ignored()
+            raise
 
-    async def _post(self, endpoint: str, json_payload: dict[str, Any]) -> httpx.Response:
+    async def _post(self, endpoint: str, json_payload: dict[str, Any], hedge: bool = False) -> httpx.Response:
         """
         Internal helper for making POST requests.
+        `hedge` sends a duplicate of a slow POST, carrying the same Idempotency-Key
+        as the original and its retries. Only use it for endpoints whose server is
+        known to answer a repeated key with the original result: otherwise both
+        requests execute.
         """
+        if hedge and self.hedge is not None:
+            headers = {"Idempotency-Key": uuid.uuid4().hex}
+            return await self._request("post", endpoint, hedge=True, json=json_payload, headers=headers)
         return await self._request("post", endpoint, json=json_payload)
     
+    async def _send_json_bytes(self, method: str, endpoint: str, content: bytes) -> httpx.Response:
+        """
+        Internal helper for sending an already serialized JSON body.
+        """
+        return await self._request(method, endpoint, content=content, headers={"Content-Type": "application/json"})
+
     async def _patch(self, endpoint: str, json_payload: dict[str, Any]) -> httpx.Response:
         """
         Internal helper for making PATCH requests.
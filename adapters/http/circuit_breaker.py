@@ -0,0 +1,101 @@
+import logging
+import time
+from typing import Callable
+
+from exceptions import CircuitOpenError
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Gauge values for http_circuit_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = registry.gauge("http_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["client"])
+CIRCUIT_TRANSITIONS = registry.counter(
+    "http_circuit_transitions_total", "Circuit breaker state changes, by new state", ["client", "state"]
+)
+CIRCUIT_REJECTED = registry.counter(
+    "http_circuit_rejected_total", "Requests failed fast without network I/O because the circuit was open", ["client"]
+)
+
+
+class CircuitBreaker:
+    """
+    Per-dependency circuit breaker.
+
+    closed: requests go through; `failure_threshold` consecutive failures open it.
+    open: requests fail immediately with CircuitOpenError for `reset_timeout` seconds.
+    half_open: up to `half_open_calls` trial requests go through; one success
+    closes the circuit, one failure opens it again.
+
+    A `failure_threshold` of 0 disables the breaker.
+    """
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = max(1, half_open_calls)
+        self.clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED], client=name)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        logger.warning(f"Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+        self._trials = 0
+        CIRCUIT_STATE.set(STATE_VALUES[state], client=self.name)
+        CIRCUIT_TRANSITIONS.inc(client=self.name, state=state)
+
+    def before_call(self):
+        """Raise CircuitOpenError instead of letting a request through."""
+        if self.failure_threshold <= 0:
+            return
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and self._trials < self.half_open_calls:
+            self._trials += 1
+            return
+        CIRCUIT_REJECTED.inc(client=self.name)
+        raise CircuitOpenError(f"Circuit {self.name} is {state}, failing fast")
+
+    def record_success(self):
+        self._failures = 0
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_ignored(self):
+        """A request let through ended without a verdict (e.g. cancelled): free its half-open trial slot."""
+        if self._state == HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._failures = 0
+            self._transition(OPEN)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+HEDGE_REQUESTS = registry.counter(
+    "http_hedge_requests_total", "Hedged requests: sent, won by the hedge, or skipped by the ratio cap", ["client", "outcome"]
+)
+HEDGE_DELAY = registry.gauge("http_hedge_delay_seconds", "Current learned delay before a hedge is sent", ["client"])
+
+
+def hedge_policy(name: str, percentile: float, max_ratio: float, min_samples: int) -> Optional["HedgePolicy"]:
+    """A HedgePolicy from settings, or None when `percentile` is 0 (hedging disabled)."""
+    if percentile <= 0:
+        return None
+    return HedgePolicy(name, percentile=percentile, max_ratio=max_ratio, min_samples=min_samples)
+
+
+class HedgePolicy:
+    """
+    When to send a second, identical request for a slow idempotent call.
+
+    The hedge delay is the `percentile` (0-100) of the last `window` observed
+    latencies, once `min_samples` have been seen. Hedges are capped at
+    `max_ratio` of all requests: each request earns `max_ratio` of a hedge
+    token (up to `burst` tokens) and each hedge spends one, so a slow
+    dependency never receives more than (1 + max_ratio) times its load.
+    """
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 95.0,
+        max_ratio: float = 0.05,
+        min_samples: int = 100,
+        window: int = 1000,
+        burst: float = 10.0,
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.burst = burst
+        self._samples: deque[float] = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        # New samples since the delay was last computed
+        self._stale = 0
+        self._tokens = 0.0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self._stale += 1
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while too few latencies are known."""
+        if len(self._samples) < self.min_samples:
+            return None
+        # Re-sorting the window on every request is wasted work; a tenth of it is new enough
+        if self._delay is None or self._stale >= max(1, len(self._samples) // 10):
+            ordered = sorted(self._samples)
+            index = min(len(ordered) - 1, int(round(self.percentile / 100 * (len(ordered) - 1))))
+            self._delay = ordered[index]
+            self._stale = 0
+            HEDGE_DELAY.set(self._delay, client=self.name)
+        return self._delay
+
+    def on_request(self):
+        self._tokens = min(self.burst, self._tokens + self.max_ratio)
+
+    def try_hedge(self) -> bool:
+        if self._tokens < 1:
+            HEDGE_REQUESTS.inc(client=self.name, outcome="capped")
+            return False
+        self._tokens -= 1
+        HEDGE_REQUESTS.inc(client=self.name, outcome="sent")
+        return True
+
+    async def run(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Call `send`; if it hasn't answered within the learned delay, call it again
+        and return whichever response arrives first. A request that fails without
+        a response does not win while the other one is still running.
+        """
+        self.on_request()
+
+        async def timed() -> httpx.Response:
+            started = time.perf_counter()
+            response = await send()
+            self.observe(time.perf_counter() - started)
+            return response
+
+        delay = self.delay()
+        if delay is None:
+            return await timed()
+
+        primary = asyncio.ensure_future(timed())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self.try_hedge():
+                return await primary
+            hedge = asyncio.ensure_future(timed())
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Look at every finished task, so no exception is left unretrieved
+                for task in done:
+                    if task.exception() is not None and (error is None or task is primary):
+                        error = task.exception()
+                answered = [task for task in done if task.exception() is None]
+                if answered:
+                    if hedge in answered:
+                        HEDGE_REQUESTS.inc(client=self.name, outcome="won")
+                    return answered[0].result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
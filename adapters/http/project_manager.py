@@ -1,10 +1,22 @@
+import asyncio
+import logging
+from typing import Any, Optional, Union
+
+import httpx
+
 from config import settings
 from adapters.http.base import BaseHTTPClient
-from httpx import Response
+from adapters.http.hedging import hedge_policy
+from adapters.http.recipient_cache import RecipientCache
+from adapters.http.routing_table import RoutingTable
 from models.models import Alert, Recipient, FullAlert
-from exceptions import ProjectResolutionRetryableError, ProjectResolutionNonRetryableError
-from async_lru import alru_cache
-from typing import Any
+from exceptions import ProjectResolutionError, ProjectResolutionRetryableError, ProjectResolutionNonRetryableError
+
+logger = logging.getLogger(__name__)
+
+# (vendor, environment, site): every alert sharing it resolves to the same recipients
+ResolutionKey = tuple[str, str, str]
+
 
 class ProjectManagerClient(BaseHTTPClient):
     """
@@ -15,65 +27,202 @@ class ProjectManagerClient(BaseHTTPClient):
             base_url=settings.PROJECT_MANAGER_API_URL,
             timeout=settings.PROJECT_MANAGER_API_TIMEOUT,
             verify_ssl=settings.SSL_VERIFY,
+            name="project_manager",
+            # Recipient lookups are GETs, safe to hedge
+            hedge=hedge_policy(
+                "project_manager",
+                settings.PROJECT_MANAGER_HEDGE_PERCENTILE,
+                settings.PROJECT_MANAGER_HEDGE_MAX_RATIO,
+                settings.PROJECT_MANAGER_HEDGE_MIN_SAMPLES,
+            ),
+        )
+        self.cache = RecipientCache(
+            maxsize=settings.PROJECT_MANAGER_CACHE_SIZE,
+            ttl=settings.PROJECT_MANAGER_CACHE_TTL,
+            stale_ttl=settings.PROJECT_MANAGER_CACHE_STALE_TTL,
+            stale_if_error=settings.PROJECT_MANAGER_CACHE_STALE_IF_ERROR,
+            negative_ttl=settings.PROJECT_MANAGER_CACHE_NEGATIVE_TTL,
         )
+        # Optional preloaded (vendor, environment, site) table, kept on disk for warm starts
+        self.routing_table: Optional[RoutingTable] = None
+        if settings.PROJECT_MANAGER_SNAPSHOT_PATH:
+            self.routing_table = RoutingTable(settings.PROJECT_MANAGER_SNAPSHOT_PATH)
+        self._sync_task: Optional[asyncio.Task] = None
+        # Serializes start() calls, which check _sync_task before awaiting the snapshot load
+        self._start_lock = asyncio.Lock()
+
+    @staticmethod
+    def resolution_key(alert: Alert) -> ResolutionKey:
+        return (alert.vendor, alert.environment, alert.site)
 
-    @alru_cache(maxsize=128, ttl=60)
-    async def _resolve_cached(self, vendor_id: str, environment: str, site: str) -> Response:
+    async def start(self):
+        await super().start()
+        async with self._start_lock:
+            if self.routing_table and self._sync_task is None:
+                # Serve the previous run's snapshot right away; syncing happens in the background
+                # so startup doesn't depend on Project Manager being reachable
+                await asyncio.to_thread(self.routing_table.load)
+                self._sync_task = asyncio.create_task(self._routing_sync_loop(), name="routing-table-sync")
+
+    async def close(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        if self.routing_table:
+            # A cancelled sync may leave patch() running in its thread; close() waits for it off the loop
+            await asyncio.to_thread(self.routing_table.close)
+        await self.cache.close()
+        await super().close()
+
+    async def _routing_sync_loop(self):
+        while True:
+            try:
+                await self.sync_routing_table()
+            except Exception as e:
+                logger.warning(f"Routing table sync failed, keeping snapshot {self.routing_table.version}: {e}")
+            await asyncio.sleep(settings.PROJECT_MANAGER_SNAPSHOT_SYNC_INTERVAL)
+
+    async def sync_routing_table(self):
         """
-        Cached internal helper.
+        Pull the routing table from Project Manager: everything on the first sync,
+        only the changes since the snapshot's version afterwards.
+
+        Expected response:
+            {"version": "...", "full": bool,
+             "routes": [{"vendor", "environment", "site", "recipients": [...]}],
+             "removed": [{"vendor", "environment", "site"}]}
         """
-        payload = {
-            "vendor": vendor,
-            "environment": environment,
-            "site": site,
-        }
+        since = self.routing_table.version
         response = await self._get(
-            endpoint=f"/resolve-recipients/{vendor_id}/alerts_groups",
-            params=payload
+            endpoint=settings.PROJECT_MANAGER_SNAPSHOT_ENDPOINT,
+            params={"since": since} if since else None,
         )
-        return response
+        data = response.json()
+        version = str(data["version"])
+        if version == since:
+            return
 
-    async def resolve_recipients(self, alert: Alert) -> FullAlert:
+        def route_key(route: dict[str, Any]) -> ResolutionKey:
+            return (route.get("vendor"), route.get("environment"), route.get("site"))
+
+        routes = {route_key(r): self._merge_recipients(r) for r in data.get("routes", [])}
+        removed = [route_key(r) for r in data.get("removed", [])]
+        if since is None or data.get("full", False):
+            snapshot = await asyncio.to_thread(self.routing_table.write, version, routes.items())
+            self.routing_table.install(snapshot)
+            self.cache.invalidate()
+        else:
+            snapshot = await asyncio.to_thread(self.routing_table.patch, version, routes, removed)
+            self.routing_table.install(snapshot)
+            for key in [*routes, *removed]:
+                self.cache.invalidate(key)
+        logger.info(
+            f"Routing table synced to {version}: {len(routes)} updated, {len(removed)} removed, "
+            f"{len(self.routing_table.snapshot)} total"
+        )
+
+    async def _fetch_recipients(self, key: ResolutionKey) -> Recipient:
         """
-        Resolve recipients for the given alert and return a FullAlert.
+        Look the key up in the routing table snapshot, or else in Project Manager,
+        and merge the response into one Recipient.
         """
+        if self.routing_table:
+            recipient = self.routing_table.lookup(key)
+            if recipient is not None:
+                return recipient
+        vendor_id, environment, site = key
+        payload = {
+            "vendor": vendor_id,
+            "environment": environment,
+            "site": site,
+        }
         try:
-            data = await self._resolve_cached(
-                vendor=alert.vendor,
-                environment=alert.environment,
-                site=alert.site
+            response = await self._get(
+                endpoint=f"/resolve-recipients/{vendor_id}/alerts_groups",
+                params=payload
             )
         except Exception as e:
-             status = 500
-             if isinstance(e, httpx.HTTPStatusError):
-                 status = e.response.status_code
-                 
-             if 400 <= status < 500:
-                 raise ProjectResolutionNonRetryableError(f"Failed to resolve recipients (4xx): {e}") from e
-             raise ProjectResolutionRetryableError(f"Failed to resolve recipients: {e}") from e
+            raise self._resolution_error(e) from e
+        return self._merge_recipients(response.json())
+
+    @staticmethod
+    def _merge_recipients(data: dict[str, Any]) -> Recipient:
+        """
+        Merge every recipient in the response into one: identity from the first, all alert_groups de-duplicated.
+        """
         recipients_data = data.get("recipients", [])
-        
-        # Merge all alert_groups from all recipients found
+
         merged_groups = []
         project_id = "unknown"
         project_name = "unknown"
-        
+
         if recipients_data:
             # Take identity from first recipient
             project_id = recipients_data[0].get("project_id", "unknown")
             project_name = recipients_data[0].get("project_name", "unknown")
-            
+
             for r in recipients_data:
                 groups = r.get("alert_groups", [])
                 if groups:
                     merged_groups.extend(groups)
-        
-        # De-dup emails
-        merged_groups = list(set(merged_groups))
-
-        return FullAlert(
-            **alert.model_dump(),
-            project_id=project_id,
-            project_name=project_name,
-            alert_groups=merged_groups
+
+        # De-dup emails, keeping first-seen order
+        merged_groups = list(dict.fromkeys(merged_groups))
+
+        return Recipient(project_id=project_id, project_name=project_name, alert_groups=merged_groups)
+
+    @staticmethod
+    def _resolution_error(e: Exception) -> ProjectResolutionError:
+        status = 500
+        if isinstance(e, httpx.HTTPStatusError):
+            status = e.response.status_code
+
+        if 400 <= status < 500:
+            return ProjectResolutionNonRetryableError(f"Failed to resolve recipients (4xx): {e}")
+        return ProjectResolutionRetryableError(f"Failed to resolve recipients: {e}")
+
+    async def _resolve_key(self, key: ResolutionKey) -> Recipient:
+        """
+        Resolve the recipients for a key through the cache.
+        Callers arriving while a lookup for the same key is in flight share it (single-flight).
+        """
+        return await self.cache.get(key, self._fetch_recipients)
+
+    @staticmethod
+    def _full_alert(alert: Alert, recipient: Recipient) -> FullAlert:
+        return FullAlert(**alert.model_dump(), **recipient.model_dump())
+
+    async def resolve_recipients(self, alert: Alert) -> FullAlert:
+        """
+        Resolve recipients for the given alert and return a FullAlert.
+        """
+        recipient = await self._resolve_key(self.resolution_key(alert))
+        return self._full_alert(alert, recipient)
+
+    async def resolve_recipients_batch(self, alerts: list[Alert]) -> list[Union[FullAlert, ProjectResolutionError]]:
+        """
+        Resolve recipients for a batch of alerts with one request per distinct
+        (vendor, environment, site) key, fanned back out to every alert sharing it.
+
+        Returns one entry per alert, in input order: the FullAlert, or the
+        ProjectResolutionError raised for its key, so one failing key does not
+        fail the rest of the batch.
+        """
+        groups: dict[ResolutionKey, list[int]] = {}
+        for index, alert in enumerate(alerts):
+            groups.setdefault(self.resolution_key(alert), []).append(index)
+
+        logger.debug(f"Resolving {len(alerts)} alerts with {len(groups)} recipient lookups")
+        outcomes = await asyncio.gather(
+            *(self._resolve_key(key) for key in groups), return_exceptions=True
         )
+
+        results: list[Union[FullAlert, ProjectResolutionError]] = [None] * len(alerts)
+        for indexes, outcome in zip(groups.values(), outcomes):
+            for index in indexes:
+                if isinstance(outcome, BaseException):
+                    results[index] = outcome
+                else:
+                    results[index] = self._full_alert(alerts[index], outcome)
+        return results
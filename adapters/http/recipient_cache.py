@@ -0,0 +1,182 @@
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+import deadlines
+from exceptions import DeadlineExceededError, NonRetryableError
+from metrics import registry
+from models.models import Recipient
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = registry.counter(
+    "recipient_cache_requests_total",
+    "Recipient cache lookups by result (hit, stale, negative, miss)",
+    ["result"],
+)
+CACHE_EVICTIONS = registry.counter("recipient_cache_evictions_total", "Entries evicted to stay within the size limit")
+CACHE_STALE_ON_ERROR = registry.counter(
+    "recipient_cache_stale_on_error_total", "Stale entries served because the upstream failed"
+)
+CACHE_REFRESH_ERRORS = registry.counter("recipient_cache_refresh_errors_total", "Background refreshes that failed")
+
+Loader = Callable[[Hashable], Awaitable[Recipient]]
+
+
+class _Entry:
+    __slots__ = ("value", "error", "stored_at")
+
+    def __init__(self, value: Optional[Recipient], error: Optional[Exception], stored_at: float):
+        self.value = value
+        self.error = error
+        self.stored_at = stored_at
+
+
+class RecipientCache:
+    """
+    LRU cache of resolved recipients with stale-while-revalidate.
+
+    An entry is served as-is for `ttl` seconds. For a further `stale_ttl`
+    seconds it is still served, but a background refresh is started so the
+    next caller gets fresh data without waiting. Older entries are reloaded
+    inline; if that reload fails with a retryable error, the old value is
+    served for up to `stale_if_error` seconds past its TTL instead of failing.
+
+    Non-retryable failures (e.g. 404 for an unknown vendor) are cached as
+    negative entries for `negative_ttl` seconds and re-raised on every hit.
+    Concurrent loads of the same key share one loader call, run without any
+    caller's deadline; each caller only waits for it until its own deadline.
+    """
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        stale_if_error: float = 0.0,
+        negative_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stale_if_error = stale_if_error
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._loading: dict[Hashable, asyncio.Future] = {}
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, loader: Loader) -> Recipient:
+        """Return the cached value for `key`, calling `loader(key)` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self.clock() - entry.stored_at
+            if entry.error is not None:
+                if age < self.negative_ttl:
+                    CACHE_REQUESTS.inc(result="negative")
+                    # A fresh copy per hit: re-raising the stored instance would keep growing its traceback
+                    raise copy.copy(entry.error).with_traceback(None)
+            elif age < self.ttl:
+                CACHE_REQUESTS.inc(result="hit")
+                self._entries.move_to_end(key)
+                return entry.value
+            elif age < self.ttl + self.stale_ttl:
+                CACHE_REQUESTS.inc(result="stale")
+                self._entries.move_to_end(key)
+                self._refresh(key, loader)
+                return entry.value
+
+        CACHE_REQUESTS.inc(result="miss")
+        future = self._loading.get(key)
+        if future is None:
+            # Shared by every caller for the key, so it runs without the first caller's deadline
+            with deadlines.scope(None):
+                future = asyncio.ensure_future(self._load(key, loader))
+            self._loading[key] = future
+            future.add_done_callback(lambda f: self._loaded(key, f))
+        # Shielded so one cancelled (or timed out) caller doesn't cancel the load for everyone else
+        left = deadlines.remaining()
+        if left is None:
+            return await asyncio.shield(future)
+        deadlines.check("recipient lookup")
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), left)
+        except asyncio.TimeoutError:
+            if future.done():
+                raise
+            deadlines.DEADLINE_EXCEEDED.inc(operation="recipient lookup")
+            raise DeadlineExceededError(f"Recipient lookup for {key} not done within the deadline ({left:.2f}s)")
+
+    def _loaded(self, key: Hashable, future: asyncio.Future):
+        self._loading.pop(key, None)
+        # Retrieve the outcome so a failure whose callers all went away isn't reported as unhandled
+        if not future.cancelled():
+            future.exception()
+
+    async def _load(self, key: Hashable, loader: Loader) -> Recipient:
+        try:
+            value = await loader(key)
+        except NonRetryableError as e:
+            self._store(key, _Entry(None, e, self.clock()))
+            raise
+        except Exception as e:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.error is None
+                and self.clock() - entry.stored_at < self.ttl + self.stale_if_error
+            ):
+                logger.warning(f"Recipient lookup for {key} failed, serving stale entry: {e}")
+                CACHE_STALE_ON_ERROR.inc()
+                return entry.value
+            raise
+        self._store(key, _Entry(value, None, self.clock()))
+        return value
+
+    def _refresh(self, key: Hashable, loader: Loader):
+        """Reload `key` in the background, at most one refresh per key at a time."""
+        if key in self._refreshing or key in self._loading:
+            return
+
+        async def refresh():
+            try:
+                # Nobody waits on a background refresh, so the caller's deadline does not apply
+                with deadlines.scope(None):
+                    await self._load(key, loader)
+            except Exception as e:
+                # The stale entry stays in place (or the negative one replaced it)
+                CACHE_REFRESH_ERRORS.inc()
+                logger.warning(f"Background refresh of recipients for {key} failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def _store(self, key: Hashable, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.inc()
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def close(self):
+        """Cancel background refreshes."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
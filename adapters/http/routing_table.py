@@ -0,0 +1,185 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Iterable, Iterator, Optional
+
+from models.models import Recipient
+
+logger = logging.getLogger(__name__)
+
+"""
+ROUTING TABLE SNAPSHOT
+----------------------
+The full (vendor, environment, site) -> Recipient table, persisted as a
+compact binary file that is memory-mapped and searched in place, so a
+restarting pod can resolve recipients before Project Manager is reachable
+without parsing (or holding) the whole table in memory.
+
+Layout (little-endian):
+    header   b"RTS1" | u32 count | u16 version length | version (utf-8)
+    index    (count + 1) x u32 record offsets, records sorted by key
+    records  u16 key length | key (utf-8) | Recipient JSON
+"""
+
+MAGIC = b"RTS1"
+_HEADER = struct.Struct("<4sIH")
+_OFFSET = struct.Struct("<I")
+_KEY_LEN = struct.Struct("<H")
+# Separator for the key parts; never appears in label values
+_SEP = "\x1f"
+
+RouteKey = tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def encode_key(key: RouteKey) -> bytes:
+    return _SEP.join(part or "" for part in key).encode()
+
+
+def write_snapshot(path: str, version: str, routes: Iterable[tuple[RouteKey, Recipient]]):
+    """
+    Write a snapshot atomically: to a temp file first, then renamed over `path`,
+    so readers never see a half-written table.
+    """
+    records = sorted((encode_key(key), recipient.model_dump_json().encode()) for key, recipient in routes)
+    version_bytes = version.encode()
+
+    offset = _HEADER.size + len(version_bytes) + _OFFSET.size * (len(records) + 1)
+    offsets = []
+    for key, value in records:
+        offsets.append(offset)
+        offset += _KEY_LEN.size + len(key) + len(value)
+    offsets.append(offset)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(records), len(version_bytes)))
+        f.write(version_bytes)
+        f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        for key, value in records:
+            f.write(_KEY_LEN.pack(len(key)))
+            f.write(key)
+            f.write(value)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RoutingSnapshot:
+    """
+    Read-only view over a snapshot file. Lookups binary-search the mapped index
+    and only decode the one matching record.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.count, version_len = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a routing table snapshot")
+            self.version = bytes(self._map[_HEADER.size:_HEADER.size + version_len]).decode()
+            self._index = _HEADER.size + version_len
+            expected_end = self._offset(self.count)
+            if expected_end != len(self._map):
+                raise ValueError(f"{path} is truncated ({len(self._map)} of {expected_end} bytes)")
+        except Exception:
+            self._map.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, i: int) -> int:
+        return _OFFSET.unpack_from(self._map, self._index + i * _OFFSET.size)[0]
+
+    def _key_at(self, i: int) -> tuple[bytes, int]:
+        """Key of record i and the offset where its value starts."""
+        start = self._offset(i)
+        (key_len,) = _KEY_LEN.unpack_from(self._map, start)
+        key_start = start + _KEY_LEN.size
+        return self._map[key_start:key_start + key_len], key_start + key_len
+
+    def get(self, key: RouteKey) -> Optional[Recipient]:
+        target = encode_key(key)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, value_start = self._key_at(mid)
+            if found == target:
+                return Recipient.model_validate_json(self._map[value_start:self._offset(mid + 1)])
+            if found < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def items(self) -> Iterator[tuple[RouteKey, Recipient]]:
+        for i in range(self.count):
+            key, value_start = self._key_at(i)
+            parts = tuple(part or None for part in key.decode().split(_SEP))
+            yield parts, Recipient.model_validate_json(self._map[value_start:self._offset(i + 1)])
+
+    def close(self):
+        self._map.close()
+
+
+class RoutingTable:
+    """
+    The current snapshot plus the logic to replace or patch it.
+    Every update writes a new file and swaps the mapping; there is no in-memory copy.
+    Writing (write/patch) may run in a thread, install() must run on the event loop.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshot: Optional[RoutingSnapshot] = None
+        # Held while patch() reads the mapped snapshot from a thread, so it is never unmapped under it
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.snapshot.version if self.snapshot else None
+
+    def load(self) -> bool:
+        """Open the snapshot left by a previous run. Returns False if there is none (or it is unreadable)."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            self.install(RoutingSnapshot(self.path))
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable routing table snapshot {self.path}: {e}")
+            return False
+        logger.info(f"Loaded routing table snapshot {self.version} with {len(self.snapshot)} routes")
+        return True
+
+    def lookup(self, key: RouteKey) -> Optional[Recipient]:
+        return self.snapshot.get(key) if self.snapshot else None
+
+    def write(self, version: str, routes: Iterable[tuple[RouteKey, Recipient]]) -> RoutingSnapshot:
+        """Write a full table and open it. Blocking; call install() with the result to start serving it."""
+        write_snapshot(self.path, version, routes)
+        return RoutingSnapshot(self.path)
+
+    def patch(self, version: str, upserts: dict[RouteKey, Recipient], removals: Iterable[RouteKey]) -> RoutingSnapshot:
+        """Write the current table with an incremental change set applied (see write())."""
+        removed = set(removals) | set(upserts)
+        with self._lock:
+            current = self.snapshot.items() if self.snapshot else ()
+            routes = [(key, r) for key, r in current if key not in removed]
+        routes.extend(upserts.items())
+        return self.write(version, routes)
+
+    def install(self, snapshot: RoutingSnapshot):
+        """Serve lookups from `snapshot` and unmap the previous one."""
+        with self._lock:
+            previous, self.snapshot = self.snapshot, snapshot
+            if previous:
+                previous.close()
+
+    def close(self):
+        """Unmap the snapshot; waits for a patch() still reading it. Blocking."""
+        with self._lock:
+            if self.snapshot:
+                self.snapshot.close()
+                self.snapshot = None
@@ -0,0 +1,85 @@
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from config import settings
+from metrics import registry
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # optional dependency (pip install .[http2])
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+POOL_WAIT = registry.histogram(
+    "http_pool_wait_seconds",
+    "Time from sending a request until it got a connection (pooled or newly opened)",
+    ["client"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+CONNECTION_USE = registry.counter(
+    "http_connection_requests_total", "Requests by whether they opened a new connection or reused one", ["client", "connection"]
+)
+REUSE_RATIO = registry.gauge("http_connection_reuse_ratio", "Share of requests sent on an already open connection", ["client"])
+
+TRANSPORT_OPTIONS = ("max_connections", "max_keepalive_connections", "keepalive_expiry", "http2", "warmup_connections")
+
+
+def transport_options(name: str) -> dict[str, Any]:
+    """HTTP_* transport defaults, overridden by HTTP_TRANSPORT_OVERRIDES[name]."""
+    options = {
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": settings.HTTP_KEEPALIVE_EXPIRY,
+        "http2": settings.HTTP_HTTP2,
+        "warmup_connections": settings.HTTP_WARMUP_CONNECTIONS,
+    }
+    overrides = settings.HTTP_TRANSPORT_OVERRIDES.get(name, {})
+    unknown = set(overrides) - set(TRANSPORT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown transport options for {name}: {sorted(unknown)}, expected {TRANSPORT_OPTIONS}")
+    options.update(overrides)
+    if options["http2"] and h2 is None:
+        logger.warning(f"HTTP/2 requested for {name} but h2 is not installed, falling back to HTTP/1.1")
+        options["http2"] = False
+    return options
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport reporting, per client, how long requests waited for a
+    connection and whether they opened a new one or reused a pooled one.
+
+    Both come from httpcore trace events: the first event of a request is
+    either a connection being opened ("connection.*") or the request headers
+    going out on an existing one.
+    """
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.opened = 0
+        self.reused = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        seen = False
+
+        async def trace(event: str, info: dict):
+            nonlocal seen
+            if seen or not event.endswith(".started"):
+                return
+            seen = True
+            POOL_WAIT.observe(time.perf_counter() - started, client=self.name)
+            if event.startswith("connection."):
+                self.opened += 1
+                CONNECTION_USE.inc(client=self.name, connection="new")
+            else:
+                self.reused += 1
+                CONNECTION_USE.inc(client=self.name, connection="reused")
+            REUSE_RATIO.set(self.reused / (self.opened + self.reused), client=self.name)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await super().handle_async_request(request)
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """
+    Collects items and hands them to `flush_callback` in batches.
+
+    A batch is flushed as soon as it holds `max_size` items, or `max_delay`
+    seconds after its first item arrived, whichever happens first.
+    Flushes run as background tasks so intake is never blocked by processing.
+    """
+    def __init__(
+        self,
+        flush_callback: Callable[[list[T]], Awaitable[Any]],
+        max_size: int,
+        max_delay: float,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.flush_callback = flush_callback
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._items: list[T] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of items waiting for the next flush."""
+        return len(self._items)
+
+    def add(self, item: T):
+        """Add an item, flushing immediately if the batch is full."""
+        self._items.append(item)
+        if len(self._items) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+
+    def flush(self):
+        """Hand the current batch (if any) to the flush callback."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        batch, self._items = self._items, []
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[T]):
+        try:
+            await self.flush_callback(batch)
+        except Exception as e:
+            logger.error(f"Batch flush of {len(batch)} items failed: {e}")
+
+    async def close(self):
+        """Flush what is buffered and wait for all in-progress flushes."""
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,64 @@
+import logging
+from typing import Callable, Union
+
+from config import settings
+from models.models import Alert, AlertGroup
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+Payload = Union[Alert, AlertGroup]
+Decoder = Callable[[bytes], Payload]
+
+
+# Grouped Alertmanager webhooks carry an "alerts" array; single alerts don't.
+# Inside a JSON string the quotes would be escaped, so this only matches a key
+# (or a bare "alerts" value, which the fallback below handles).
+_GROUP_MARKER = b'"alerts"'
+
+
+def decode_payload_pydantic(body: bytes) -> Payload:
+    """
+    Validate the raw message bytes straight into an Alert or AlertGroup.
+    pydantic-core parses and validates in a single pass, without an
+    intermediate str or dict.
+    """
+    if _GROUP_MARKER in body:
+        try:
+            return AlertGroup.model_validate_json(body)
+        except ValueError as group_error:
+            try:
+                return Alert.model_validate_json(body)
+            except ValueError:
+                raise group_error
+    return Alert.model_validate_json(body)
+
+
+def decode_payload_orjson(body: bytes) -> Payload:
+    """
+    Parse the raw bytes with orjson, then validate the resulting dict.
+    """
+    data = orjson.loads(body)
+    if isinstance(data, dict) and "alerts" in data:
+        return AlertGroup.model_validate(data)
+    return Alert.model_validate(data)
+
+
+def get_decoder(name: str) -> Decoder:
+    """
+    Return the decoder configured by RABBITMQ_JSON_DECODER.
+    Falls back to the pydantic decoder if orjson is requested but not installed.
+    """
+    if name == "orjson":
+        if orjson is not None:
+            return decode_payload_orjson
+        logger.warning("orjson is not installed, falling back to pydantic JSON decoding")
+    return decode_payload_pydantic
+
+
+decode_payload: Decoder = get_decoder(settings.RABBITMQ_JSON_DECODER)
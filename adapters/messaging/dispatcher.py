@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import zlib
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class ShardedDispatcher:
+    """
+    Bounded pool of async workers sharded by a routing key.
+
+    Every key is hashed onto exactly one worker, and each worker drains its
+    own FIFO queue sequentially. Jobs for the same key (e.g. the same alert
+    fingerprint) therefore run in submission order, while jobs for different
+    keys run in parallel across workers.
+    """
+    def __init__(self, worker_count: int, queue_size: int = 0):
+        if worker_count < 1:
+            raise ValueError("worker_count must be >= 1")
+        self.worker_count = worker_count
+        self.queue_size = queue_size
+        self._queues: list[asyncio.Queue] = []
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def _shard_for(self, key: str) -> int:
+        # crc32 is stable across processes, unlike the salted built-in hash()
+        return zlib.crc32(key.encode()) % self.worker_count
+
+    async def start(self):
+        """Spawn the worker tasks."""
+        if self.is_running:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.worker_count)]
+        self._workers = [
+            asyncio.create_task(self._worker(i, q), name=f"dispatcher-worker-{i}")
+            for i, q in enumerate(self._queues)
+        ]
+        logger.info(f"Dispatcher started with {self.worker_count} workers")
+
+    async def submit(self, key: str, job: Job, priority: int = 0) -> asyncio.Future:
+        """
+        Enqueue a job on the worker owning `key`.
+        `priority` is accepted for API parity with PriorityDispatcher; shards are strictly FIFO.
+
+        Waits only for queue space (backpressure), not for the job itself.
+        Returns a future resolved with the job's result or exception.
+        """
+        if not self.is_running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[self._shard_for(key)].put((job, future))
+        return future
+
+    async def _worker(self, index: int, queue: asyncio.Queue):
+        while True:
+            job, future = await queue.get()
+            try:
+                result = await job()
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Dispatcher worker {index} job failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued job has finished.
+        Returns False if the timeout elapsed first.
+        """
+        waiters = [q.join() for q in self._queues]
+        if not waiters:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self):
+        """Cancel the workers. Jobs still queued are dropped and their futures cancelled."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for queue in self._queues:
+            while not queue.empty():
+                _, future = queue.get_nowait()
+                future.cancel()
+        self._workers = []
+        self._queues = []
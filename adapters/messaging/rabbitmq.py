@@ -1,26 +1,87 @@
 import asyncio
 import json
 import logging
-from typing import Callable, Awaitable, Optional
+import time
+from collections.abc import Mapping
+from typing import Any, Callable, Awaitable, Optional, Union
 
 import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
 
+import deadlines
 from config import settings
-from models.models import Alert
+from metrics import registry
+from models.models import Alert, AlertGroup, Disposition
 from exceptions import RetryableError, NonRetryableError
+from adapters.messaging.batcher import MicroBatcher
+from adapters.messaging.codec import Payload, decode_payload
+from adapters.messaging.dispatcher import ShardedDispatcher
+from adapters.messaging.retry import RetryTopology
+from adapters.messaging.scheduler import PriorityDispatcher
 
 logger = logging.getLogger(__name__)
 
+INFLIGHT_MESSAGES = registry.gauge(
+    "consumer_inflight_messages", "Deliveries received but not yet settled"
+)
+DRAIN_DURATION = registry.gauge(
+    "consumer_drain_duration_seconds", "Duration of the last shutdown drain"
+)
+DRAIN_ABANDONED = registry.counter(
+    "consumer_drain_abandoned_messages_total", "Deliveries still unsettled when the drain deadline expired"
+)
+
+
+def _json_default(value: Any) -> Any:
+    # Group children layer their labels over the group's common mappings (see AlertGroup)
+    return dict(value) if isinstance(value, Mapping) else str(value)
+
 
 class RabbitMQConsumer:
-    def __init__(self, process_alert_callback: Callable[[Alert], Awaitable[None]]):
+    def __init__(
+        self,
+        process_alert_callback: Callable[[Alert], Awaitable[None]],
+        process_batch_callback: Optional[Callable[[list[Alert]], Awaitable[list[Disposition]]]] = None,
+    ):
         self.url = settings.RABBITMQ_URL
         self.queue_name = settings.RABBITMQ_QUEUE_NAME
         self.prefetch_count = settings.RABBITMQ_PREFETCH_COUNT
         self.process_callback = process_alert_callback
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
+        self.queue: Optional[aio_pika.abc.AbstractQueue] = None
+        self._consumer_tag: Optional[str] = None
+        # Optional worker pool; with 0 workers alerts are processed inline in the delivery callback
+        self.dispatcher: Optional[Union[ShardedDispatcher, PriorityDispatcher]] = None
+        if settings.RABBITMQ_WORKER_COUNT > 0 and settings.RABBITMQ_PRIORITY_SCHEDULING:
+            self.dispatcher = PriorityDispatcher(
+                worker_count=settings.RABBITMQ_WORKER_COUNT,
+                queue_size=settings.RABBITMQ_WORKER_QUEUE_SIZE,
+                aging=settings.RABBITMQ_PRIORITY_AGING_MS / 1000,
+            )
+        elif settings.RABBITMQ_WORKER_COUNT > 0:
+            self.dispatcher = ShardedDispatcher(
+                worker_count=settings.RABBITMQ_WORKER_COUNT,
+                queue_size=settings.RABBITMQ_WORKER_QUEUE_SIZE,
+            )
+        # Delayed retries; declared on connect. Without it retryable failures are requeued immediately
+        self.retry_topology: Optional[RetryTopology] = None
+        # Optional micro-batching mode; takes precedence over the worker pool
+        self.process_batch_callback = process_batch_callback
+        self.batcher: Optional[MicroBatcher[tuple[Alert, asyncio.Future, Optional[float]]]] = None
+        if process_batch_callback and settings.RABBITMQ_BATCH_SIZE > 1:
+            self.batcher = MicroBatcher(
+                flush_callback=self._process_batch,
+                max_size=settings.RABBITMQ_BATCH_SIZE,
+                max_delay=settings.RABBITMQ_BATCH_TIMEOUT_MS / 1000,
+            )
+        # Background settle tasks for deliveries handed to the worker pool or batcher
+        self._tasks: set[asyncio.Task] = set()
+        # In-flight tracking for graceful drain
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._draining = False
 
     @property
     def is_connected(self) -> bool:
@@ -34,67 +95,313 @@ class RabbitMQConsumer:
             )
             self.channel = await self.connection.channel()
             await self.channel.set_qos(prefetch_count=self.prefetch_count)
+
+            if self.dispatcher:
+                await self.dispatcher.start()
             
             # Declare queue (durable)
-            queue = await self.channel.declare_queue(
+            self.queue = await self.channel.declare_queue(
                 self.queue_name,
                 durable=True,
                 arguments={"x-max-priority": 10}  # Support priority
             )
+
+            if settings.RABBITMQ_RETRY_DELAYS_MS:
+                self.retry_topology = RetryTopology(
+                    queue_name=self.queue_name,
+                    delays_ms=settings.RABBITMQ_RETRY_DELAYS_MS,
+                    max_attempts=settings.RABBITMQ_RETRY_MAX_ATTEMPTS,
+                )
+                await self.retry_topology.declare(self.channel)
             
-            await queue.consume(self.on_message)
+            self._consumer_tag = await self.queue.consume(self.on_message)
             logger.info(f"RabbitMQ connected and consuming from {self.queue_name}")
         except Exception as e:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
             raise
 
+    @property
+    def inflight(self) -> int:
+        """Deliveries received but not yet settled."""
+        return self._inflight
+
+    def _track(self, delta: int):
+        self._inflight += delta
+        INFLIGHT_MESSAGES.set(self._inflight)
+        if self._inflight == 0:
+            self._idle.set()
+        else:
+            self._idle.clear()
+
     async def on_message(self, message: AbstractIncomingMessage):
-        async with message.process(ignore_processed=True):
+        if self._draining:
+            # Delivered after we stopped consuming: hand it straight back to the broker
+            await message.nack(requeue=True)
+            return
+
+        self._track(+1)
+        handed_off = False
+        try:
+            payload = await self._decode(message)
+            if payload is None:
+                return
+
+            if isinstance(payload, AlertGroup):
+                settle = await self._dispatch_group(message, payload)
+            else:
+                outcome = await self._submit(message, payload)
+                settle = self._settle_when_done(message, outcome)
+            # From here on _finish owns the in-flight slot
+            handed_off = True
+            await self._finish(settle)
+        finally:
+            if not handed_off:
+                self._track(-1)
+
+    @staticmethod
+    def _priority(message: AbstractIncomingMessage, alert: Alert) -> int:
+        """
+        Local scheduling priority: AMQP message priority plus alert severity.
+        """
+        return (message.priority or 0) + alert.severity_priority
+
+    async def _decode(self, message: AbstractIncomingMessage) -> Optional[Payload]:
+        """
+        Decode the message body into an Alert or a grouped AlertGroup.
+        Malformed messages are rejected (not requeued) and None is returned.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Message received: %r", message.body)
+        try:
+            return decode_payload(message.body)
+        except ValueError as e:
+            # Covers pydantic ValidationError (including invalid JSON) and decoder errors
+            logger.error("Invalid message format: %s. Body: %r", e, message.body)
+            await message.reject(requeue=False)
+            return None
+
+    async def _submit(self, message: AbstractIncomingMessage, alert: Alert) -> Awaitable[Disposition]:
+        """
+        Hand the alert to the configured execution mode.
+        Returns an awaitable resolving to the alert's Disposition.
+        The deadline budget starts now, so time spent queued counts against it.
+        """
+        deadline = deadlines.after(settings.MESSAGE_DEADLINE_SECONDS)
+        if self.batcher:
+            # Resolved once the batch this alert lands in has been processed
+            future = asyncio.get_running_loop().create_future()
+            self.batcher.add((alert, future, deadline))
+            return future
+        if self.dispatcher:
+            # Queued on the worker owning this fingerprint
+            return await self.dispatcher.submit(
+                alert.dedup_key,
+                lambda: self._process_alert(alert, deadline),
+                priority=self._priority(message, alert),
+            )
+        # Inline: runs when awaited
+        return self._process_alert(alert, deadline)
+
+    async def _finish(self, settle: Awaitable[None]):
+        """
+        Settle inline, or in the background when a worker pool or batcher runs the work,
+        so the delivery callback returns as soon as the message has been handed off.
+        Releases the delivery's in-flight slot once settled.
+        """
+        async def tracked():
             try:
-                body = message.body.decode()
-                logger.debug(f"Message received: {body}")
-                
-                try:
-                    alert_data = json.loads(body)
-                    alert = Alert(**alert_data)
-                except (json.JSONDecodeError, ValueError) as e:
-                    logger.error(f"Invalid message format: {e}. Body: {body}")
-                    await message.reject(requeue=False)
-                    return
+                await settle
+            finally:
+                self._track(-1)
 
+        if not (self.batcher or self.dispatcher):
+            await tracked()
+            return
+        task = asyncio.create_task(tracked())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _settle_when_done(self, message: AbstractIncomingMessage, outcome: Awaitable[Disposition]):
+        await self._settle(message, await outcome)
+
+    async def _process_alert(self, alert: Alert, deadline: Optional[float] = None) -> Disposition:
+        """
+        Run the processing callback for a decoded alert, under its deadline,
+        and map the outcome to a Disposition.
+        """
+        try:
+            with deadlines.scope(deadline):
                 await self.process_callback(alert)
-                logger.info(f"Message processed successfully: {alert.fingerprint}")
+            logger.info(f"Message processed successfully: {alert.fingerprint}")
+            return Disposition.ACK
+        except RetryableError as e:
+            logger.warning(f"Retryable error processing alert: {e}")
+            return Disposition.NACK
+        except NonRetryableError as e:
+            logger.error(f"Non-retryable error processing alert: {e}")
+            return Disposition.REJECT
+        except Exception as e:
+            logger.error(f"Unexpected error processing message: {e}")
+            # Default safety: NACK (requeue) for transient.
+            return Disposition.NACK
+
+    async def _process_batch(self, items: list[tuple[Alert, asyncio.Future, Optional[float]]]):
+        """
+        Run the batch callback, under the latest deadline in the batch (an earlier one
+        would cut short items that still have time), and resolve every alert's future
+        with its own disposition.
+        """
+        alerts = [alert for alert, _, _ in items]
+        item_deadlines = [d for _, _, d in items]
+        deadline = None if None in item_deadlines else max(item_deadlines)
+        try:
+            with deadlines.scope(deadline):
+                dispositions = await self.process_batch_callback(alerts)
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} alerts failed: {e}")
+            dispositions = [Disposition.from_error(e)] * len(items)
+
+        if len(dispositions) != len(items):
+            error = RetryableError(f"Batch callback returned {len(dispositions)} dispositions for {len(items)} alerts")
+            logger.error(str(error))
+            # Every future must resolve, or its message is never settled
+            missing = max(len(items) - len(dispositions), 0)
+            dispositions = list(dispositions[:len(items)]) + [Disposition.from_error(error)] * missing
+
+        for (_, future, _), disposition in zip(items, dispositions):
+            if not future.done():
+                future.set_result(disposition)
+
+    async def _dispatch_group(self, message: AbstractIncomingMessage, group: AlertGroup) -> Awaitable[None]:
+        """
+        Fan a grouped Alertmanager payload out as individual alerts.
+        Children are validated and submitted one at a time, so the first ones are
+        already being processed while later ones are still being validated.
+        Returns the awaitable that settles the grouped delivery.
+        """
+        children: list[tuple[dict[str, Any], Optional[Awaitable[Disposition]]]] = []
+        for payload in group.iter_alert_payloads():
+            try:
+                alert = Alert.model_validate(payload)
+            except ValueError as e:
+                logger.error(f"Invalid alert in group {group.groupKey}: {e}")
+                children.append((payload, None))
+                continue
+            children.append((payload, await self._submit(message, alert)))
+
+        logger.info(f"Dispatched group {group.groupKey} with {len(children)} alerts")
+        return self._settle_group(message, group, children)
+
+    async def _settle_group(
+        self,
+        message: AbstractIncomingMessage,
+        group: AlertGroup,
+        children: list[tuple[dict[str, Any], Optional[Awaitable[Disposition]]]],
+    ):
+        """
+        Ack the grouped delivery once every child succeeded.
+
+        Failed children are republished on their own: retryable ones to the delay
+        queues, invalid or non-retryable ones to the parking queue, after which the
+        group is acked. Without a retry topology the whole delivery is settled by
+        its worst child outcome instead.
+        """
+        async def resolve(outcome: Optional[Awaitable[Disposition]]) -> Disposition:
+            return Disposition.REJECT if outcome is None else await outcome
+
+        dispositions = await asyncio.gather(*(resolve(outcome) for _, outcome in children))
+        failed = [(payload, d) for (payload, _), d in zip(children, dispositions) if d != Disposition.ACK]
+
+        if not failed:
+            await self._settle(message, Disposition.ACK)
+            return
+
+        logger.warning(f"{len(failed)}/{len(children)} alerts failed in group {group.groupKey}")
+        if not self.retry_topology:
+            worst = Disposition.NACK if any(d == Disposition.NACK for _, d in failed) else Disposition.REJECT
+            await self._settle(message, worst)
+            return
+
+        async with message.process(ignore_processed=True):
+            try:
+                for payload, disposition in failed:
+                    body = json.dumps(payload, default=_json_default).encode()
+                    if disposition == Disposition.REJECT:
+                        await self.retry_topology.park(message, reason=f"failed in group {group.groupKey}", body=body)
+                    else:
+                        await self.retry_topology.retry(message, body=body)
                 await message.ack()
-                
-            except RetryableError as e:
-                logger.warning(f"Retryable error processing alert: {e}")
-                # Requeue message to be retried
+            except Exception as e:
+                logger.error(f"Failed to route failed group children, requeueing group: {e}")
                 await message.nack(requeue=True)
-            except NonRetryableError as e:
-                logger.error(f"Non-retryable error processing alert: {e}")
+
+    async def _settle(self, message: AbstractIncomingMessage, disposition: Disposition):
+        """
+        Ack, requeue or dead-letter the message.
+        """
+        # With ignore_processed=True, message.process() does not settle the message for us.
+        async with message.process(ignore_processed=True):
+            if disposition == Disposition.ACK:
+                await message.ack()
+            elif disposition == Disposition.REJECT:
                 # Dead letter or discard
                 await message.reject(requeue=False)
-            except Exception as e:
-                logger.error(f"Unexpected error processing message: {e}")
-                # Re-raise to trigger nack (default behavior of aio_pika process context manager depending on version/handling)
-                # But we are in a Manual loop logic here.
-                # 'message.process' context manager automatically acks if no exception, and nacks if exception is raised (if ignore_processed=False).
-                # We passed ignore_processed=True, so we are manually responsible?
-                # Docs say: `async with message.process():`
-                # If ignore_processed=True, it DOES NOT auto ack/nack?
-                # Actually, `message.process()` does catch exceptions and NACKs if ignore_processed=False (default).
-                # Code uses `ignore_processed=True`. Why?
-                # "When ignore_processed=True you must process message manually (ack, reject, nack)"
-                # Wait, looking at line 51: `async with message.process(ignore_processed=True):`
-                # If so, existing code `raise e` at line 70 would crash the consumer loop unless `message.process` catches it?
-                # aio-pika's `process` context manager (if default) catches exception and nacks.
-                # If `ignore_processed=True`, it probably does NOTHING.
-                # So if loop logic raises, valid.
-                
-                # I should handle it explicitly to be safe.
-                # Default safety: NACK (requeue) for transient.
+            elif self.retry_topology:
+                try:
+                    # Publish the delayed copy first, so the message is never lost between the two steps
+                    await self.retry_topology.retry(message)
+                    await message.ack()
+                except Exception as e:
+                    logger.error(f"Failed to schedule delayed retry, requeueing: {e}")
+                    await message.nack(requeue=True)
+            else:
+                # Requeue message to be retried
                 await message.nack(requeue=True)
 
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Graceful shutdown, step 1: stop accepting deliveries, then wait for in-flight
+        ones to be settled, up to `timeout` seconds.
+        Returns the number of deliveries abandoned (left unacked, so the broker redelivers them).
+        """
+        timeout = settings.SHUTDOWN_DRAIN_TIMEOUT if timeout is None else timeout
+        started = time.monotonic()
+        self._draining = True
+
+        if self.queue is not None and self._consumer_tag is not None:
+            try:
+                await self.queue.cancel(self._consumer_tag)
+            except Exception as e:
+                logger.warning(f"Failed to cancel consumer: {e}")
+        if self.batcher:
+            # Don't let buffered messages wait out the batch timer
+            self.batcher.flush()
+
+        logger.info(f"Draining {self._inflight} in-flight messages (timeout {timeout}s)...")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        abandoned = self._inflight
+        duration = time.monotonic() - started
+        DRAIN_DURATION.set(duration)
+        if abandoned:
+            DRAIN_ABANDONED.inc(abandoned)
+            logger.warning(f"Drain deadline reached after {duration:.2f}s, abandoning {abandoned} messages")
+        else:
+            logger.info(f"Drain completed in {duration:.2f}s")
+        return abandoned
+
     async def close(self):
+        if self.batcher:
+            await self.batcher.close()
+        if self.dispatcher:
+            await self.dispatcher.close()
+        # Anything still unsettled past the drain is abandoned: left unacked for redelivery
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
         if self.connection:
             await self.connection.close()
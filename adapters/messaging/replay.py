@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator, Optional
+
+from adapters.messaging.codec import decode_payload
+from models.models import Alert, AlertGroup
+
+logger = logging.getLogger(__name__)
+
+
+SHAPES = ("constant", "burst")
+
+
+def iter_jsonl_files(path: str) -> list[Path]:
+    """A single JSONL file, or every *.jsonl file in a directory (sorted by name)."""
+    root = Path(path)
+    if root.is_dir():
+        files = sorted(root.glob("*.jsonl"))
+    else:
+        files = [root]
+    if not files or not all(f.is_file() for f in files):
+        raise FileNotFoundError(f"No JSONL files found at {path}")
+    return files
+
+
+def iter_alerts(files: list[Path]) -> Iterator[tuple[Optional[Alert], Optional[str]]]:
+    """
+    Stream alerts line by line, fanning grouped Alertmanager payloads out.
+    Yields (alert, None), or (None, error) for lines that fail to decode.
+    """
+    for file in files:
+        with file.open("rb") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    payload = decode_payload(line)
+                except ValueError as e:
+                    yield None, f"{file.name}:{line_no}: {e}"
+                    continue
+                if not isinstance(payload, AlertGroup):
+                    yield payload, None
+                    continue
+                for child in payload.iter_alert_payloads():
+                    try:
+                        yield Alert.model_validate(child), None
+                    except ValueError as e:
+                        yield None, f"{file.name}:{line_no}: {e}"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ReplayReport:
+    """
+    Outcome of a replay run. Latency is measured from the moment an alert was
+    scheduled to be sent, not from when a concurrency slot freed up, so time
+    spent waiting behind a saturated orchestrator is included.
+    """
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.invalid = 0
+        self.latencies: list[float] = []
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        p50, p90, p99 = (percentile(self.latencies, p) * 1000 for p in (50, 90, 99))
+        peak = max(self.latencies, default=0.0) * 1000
+        return (
+            f"{self.sent} alerts in {self.elapsed:.2f}s ({self.throughput:,.1f}/s), "
+            f"{self.failed} failed, {self.invalid} invalid | "
+            f"latency ms p50={p50:.1f} p90={p90:.1f} p99={p99:.1f} max={peak:.1f}"
+        )
+
+
+class ReplayDriver:
+    """
+    Streams alerts from JSONL files into a processing callback, as a local
+    stand-in for the broker during load tests.
+
+    `rate` is the target alerts per second (0 = as fast as `concurrency` allows).
+    With shape "constant" alerts are evenly spaced; with "burst" they are sent
+    `burst_size` at a time with idle gaps, keeping the same average rate.
+    `concurrency` caps alerts being processed at once. With `loop` the files are
+    replayed until `stop()` is called.
+    """
+    def __init__(
+        self,
+        callback: Callable[[Alert], Awaitable[None]],
+        path: str,
+        rate: float = 0.0,
+        shape: str = "constant",
+        burst_size: int = 50,
+        concurrency: int = 10,
+        loop: bool = False,
+    ):
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown replay shape {shape!r}, expected one of {SHAPES}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.callback = callback
+        self.files = iter_jsonl_files(path)
+        self.rate = rate
+        self.shape = shape
+        self.burst_size = max(1, burst_size) if shape == "burst" else 1
+        self.concurrency = concurrency
+        self.loop = loop
+        self.report = ReplayReport()
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Stop scheduling new alerts; in-flight ones still finish."""
+        self._stopping.set()
+
+    def _alerts(self) -> Iterator[tuple[Optional[Alert], Optional[str]]]:
+        while True:
+            valid = 0
+            for alert, error in iter_alerts(self.files):
+                valid += alert is not None
+                yield alert, error
+            # A pass without a single valid alert would loop forever without sending anything
+            if not self.loop or not valid:
+                return
+
+    async def _pace(self, index: int, start: float) -> float:
+        """Sleep until alert `index` is due and return its scheduled time."""
+        if self.rate <= 0:
+            return time.perf_counter()
+        # Each burst (a single alert for "constant") is due burst_size / rate after the previous one
+        due = start + (index // self.burst_size) * self.burst_size / self.rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        return due
+
+    async def _send(self, alert: Alert, scheduled: float, slots: asyncio.Semaphore):
+        try:
+            await self.callback(alert)
+            self.report.sent += 1
+        except Exception as e:
+            logger.warning(f"Replay alert {alert.fingerprint} failed: {e}")
+            self.report.failed += 1
+        finally:
+            self.report.latencies.append(time.perf_counter() - scheduled)
+            slots.release()
+
+    async def run(self) -> ReplayReport:
+        """Replay until the files are exhausted (or `stop()` when looping) and return the report."""
+        logger.info(
+            f"Replaying {len(self.files)} file(s) at "
+            f"{f'{self.rate:g}/s' if self.rate > 0 else 'max rate'} ({self.shape}), "
+            f"concurrency {self.concurrency}{', looping' if self.loop else ''}"
+        )
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: set[asyncio.Task] = set()
+        self.report = ReplayReport()
+        start = self.report.started_at
+        index = 0
+        try:
+            for alert, error in self._alerts():
+                if self._stopping.is_set():
+                    break
+                if error:
+                    logger.error(f"Replay skipped invalid line {error}")
+                    self.report.invalid += 1
+                    continue
+                scheduled = await self._pace(index, start)
+                index += 1
+                if self._stopping.is_set():
+                    break
+                await slots.acquire()
+                task = asyncio.create_task(self._send(alert, scheduled, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.report.finished_at = time.perf_counter()
+        logger.info(f"Replay finished: {self.report.summary()}")
+        return self.report
@@ -0,0 +1,119 @@
+import logging
+from typing import Optional
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractIncomingMessage
+
+logger = logging.getLogger(__name__)
+
+
+class RetryTopology:
+    """
+    Delayed-retry topology for a work queue.
+
+    For every delay tier a durable queue `<queue>.retry.<delay>ms` is declared
+    with `x-message-ttl` set to the delay, and the default exchange plus the work
+    queue name as dead-letter target. A message published to a tier sits there
+    until its TTL expires and is then dead-lettered back onto the work queue.
+    Each tier uses a single TTL, so messages never wait behind a longer delay.
+
+    The attempt count travels in the ATTEMPT_HEADER header. Tiers are used in
+    order and the last one is reused. Once `max_attempts` retries have been
+    made, the message goes to `<queue>.parking` for manual inspection instead.
+    """
+    ATTEMPT_HEADER = "x-retry-attempt"
+    PARKED_REASON_HEADER = "x-parked-reason"
+
+    def __init__(self, queue_name: str, delays_ms: list[int], max_attempts: int):
+        if not delays_ms:
+            raise ValueError("delays_ms must contain at least one delay")
+        self.queue_name = queue_name
+        self.delays_ms = list(delays_ms)
+        self.max_attempts = max_attempts
+        self.exchange: Optional[AbstractExchange] = None
+
+    def delay_queue_name(self, delay_ms: int) -> str:
+        return f"{self.queue_name}.retry.{delay_ms}ms"
+
+    @property
+    def parking_queue_name(self) -> str:
+        return f"{self.queue_name}.parking"
+
+    async def declare(self, channel: AbstractChannel):
+        """Declare the delay tiers and the parking queue."""
+        for delay_ms in self.delays_ms:
+            await channel.declare_queue(
+                self.delay_queue_name(delay_ms),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay_ms,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                },
+            )
+        await channel.declare_queue(self.parking_queue_name, durable=True)
+        self.exchange = channel.default_exchange
+        logger.info(f"Retry topology declared: delays {self.delays_ms} ms, max {self.max_attempts} attempts")
+
+    @classmethod
+    def attempts(cls, message: AbstractIncomingMessage) -> int:
+        """Number of retries already made for this message."""
+        try:
+            return int((message.headers or {}).get(cls.ATTEMPT_HEADER, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def delay_for(self, attempt: int) -> int:
+        """Delay tier (ms) for the given 1-based retry attempt."""
+        return self.delays_ms[min(attempt, len(self.delays_ms)) - 1]
+
+    async def retry(self, message: AbstractIncomingMessage, body: Optional[bytes] = None):
+        """
+        Republish the message to the next delay tier, or park it once attempts run out.
+        `body` replaces the original body (e.g. a single child of a grouped payload).
+        The caller acks the original delivery after this returns.
+        """
+        attempt = self.attempts(message) + 1
+        if attempt > self.max_attempts:
+            await self.park(message, reason=f"retries exhausted after {self.max_attempts} attempts", body=body)
+            return
+
+        delay_ms = self.delay_for(attempt)
+        await self._publish(
+            message,
+            routing_key=self.delay_queue_name(delay_ms),
+            headers={self.ATTEMPT_HEADER: attempt},
+            body=body,
+        )
+        logger.info(f"Message scheduled for retry {attempt}/{self.max_attempts} in {delay_ms} ms")
+
+    async def park(self, message: AbstractIncomingMessage, reason: str, body: Optional[bytes] = None):
+        """Move the message (or `body` in its place) to the parking queue."""
+        await self._publish(
+            message,
+            routing_key=self.parking_queue_name,
+            headers={self.PARKED_REASON_HEADER: reason},
+            body=body,
+        )
+        logger.warning(f"Message parked in {self.parking_queue_name}: {reason}")
+
+    async def _publish(
+        self,
+        message: AbstractIncomingMessage,
+        routing_key: str,
+        headers: dict,
+        body: Optional[bytes] = None,
+    ):
+        if self.exchange is None:
+            raise RuntimeError("Retry topology has not been declared")
+        await self.exchange.publish(
+            aio_pika.Message(
+                body=message.body if body is None else body,
+                headers={**(message.headers or {}), **headers},
+                content_type=message.content_type,
+                priority=message.priority,
+                message_id=message.message_id,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=routing_key,
+        )
@@ -0,0 +1,129 @@
+import asyncio
+import functools
+import logging
+import random
+import time
+from collections import deque
+from typing import Callable
+
+import deadlines
+from config import settings
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTEMPTS = registry.counter("retry_attempts_total", "Retries let through by the retry budget", ["dependency"])
+RETRY_DENIED = registry.counter(
+    "retry_denied_total", "Retries refused because the dependency's retry budget was spent", ["dependency"]
+)
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float, rand: Callable[[], float] = random.random) -> float:
+    """Next backoff: uniform between `base` and 3x the previous one, capped (AWS "decorrelated jitter")."""
+    upper = max(base, previous * 3)
+    return min(cap, base + rand() * (upper - base))
+
+
+class RetryBudget:
+    """
+    Shared cap on retries to one dependency.
+
+    Over a sliding `window` (seconds, in one-second buckets) retries may be at
+    most `ratio` times the successful calls, but at least `min_retries` so a
+    quiet dependency can still be retried. Once a storm has spent the budget,
+    failures are returned to the caller (and the broker's delayed retries)
+    instead of multiplying the load on the failing dependency.
+    """
+    def __init__(
+        self,
+        name: str,
+        ratio: float = 0.2,
+        min_retries: int = 10,
+        window: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.clock = clock
+        # [second, successes, retries], oldest first
+        self._buckets: deque[list] = deque()
+
+    def _current(self) -> list:
+        now = int(self.clock())
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+
+    def record_success(self):
+        self._current()[1] += 1
+
+    def try_acquire(self) -> bool:
+        """Spend one retry if the budget allows it."""
+        bucket = self._current()
+        successes = sum(b[1] for b in self._buckets)
+        retries = sum(b[2] for b in self._buckets)
+        if retries >= max(self.min_retries, self.ratio * successes):
+            RETRY_DENIED.inc(dependency=self.name)
+            return False
+        bucket[2] += 1
+        RETRY_ATTEMPTS.inc(dependency=self.name)
+        return True
+
+    @classmethod
+    def from_settings(cls, name: str) -> "RetryBudget":
+        return cls(
+            name,
+            ratio=settings.RETRY_BUDGET_RATIO,
+            min_retries=settings.RETRY_BUDGET_MIN_RETRIES,
+            window=settings.RETRY_BUDGET_WINDOW,
+        )
+
+
+class RetryPolicy:
+    """
+    Decorator for adapter methods: up to `attempts` calls while `should_retry`
+    accepts the error, sleeping a decorrelated-jitter backoff between them.
+
+    A retry only happens if the message deadline leaves room for the backoff
+    and the owner's `retry_budget` (a RetryBudget) grants it; otherwise the
+    last error is raised as is.
+    """
+    def __init__(
+        self,
+        should_retry: Callable[[BaseException], bool],
+        attempts: int = 3,
+        base: float = 2.0,
+        cap: float = 10.0,
+    ):
+        self.should_retry = should_retry
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def wrapper(owner, *args, **kwargs):
+            budget: RetryBudget = owner.retry_budget
+            delay = self.base
+            for attempt in range(1, self.attempts + 1):
+                try:
+                    result = await func(owner, *args, **kwargs)
+                except Exception as e:
+                    if attempt >= self.attempts or not self.should_retry(e):
+                        raise
+                    delay = decorrelated_jitter(delay, self.base, self.cap)
+                    if not deadlines.allows_wait(delay, f"{budget.name} retry"):
+                        raise
+                    if not budget.try_acquire():
+                        logger.warning(f"Retry budget for {budget.name} spent, not retrying: {e}")
+                        raise
+                    logger.debug(f"Retrying {func.__qualname__} in {delay:.2f}s (attempt {attempt + 1}/{self.attempts})")
+                    await asyncio.sleep(delay)
+                else:
+                    budget.record_success()
+                    return result
+        return wrapper
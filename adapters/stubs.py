@@ -1,11 +1,12 @@
 import logging
 import asyncio
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Optional
 
 from adapters.http.alert_db import AlertDBClient
 from adapters.http.project_manager import ProjectManagerClient
 from adapters.email.sender import EmailSender
 from adapters.messaging.rabbitmq import RabbitMQConsumer
+from adapters.messaging.replay import ReplayDriver
 from models.models import Alert, Recipient
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,9 @@ class AlertDBClientStub(AlertDBClient):
     async def start(self):
         logger.info("[STUB] AlertDBClientStub started")
 
+    async def warmup(self) -> int:
+        return 0
+
     async def close(self):
         logger.info("[STUB] AlertDBClientStub closed")
 
@@ -37,6 +41,17 @@ class AlertDBClientStub(AlertDBClient):
         # Randomly simulate dedup
         return "ok"
 
+    async def persist_alerts(self, alerts: list[Alert]) -> list[str]:
+        logger.info(f"[STUB] Persisting {len(alerts)} alerts")
+        return ["ok"] * len(alerts)
+
+    async def update_status(self, dedup_key: str, status: str):
+        logger.info(f"[STUB] Status {status} for: {dedup_key}")
+
+    async def update_statuses(self, updates: dict[str, str]) -> dict:
+        logger.info(f"[STUB] Updating {len(updates)} statuses")
+        return {}
+
 
 class ProjectManagerClientStub(ProjectManagerClient):
     """
@@ -45,12 +60,15 @@ class ProjectManagerClientStub(ProjectManagerClient):
     async def start(self):
         logger.info("[STUB] ProjectManagerClientStub started")
 
+    async def warmup(self) -> int:
+        return 0
+
     async def close(self):
         logger.info("[STUB] ProjectManagerClientStub closed")
 
-    async def resolve_recipients(self, alert: Alert) -> list[Recipient]:
-        logger.info(f"[STUB] Resolving recipients for: {alert.fingerprint}")
-        return [Recipient(project_id="p1", project_name="TestProject", alert_groups=["dev@example.com"])]
+    async def _resolve_key(self, key) -> Recipient:
+        logger.info(f"[STUB] Resolving recipients for: {key}")
+        return Recipient(project_id="p1", project_name="TestProject", alert_groups=["dev@example.com"])
 
 
 class EmailSenderStub(EmailSender):
@@ -71,15 +89,25 @@ class EmailSenderStub(EmailSender):
     async def send_email(self, recipients: list[Recipient], alert: Alert):
         logger.info(f"[STUB] Sending email to {len(recipients)} recipients for alert {alert.fingerprint}")
 
+    async def deliver_email(self, message, recipient: Recipient, alert: Alert):
+        logger.info(f"[STUB] Delivering email to {len(recipient.alert_groups)} recipients for alert {alert.fingerprint}")
+
 
 class RabbitMQConsumerStub(RabbitMQConsumer):
     """
     Simulates a RabbitMQ Consumer.
     It doesn't connect to any broker. Use this to verify startup logic.
-    To simulate a message, you would need to call process_callback manually.
+    Alerts come either from /trigger (simulate_alert) or, when a ReplayDriver
+    is given (REPLAY_PATH), from JSONL files replayed on connect.
     """
-    def __init__(self, process_alert_callback: Callable[[Alert], Awaitable[None]]):
+    def __init__(
+        self,
+        process_alert_callback: Callable[[Alert], Awaitable[None]],
+        replay: Optional[ReplayDriver] = None,
+    ):
         self.process_callback = process_alert_callback
+        self.replay = replay
+        self._replay_task: Optional[asyncio.Task] = None
         self._connected = False
 
     @property
@@ -89,9 +117,23 @@ class RabbitMQConsumerStub(RabbitMQConsumer):
     async def connect(self):
         logger.info("[STUB] RabbitMQ Stub connected (No real connection)")
         self._connected = True
-        pass
+        if self.replay:
+            self._replay_task = asyncio.create_task(self.replay.run(), name="replay")
+
+    async def drain(self, timeout: float = None) -> int:
+        if self._replay_task and not self._replay_task.done():
+            self.replay.stop()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._replay_task), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("[STUB] Replay still running after drain timeout")
+        logger.info("[STUB] RabbitMQ Stub drained")
+        return 0
 
     async def close(self):
+        if self._replay_task and not self._replay_task.done():
+            self._replay_task.cancel()
+            await asyncio.gather(self._replay_task, return_exceptions=True)
         logger.info("[STUB] RabbitMQ Stub closed")
         self._connected = False
 
@@ -1,4 +1,6 @@
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
 from models.models import Alert
 import logging
 
@@ -48,3 +50,41 @@ async def debug_process_alert(alert: Alert, request: Request):
     except Exception as e:
         logger.error(f"Debug process failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+class RateLimits(BaseModel):
+    project_per_minute: Optional[float] = None
+    project_burst: Optional[float] = None
+    address_per_minute: Optional[float] = None
+    address_burst: Optional[float] = None
+
+
+def _rate_limiter(request: Request):
+    orchestrator = getattr(request.app.state, "orchestrator", None)
+    if not orchestrator:
+        raise HTTPException(status_code=503, detail="Orchestrator not initialized")
+    if getattr(orchestrator, "rate_limiter", None) is None:
+        raise HTTPException(status_code=501, detail="Rate limiting not configured")
+    return orchestrator.rate_limiter
+
+
+@debug_router.get("/rate-limits")
+async def get_rate_limits(request: Request):
+    """
+    Current email rate limits (per minute, 0 = unlimited).
+    """
+    return _rate_limiter(request).limits()
+
+
+@debug_router.put("/rate-limits")
+async def update_rate_limits(limits: RateLimits, request: Request):
+    """
+    Change email rate limits at runtime. Omitted fields keep their value.
+    """
+    limiter = _rate_limiter(request)
+    try:
+        limiter.configure(**limits.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.warning(f"Rate limits changed at runtime: {limiter.limits()}")
+    return limiter.limits()
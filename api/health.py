@@ -2,11 +2,13 @@ import asyncio
 import logging
 from typing import Optional
 from fastapi import FastAPI, HTTPException, Body, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
 
 from config import settings
 from models.models import Alert
+from metrics import registry, render_exports
 
 logger = logging.getLogger(__name__)
 
@@ -23,24 +25,55 @@ async def health_check(request: Request):
     """
     Kubernetes Liveness/Readiness Probe.
     """
+    supervisor = getattr(request.app.state, "supervisor", None)
+    if supervisor:
+        # Multi-process mode: ready while at least one worker is healthy
+        workers = supervisor.worker_health()
+        healthy = sum(1 for w in workers if w["healthy"])
+        if not healthy:
+            raise HTTPException(status_code=503, detail={"status": "No healthy workers", "workers": workers})
+        status = "OK" if healthy == len(workers) else "DEGRADED"
+        return {"status": status, "workers": workers}
+
     consumer = getattr(request.app.state, "consumer", None)
     
     if consumer:
         if consumer.is_connected:
-            return {"status": "OK", "rabbitmq": "connected"}
+            body = {"status": "OK", "rabbitmq": "connected"}
+            # An open circuit is reported but keeps the pod ready: restarting would not bring the dependency back
+            orchestrator = getattr(request.app.state, "orchestrator", None)
+            circuits = orchestrator.circuit_states() if orchestrator else None
+            if isinstance(circuits, dict) and circuits:
+                body["circuits"] = circuits
+                if any(state != "closed" for state in circuits.values()):
+                    body["status"] = "DEGRADED"
+            return body
         else:
             raise HTTPException(status_code=503, detail="RabbitMQ Disconnected")
             
     raise HTTPException(status_code=503, detail="Initializing")
 
 
-async def start_health_server(consumer=None, orchestrator=None):
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """
+    Prometheus scrape endpoint.
+    """
+    supervisor = getattr(request.app.state, "supervisor", None)
+    if supervisor:
+        # Multi-process mode: the supervisor's own metrics plus every worker's, labelled worker="<index>"
+        return render_exports([registry.export(), *supervisor.worker_metrics()])
+    return registry.render()
+
+
+async def start_health_server(consumer=None, orchestrator=None, supervisor=None):
     """
     Start the FastAPI server via Uvicorn in a separate asyncio task.
     """
     # Store dependencies in app.state for access in routers
     app.state.consumer = consumer
     app.state.orchestrator = orchestrator
+    app.state.supervisor = supervisor
     
     config = uvicorn.Config(
         app=app, 
@@ -0,0 +1,89 @@
+"""
+Critical-alert latency under a mixed-severity storm.
+
+Feeds the same storm through the FIFO ShardedDispatcher and the
+PriorityDispatcher and reports per-severity latency percentiles
+(time from submit to job completion).
+
+Usage:
+    python -m benchmarks.bench_priority [--alerts 3000] [--workers 16] [--service-ms 5]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from adapters.messaging.dispatcher import ShardedDispatcher
+from adapters.messaging.replay import percentile
+from adapters.messaging.scheduler import PriorityDispatcher
+from models.models import SEVERITY_PRIORITY
+
+# Storm mix, roughly what Alertmanager produces during an incident
+SEVERITY_MIX = [("info", 0.60), ("warning", 0.30), ("error", 0.07), ("critical", 0.03)]
+
+
+def make_storm(count: int, seed: int) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    severities, weights = zip(*SEVERITY_MIX)
+    return [(f"fp-{i}", rng.choices(severities, weights)[0]) for i in range(count)]
+
+
+async def run_storm(dispatcher, storm, service_time: float, arrival_rate: float) -> dict[str, list[float]]:
+    latencies: dict[str, list[float]] = {severity: [] for severity, _ in SEVERITY_MIX}
+
+    def job(severity: str, submitted: float):
+        async def run():
+            await asyncio.sleep(service_time)
+            latencies[severity].append(time.perf_counter() - submitted)
+        return run
+
+    await dispatcher.start()
+    futures = []
+    interval = 1 / arrival_rate
+    next_at = time.perf_counter()
+    for key, severity in storm:
+        futures.append(await dispatcher.submit(key, job(severity, time.perf_counter()), priority=SEVERITY_PRIORITY[severity]))
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    await asyncio.gather(*futures)
+    await dispatcher.close()
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--service-ms", type=float, default=5.0)
+    parser.add_argument("--overload", type=float, default=2.0, help="Arrival rate as a multiple of capacity")
+    parser.add_argument("--aging-ms", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    service_time = args.service_ms / 1000
+    capacity = args.workers / service_time
+    storm = make_storm(args.alerts, args.seed)
+    print(
+        f"{args.alerts} alerts, {args.workers} workers, {args.service_ms}ms service time, "
+        f"arrivals at {args.overload:.1f}x capacity ({capacity * args.overload:,.0f}/s)"
+    )
+
+    dispatchers = [
+        ("fifo", ShardedDispatcher(worker_count=args.workers)),
+        ("priority", PriorityDispatcher(worker_count=args.workers, aging=args.aging_ms / 1000)),
+    ]
+    print(f"{'scheduler':<10} {'severity':<9} {'count':>6} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, dispatcher in dispatchers:
+        latencies = await run_storm(dispatcher, storm, service_time, capacity * args.overload)
+        for severity, values in latencies.items():
+            print(
+                f"{name:<10} {severity:<9} {len(values):>6} "
+                f"{statistics.median(values) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
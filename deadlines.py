@@ -0,0 +1,77 @@
+"""
+Per-message deadline budget.
+
+The consumer sets a deadline (a time.monotonic() timestamp) when a message
+arrives; it follows the alert through the orchestrator in a ContextVar, and
+adapters use it to shrink their timeouts and to skip retries that could not
+finish in time. Without a deadline (None) everything behaves as before.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from exceptions import DeadlineExceededError
+from metrics import registry
+
+DEADLINE_EXCEEDED = registry.counter(
+    "deadline_exceeded_total", "Operations abandoned because the message deadline had passed", ["operation"]
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def after(seconds: float) -> Optional[float]:
+    """Deadline `seconds` from now; None when `seconds` is 0 or less (no deadline)."""
+    if seconds <= 0:
+        return None
+    return time.monotonic() + seconds
+
+
+def current() -> Optional[float]:
+    return _deadline.get()
+
+
+@contextmanager
+def scope(deadline: Optional[float]) -> Iterator[None]:
+    """Run the block under `deadline` (None clears it, e.g. for background work)."""
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without a deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check(operation: str):
+    """Raise DeadlineExceededError if the deadline has already passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        DEADLINE_EXCEEDED.inc(operation=operation)
+        raise DeadlineExceededError(f"Deadline exceeded {-left:.2f}s before {operation}")
+
+
+def timeout(default: float, operation: str) -> float:
+    """`default`, shrunk to the time left; raises DeadlineExceededError when none is left."""
+    check(operation)
+    left = remaining()
+    return default if left is None else min(default, left)
+
+
+def allows_wait(seconds: float, operation: str) -> bool:
+    """
+    Whether sleeping `seconds` (e.g. a retry backoff) still leaves time for the
+    next attempt; counts the operation as abandoned when it does not.
+    """
+    left = remaining()
+    if left is not None and left <= seconds:
+        DEADLINE_EXCEEDED.inc(operation=operation)
+        return False
+    return True
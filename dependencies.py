@@ -1,4 +1,4 @@
-from typing import Union, Tuple
+from typing import Optional, Union, Tuple
 import logging
 
 from config import settings
@@ -6,23 +6,96 @@ from adapters.email.factory import EmailSenderFactory
 from adapters.http.alert_db import AlertDBClient
 from adapters.http.project_manager import ProjectManagerClient
 from adapters.messaging.rabbitmq import RabbitMQConsumer
+from adapters.messaging.replay import ReplayDriver
 from adapters.stubs import (
     AlertDBClientStub,
     ProjectManagerClientStub,
     EmailSenderStub,
     RabbitMQConsumerStub,
 )
+from services.dedup_index import DedupIndex
+from services.fair_queue import FairScheduler
 from services.orchestrator import AlertOrchestrator
+from services.rate_limiter import SendRateLimiter
+from services.staleness import StalenessPolicy
+from services.status_buffer import StatusWriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
+def _status_buffer(alert_db: AlertDBClient) -> Optional[StatusWriteBuffer]:
+    if settings.STATUS_BUFFER_SIZE <= 0:
+        return None
+    return StatusWriteBuffer(
+        alert_db,
+        max_size=settings.STATUS_BUFFER_SIZE,
+        max_delay=settings.STATUS_BUFFER_FLUSH_MS / 1000,
+    )
+
+
+def _pipeline_workers() -> Optional[dict[str, int]]:
+    if not settings.PIPELINE_ENABLED:
+        return None
+    return {
+        "resolve": settings.PIPELINE_RESOLVE_WORKERS,
+        "persist": settings.PIPELINE_PERSIST_WORKERS,
+        "render": settings.PIPELINE_RENDER_WORKERS,
+        "send": settings.PIPELINE_SEND_WORKERS,
+        "status": settings.PIPELINE_STATUS_WORKERS,
+    }
+
+
+def _digest_options() -> dict:
+    return {
+        "digest_window": settings.DIGEST_WINDOW_SECONDS,
+        "digest_max_alerts": settings.DIGEST_MAX_ALERTS,
+        "digest_critical_delay": settings.DIGEST_CRITICAL_MAX_DELAY_SECONDS,
+        "digest_critical_severities": tuple(settings.DIGEST_CRITICAL_SEVERITIES),
+    }
+
+
+def _rate_limiter() -> Optional[SendRateLimiter]:
+    if settings.RATE_LIMIT_PROJECT_PER_MINUTE <= 0 and settings.RATE_LIMIT_ADDRESS_PER_MINUTE <= 0:
+        return None
+    return SendRateLimiter(
+        project_per_minute=settings.RATE_LIMIT_PROJECT_PER_MINUTE,
+        project_burst=settings.RATE_LIMIT_PROJECT_BURST,
+        address_per_minute=settings.RATE_LIMIT_ADDRESS_PER_MINUTE,
+        address_burst=settings.RATE_LIMIT_ADDRESS_BURST,
+    )
+
+
+def _fair_scheduler() -> Optional[FairScheduler]:
+    if settings.FAIR_QUEUE_SLOTS <= 0:
+        return None
+    return FairScheduler(
+        slots=settings.FAIR_QUEUE_SLOTS,
+        key=settings.FAIR_QUEUE_KEY,
+        weights=settings.FAIR_QUEUE_WEIGHTS,
+        quantum=settings.FAIR_QUEUE_QUANTUM,
+    )
+
+
+def _staleness() -> Optional[StalenessPolicy]:
+    if not (settings.STALE_ALERT_AGE_ACTION or settings.STALE_ALERT_EXPIRED_ACTION):
+        return None
+    return StalenessPolicy(
+        max_age=settings.STALE_ALERT_MAX_AGE,
+        age_action=settings.STALE_ALERT_AGE_ACTION,
+        expired_action=settings.STALE_ALERT_EXPIRED_ACTION,
+    )
+
+
 def create_top_level_dependencies() -> Tuple[Union[RabbitMQConsumer, RabbitMQConsumerStub], AlertOrchestrator]:
     """
     Wire up and return the RabbitMQConsumer and Orchestrator.
     """
     logger.info("Initializing dependencies...")
 
+    dedup_index = None
+    if settings.DEDUP_INDEX_SIZE > 0:
+        dedup_index = DedupIndex(maxsize=settings.DEDUP_INDEX_SIZE, ttl=settings.DEDUP_INDEX_TTL)
+
     if settings.USE_MOCKS:
         logger.warning("Using MOCK adapters!")
         alert_db = AlertDBClientStub()
@@ -33,9 +106,30 @@ def create_top_level_dependencies() -> Tuple[Union[RabbitMQConsumer, RabbitMQCon
             alert_db_client=alert_db,
             project_manager_client=project_manager,
             email_sender=email_sender,
+            dedup_index=dedup_index,
+            status_buffer=_status_buffer(alert_db),
+            pipeline_workers=_pipeline_workers(),
+            pipeline_queue_size=settings.PIPELINE_QUEUE_SIZE,
+            **_digest_options(),
+            rate_limiter=_rate_limiter(),
+            rate_limit_summary_interval=settings.RATE_LIMIT_SUMMARY_INTERVAL,
+            fair_scheduler=_fair_scheduler(),
+            staleness=_staleness(),
+            backlog_summary_interval=settings.STALE_SUMMARY_INTERVAL,
+            backlog_summary_max_alerts=settings.STALE_SUMMARY_MAX_ALERTS,
         )
-        # Note: Stub consumer doesn't really consume unless extended to poll a file or something.
-        consumer = RabbitMQConsumerStub(process_alert_callback=orchestrator.process_alert)
+        replay = None
+        if settings.REPLAY_PATH:
+            replay = ReplayDriver(
+                orchestrator.process_alert,
+                settings.REPLAY_PATH,
+                rate=settings.REPLAY_RATE,
+                shape=settings.REPLAY_SHAPE,
+                burst_size=settings.REPLAY_BURST_SIZE,
+                concurrency=settings.REPLAY_CONCURRENCY,
+                loop=settings.REPLAY_LOOP,
+            )
+        consumer = RabbitMQConsumerStub(process_alert_callback=orchestrator.process_alert, replay=replay)
     else:
         alert_db = AlertDBClient()
         project_manager = ProjectManagerClient()
@@ -45,9 +139,23 @@ def create_top_level_dependencies() -> Tuple[Union[RabbitMQConsumer, RabbitMQCon
             alert_db_client=alert_db,
             project_manager_client=project_manager,
             email_sender=email_sender,
+            dedup_index=dedup_index,
+            status_buffer=_status_buffer(alert_db),
+            pipeline_workers=_pipeline_workers(),
+            pipeline_queue_size=settings.PIPELINE_QUEUE_SIZE,
+            **_digest_options(),
+            rate_limiter=_rate_limiter(),
+            rate_limit_summary_interval=settings.RATE_LIMIT_SUMMARY_INTERVAL,
+            fair_scheduler=_fair_scheduler(),
+            staleness=_staleness(),
+            backlog_summary_interval=settings.STALE_SUMMARY_INTERVAL,
+            backlog_summary_max_alerts=settings.STALE_SUMMARY_MAX_ALERTS,
         )
 
-        consumer = RabbitMQConsumer(process_alert_callback=orchestrator.process_alert)
+        consumer = RabbitMQConsumer(
+            process_alert_callback=orchestrator.process_alert,
+            process_batch_callback=orchestrator.process_batch,
+        )
     
     logger.info("Dependencies initialized.")
     return consumer, orchestrator
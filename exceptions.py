@@ -27,6 +27,14 @@ class TemplateRenderError(NonRetryableError):
     pass
 
 # HTTP / Adapter Errors
+class CircuitOpenError(RetryableError):
+    """Raised without any network I/O while a dependency's circuit breaker is open."""
+    pass
+
+class DeadlineExceededError(RetryableError):
+    """The message's deadline budget ran out before the operation could run (see deadlines.py)."""
+    pass
+
 class DatabaseError(RetryableError):
     pass
 
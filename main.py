@@ -2,15 +2,25 @@ import asyncio
 import signal
 import sys
 import logging
+from typing import Callable, Optional
 
-from config import setup_logging
+from config import settings, setup_logging
 from dependencies import create_top_level_dependencies
 from api.health import start_health_server
 
 logger = logging.getLogger(__name__)
 
 
-async def main():
+async def main(
+    start_health: bool = True,
+    on_heartbeat: Optional[Callable[[bool], None]] = None,
+):
+    """
+    Run the service until SIGINT/SIGTERM.
+
+    Worker processes started by the supervisor run without their own
+    healthcheck server and report liveness through `on_heartbeat` instead.
+    """
     setup_logging()
     logger.info("Service starting...")
 
@@ -26,11 +36,12 @@ async def main():
         sys.exit(1)
 
     # Start Healthcheck Server
-    try:
-        health_runner = await start_health_server(consumer=consumer, orchestrator=orchestrator)
-    except Exception as e:
-        logger.error(f"Failed to start healthcheck server: {e}")
-        sys.exit(1)
+    if start_health:
+        try:
+            health_runner = await start_health_server(consumer=consumer, orchestrator=orchestrator)
+        except Exception as e:
+            logger.error(f"Failed to start healthcheck server: {e}")
+            sys.exit(1)
 
     # Signal Handling
     loop = asyncio.get_running_loop()
@@ -47,6 +58,15 @@ async def main():
             # Windows ProactorEventLoop does not support add_signal_handler
             logger.warning(f"Signal {sig} handling not supported on this platform/loop.")
 
+    heartbeat_task = None
+    if on_heartbeat:
+        async def heartbeat():
+            while True:
+                on_heartbeat(consumer.is_connected)
+                await asyncio.sleep(settings.WORKER_HEARTBEAT_INTERVAL)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+
     try:
         # Start Adapters
         if orchestrator:
@@ -63,7 +83,12 @@ async def main():
         sys.exit(1)
     finally:
         logger.info("Service stopping")
+        if heartbeat_task:
+            heartbeat_task.cancel()
+        # Stop intake and let in-flight alerts finish before tearing down SMTP/HTTP clients,
+        # otherwise they are cut off mid-send and redelivered (duplicate emails)
         if consumer:
+            await consumer.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
             await consumer.close()
         if orchestrator:
             await orchestrator.shutdown()
@@ -0,0 +1,193 @@
+import bisect
+from typing import Iterable, Optional
+
+"""
+METRICS
+-------
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format at GET /metrics (see api/health.py).
+
+Usage:
+    from metrics import registry
+    ALERTS = registry.counter("alerts_total", "Alerts processed", ["status"])
+    ALERTS.inc(status="sent")
+
+Each process has its own registry. Under supervisor.py every worker exports
+its metrics, labelled worker="<index>", to the shared status board, and the
+supervisor's /metrics merges them with render_exports().
+"""
+
+LabelKey = tuple[tuple[str, str], ...]
+# Rendered metric families: name -> {"header": [HELP, TYPE], "samples": [lines]}, JSON-serializable
+Export = dict[str, dict[str, list[str]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict[str, str]) -> LabelKey:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple((name, str(labels[name])) for name in labelnames)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self, const: LabelKey = ()) -> list[str]:
+        return []
+
+    def render(self) -> list[str]:
+        return self.header() + self.samples()
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def samples(self, const: LabelKey = ()) -> list[str]:
+        return [f"{self.name}{_format_labels(const + key)} {value}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: str):
+        self._values[_label_key(self.labelnames, labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(self.labelnames, labels)
+        counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(_label_key(self.labelnames, labels), []))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(_label_key(self.labelnames, labels), 0.0)
+
+    def samples(self, const: LabelKey = ()) -> list[str]:
+        lines = []
+        for key in sorted(self._counts):
+            labels = const + key
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts[key]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        # Re-registering returns the existing metric, so module reloads and tests are safe
+        existing = self._metrics.get(name)
+        if existing is not None:
+            if not isinstance(existing, cls):
+                raise ValueError(f"Metric {name} already registered as {existing.type_name}")
+            return existing
+        metric = cls(name, *args, **kwargs)
+        self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def export(self, const_labels: Optional[dict[str, str]] = None) -> Export:
+        """Every metric rendered, with `const_labels` added to each sample (see render_exports)."""
+        const = tuple((name, str(value)) for name, value in (const_labels or {}).items())
+        return {
+            name: {"header": metric.header(), "samples": metric.samples(const)}
+            for name, metric in self._metrics.items()
+        }
+
+    def render(self) -> str:
+        return render_exports([self.export()])
+
+
+def render_exports(exports: Iterable[Export]) -> str:
+    """
+    Merge exports from several registries (e.g. one per worker process) into one
+    exposition: each metric family is declared once, followed by every registry's samples.
+    """
+    families: Export = {}
+    for export in exports:
+        for name, family in export.items():
+            merged = families.setdefault(name, {"header": family["header"], "samples": []})
+            merged["samples"].extend(family["samples"])
+    lines = []
+    for name in sorted(families):
+        lines.extend(families[name]["header"])
+        lines.extend(families[name]["samples"])
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
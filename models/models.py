@@ -1,14 +1,46 @@
+from collections import ChainMap
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from exceptions import NonRetryableError
+
 class AlertStatus(str, Enum):
     OK = "ok"
     DEDUP = "dedup"
     SENT = "sent"
     FAILED = "failed"
 
+# Scheduling weight per severity, on the same 0-10 scale as AMQP message priority
+SEVERITY_PRIORITY = {
+    "critical": 10,
+    "error": 6,
+    "warning": 3,
+    "info": 0,
+}
+
+class Disposition(str, Enum):
+    """
+    How a consumed message should be settled with the broker.
+    """
+    ACK = "ack"
+    NACK = "nack"
+    REJECT = "reject"
+
+    @classmethod
+    def from_error(cls, error: Optional[BaseException]) -> "Disposition":
+        """
+        Map a processing outcome to a disposition:
+        success -> ACK, NonRetryableError -> REJECT, anything else -> NACK (retry).
+        """
+        if error is None:
+            return cls.ACK
+        if isinstance(error, NonRetryableError):
+            return cls.REJECT
+        return cls.NACK
+
 class Alert(BaseModel):
     """
     Alert schema compatible with Alertmanager webhook payload.
@@ -43,6 +75,52 @@ class Alert(BaseModel):
     def severity(self) -> str:
         return self.labels.get("severity", "info")
 
+    @property
+    def severity_priority(self) -> int:
+        return SEVERITY_PRIORITY.get(self.severity.lower(), 0)
+
+
+class AlertGroup(BaseModel):
+    """
+    Grouped Alertmanager webhook payload: {"commonLabels": {...}, "alerts": [...], ...}.
+
+    The body is parsed in one pass like any other message; this is not a streaming
+    parser. Child alerts are kept as raw dicts and only validated into Alert
+    objects one by one, as dispatch consumes them.
+    """
+    version: Optional[str] = None
+    groupKey: Optional[str] = None
+    status: Optional[str] = None
+    receiver: Optional[str] = None
+    groupLabels: Dict[str, str] = Field(default_factory=dict)
+    commonLabels: Dict[str, str] = Field(default_factory=dict)
+    commonAnnotations: Dict[str, str] = Field(default_factory=dict)
+    externalURL: Optional[str] = None
+    truncatedAlerts: int = 0
+    alerts: List[Dict[str, Any]]
+
+    @staticmethod
+    def _share(common: Mapping[str, str], own: Optional[Dict[str, Any]]) -> Mapping[str, Any]:
+        # Layer the child's differing entries over the group's read-only common mapping
+        # instead of copying it per child. Alert validation still builds the child's own
+        # dict, but its values are the common str objects rather than per-child duplicates.
+        diff = {key: value for key, value in (own or {}).items() if common.get(key) != value}
+        return ChainMap(diff, common)
+
+    def iter_alert_payloads(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the child alert payloads one by one with the common labels/annotations merged in,
+        ready for Alert.model_validate. The group itself is left untouched.
+        """
+        common_labels = MappingProxyType(self.commonLabels)
+        common_annotations = MappingProxyType(self.commonAnnotations)
+        for raw in self.alerts:
+            yield {
+                **raw,
+                "labels": self._share(common_labels, raw.get("labels")),
+                "annotations": self._share(common_annotations, raw.get("annotations")),
+            }
+
 
 class Recipient(BaseModel):
     """
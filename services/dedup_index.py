@@ -0,0 +1,65 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from metrics import registry
+from models.models import Alert
+
+logger = logging.getLogger(__name__)
+
+DEDUP_LOOKUPS = registry.counter(
+    "dedup_index_lookups_total", "Local dedup index lookups by result (hit = skipped as duplicate)", ["result"]
+)
+DEDUP_ENTRIES = registry.gauge("dedup_index_entries", "Entries held by the local dedup index")
+
+DedupKey = tuple[str, str]
+
+
+class DedupIndex:
+    """
+    In-process index of (dedup_key, status) pairs AlertDB has already seen.
+
+    A hit means the same notification was persisted (or reported as DEDUP)
+    less than `ttl` seconds ago, so the alert can be dropped before any HTTP
+    call. Entries are exact keys in a bounded LRU, so memory is capped at
+    `maxsize` entries and there are no false positives; anything not in the
+    index still goes to AlertDB, which stays the source of truth.
+    """
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        # key -> expiry time
+        self._entries: OrderedDict[DedupKey, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(alert: Alert) -> DedupKey:
+        return (alert.dedup_key, alert.status)
+
+    def seen(self, alert: Alert) -> bool:
+        """True if this (dedup_key, status) is a known duplicate."""
+        key = self.key(alert)
+        expires_at = self._entries.get(key)
+        if expires_at is not None:
+            if self.clock() < expires_at:
+                DEDUP_LOOKUPS.inc(result="hit")
+                return True
+            del self._entries[key]
+            DEDUP_ENTRIES.set(len(self._entries))
+        DEDUP_LOOKUPS.inc(result="miss")
+        return False
+
+    def record(self, alert: Alert):
+        """Remember that AlertDB now holds this (dedup_key, status)."""
+        key = self.key(alert)
+        self._entries[key] = self.clock() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        DEDUP_ENTRIES.set(len(self._entries))
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+import deadlines
+from metrics import registry
+from models.models import FullAlert
+
+logger = logging.getLogger(__name__)
+
+DIGEST_PENDING = registry.gauge("digest_pending_alerts", "Alerts waiting in a digest window")
+DIGEST_EMAILS = registry.counter("digest_emails_total", "Digest emails flushed, by reason", ["reason"])
+DIGEST_SIZE = registry.histogram(
+    "digest_alerts_per_email", "Alerts bundled into one digest email", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+
+RecipientKey = tuple[str, ...]
+# Sends one email for all alerts of a recipient set; raising fails every bundled alert
+DigestSender = Callable[[list[FullAlert]], Awaitable[None]]
+
+
+def recipient_key(alert: FullAlert) -> RecipientKey:
+    """Normalized recipient set: the same addresses in any order or case share a digest."""
+    return tuple(sorted({address.strip().lower() for address in alert.alert_groups if address.strip()}))
+
+
+class _Bucket:
+    __slots__ = ("alerts", "futures", "deadline", "timer")
+
+    def __init__(self, deadline: float):
+        self.alerts: list[FullAlert] = []
+        self.futures: list[asyncio.Future] = []
+        self.deadline = deadline
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class DigestBuffer:
+    """
+    Coalesces alerts for the same recipient set into one email per window.
+
+    The first alert for a recipient set opens a window of `window` seconds;
+    the bucket is sent when the window ends or `max_count` alerts are in it.
+    An alert with a severity in `critical_severities` shortens the window to
+    at most `critical_delay` seconds from its arrival.
+
+    `add` returns a future resolved once the email carrying the alert went
+    out (or with the error that prevented it), so callers settle the message
+    only after delivery.
+    """
+    def __init__(
+        self,
+        send: DigestSender,
+        window: float,
+        max_count: int,
+        critical_delay: float = 0.0,
+        critical_severities: Iterable[str] = ("critical",),
+    ):
+        if max_count < 1:
+            raise ValueError("max_count must be >= 1")
+        self.send = send
+        self.window = window
+        self.max_count = max_count
+        self.critical_delay = critical_delay
+        self.critical_severities = {severity.lower() for severity in critical_severities}
+        self._buckets: dict[RecipientKey, _Bucket] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(bucket.alerts) for bucket in self._buckets.values())
+
+    def add(self, alert: FullAlert) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        key = recipient_key(alert)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(now + self.window)
+
+        future = loop.create_future()
+        bucket.alerts.append(alert)
+        bucket.futures.append(future)
+        DIGEST_PENDING.inc()
+
+        if len(bucket.alerts) >= self.max_count:
+            self._flush(key, "size")
+            return future
+
+        if alert.severity.lower() in self.critical_severities:
+            bucket.deadline = min(bucket.deadline, now + self.critical_delay)
+            if bucket.deadline <= now:
+                self._flush(key, "critical")
+                return future
+            if bucket.timer is not None:
+                bucket.timer.cancel()
+                bucket.timer = None
+
+        if bucket.timer is None:
+            bucket.timer = loop.call_at(
+                loop.time() + max(0.0, bucket.deadline - now), self._flush, key, "window"
+            )
+        return future
+
+    def _flush(self, key: RecipientKey, reason: str):
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            return
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+        DIGEST_PENDING.dec(len(bucket.alerts))
+        DIGEST_EMAILS.inc(reason=reason)
+        DIGEST_SIZE.observe(len(bucket.alerts))
+        task = asyncio.create_task(self._send(bucket))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, bucket: _Bucket):
+        try:
+            # Serves every alert in the bucket, not the message whose arrival flushed it
+            with deadlines.scope(None):
+                await self.send(bucket.alerts)
+        except Exception as e:
+            for future in bucket.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in bucket.futures:
+                if not future.done():
+                    future.set_result(None)
+
+    async def close(self):
+        """Send every open bucket now and wait for all digest emails."""
+        for key in list(self._buckets):
+            self._flush(key, "shutdown")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from metrics import registry
+from models.models import FullAlert
+
+logger = logging.getLogger(__name__)
+
+FAIR_QUEUE_DEPTH = registry.gauge("fair_queue_depth", "Sends waiting for a slot, per tenant", ["tenant"])
+FAIR_QUEUE_WAIT = registry.histogram("fair_queue_wait_seconds", "Time a send waited for a slot, per tenant", ["tenant"])
+FAIR_QUEUE_SECONDS = registry.histogram(
+    "fair_queue_seconds", "Wait plus send time through the fair scheduler, per tenant", ["tenant"]
+)
+
+T = TypeVar("T")
+
+TENANT_KEYS = ("project", "vendor")
+
+
+class FairScheduler:
+    """
+    Deficit round robin over tenants in front of a fixed number of send slots.
+
+    Every tenant (project_id or vendor label) with waiting sends is visited
+    in turn; a visit adds `quantum * weight` to the tenant's deficit and each
+    send granted costs 1. A tenant with a storm backlog therefore gets its
+    weighted share of the slots, while a quiet tenant's occasional send is
+    granted on its next turn instead of waiting behind the whole backlog.
+
+    When slots are free and nobody is waiting, `run` starts immediately.
+    """
+    def __init__(
+        self,
+        slots: int,
+        key: str = "project",
+        weights: Optional[dict[str, float]] = None,
+        default_weight: float = 1.0,
+        quantum: float = 1.0,
+    ):
+        if slots < 1:
+            raise ValueError("slots must be >= 1")
+        if key not in TENANT_KEYS:
+            raise ValueError(f"key must be one of {TENANT_KEYS}, got {key!r}")
+        if quantum <= 0 or default_weight <= 0 or any(w <= 0 for w in (weights or {}).values()):
+            raise ValueError("quantum and weights must be > 0")
+        self.slots = slots
+        self.key = key
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self.quantum = quantum
+        self._free = slots
+        self._queues: dict[str, deque[asyncio.Future]] = {}
+        self._active: deque[str] = deque()
+        self._deficit: dict[str, float] = {}
+        self._turn_started = False
+
+    def tenant(self, alert: FullAlert) -> str:
+        if self.key == "vendor":
+            return alert.vendor or "unknown"
+        return alert.project_id
+
+    def depth(self, tenant: Optional[str] = None) -> int:
+        """Sends waiting for a slot (for one tenant, or in total)."""
+        if tenant is not None:
+            return len(self._queues.get(tenant, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def run(self, alert: FullAlert, job: Callable[[], Awaitable[T]]) -> T:
+        """Wait for this alert's tenant to be granted a slot, then run `job` in it."""
+        tenant = self.tenant(alert)
+        started = time.perf_counter()
+        await self._acquire(tenant)
+        FAIR_QUEUE_WAIT.observe(time.perf_counter() - started, tenant=tenant)
+        try:
+            return await job()
+        finally:
+            self._free += 1
+            self._dispatch()
+            FAIR_QUEUE_SECONDS.observe(time.perf_counter() - started, tenant=tenant)
+
+    async def _acquire(self, tenant: str):
+        if self._free > 0 and not self._active:
+            self._free -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = deque()
+            self._deficit[tenant] = 0.0
+            self._active.append(tenant)
+        queue.append(waiter)
+        FAIR_QUEUE_DEPTH.set(len(queue), tenant=tenant)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the cancellation: hand the slot back
+                self._free += 1
+            else:
+                self._remove(tenant, waiter)
+            self._dispatch()
+            raise
+
+    def _remove(self, tenant: str, waiter: asyncio.Future):
+        queue = self._queues.get(tenant)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        FAIR_QUEUE_DEPTH.set(len(queue), tenant=tenant)
+        if not queue:
+            self._retire(tenant)
+
+    def _retire(self, tenant: str):
+        # A tenant that runs out of work forfeits its leftover deficit (standard DRR)
+        if self._active and self._active[0] == tenant:
+            self._turn_started = False
+        self._active.remove(tenant)
+        del self._queues[tenant]
+        del self._deficit[tenant]
+
+    def _dispatch(self):
+        while self._free > 0 and self._active:
+            tenant = self._active[0]
+            if not self._turn_started:
+                self._deficit[tenant] += self.quantum * self.weights.get(tenant, self.default_weight)
+                self._turn_started = True
+            if self._deficit[tenant] < 1:
+                # Turn over; the deficit carries to the next round (weights below 1)
+                self._active.rotate(-1)
+                self._turn_started = False
+                continue
+            queue = self._queues[tenant]
+            waiter = queue.popleft()
+            FAIR_QUEUE_DEPTH.set(len(queue), tenant=tenant)
+            if not waiter.done():
+                # A waiter cancelled but not yet removed costs nothing
+                self._deficit[tenant] -= 1
+                self._free -= 1
+                waiter.set_result(None)
+            if not queue:
+                self._retire(tenant)
@@ -1,12 +1,48 @@
+import asyncio
 import logging
+from typing import Awaitable, Callable, Optional
 
 from adapters.email.sender import EmailSender
 from adapters.http.alert_db import AlertDBClient
+from adapters.http.circuit_breaker import CircuitBreaker
 from adapters.http.project_manager import ProjectManagerClient
-from models.models import Alert
+import deadlines
+from exceptions import DatabaseError
+from models.models import Alert, AlertStatus, Disposition, FullAlert
+from services.dedup_index import DedupIndex
+from services.digest import DigestBuffer, recipient_key
+from services.fair_queue import FairScheduler
+from services.pipeline import Pipeline, Stage
+from services.rate_limiter import SendRateLimiter
+from services.staleness import DROP, SUMMARIZE, StalenessPolicy
+from services.status_buffer import StatusWriteBuffer
 
 logger = logging.getLogger(__name__)
 
+PIPELINE_STAGES = ("resolve", "persist", "render", "send", "status")
+
+
+def _settle(future: asyncio.Future, error: Optional[Exception] = None):
+    """Release a waiting backlog alert; its waiter may be gone already (cancelled)."""
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+
+class _PipelineJob:
+    """One alert travelling through the staged pipeline."""
+    __slots__ = ("alert", "full_alert", "message", "digest")
+
+    def __init__(self, alert: Alert):
+        self.alert = alert
+        self.full_alert: Optional[FullAlert] = alert if isinstance(alert, FullAlert) else None
+        self.message = None
+        # Set when the alert was handed to the digest; resolved once its digest email is out
+        self.digest: Optional[asyncio.Future] = None
+
 
 class AlertOrchestrator:
     def __init__(
@@ -14,10 +50,72 @@ class AlertOrchestrator:
         alert_db_client: AlertDBClient,
         project_manager_client: ProjectManagerClient,
         email_sender: EmailSender,
+        dedup_index: Optional[DedupIndex] = None,
+        status_buffer: Optional[StatusWriteBuffer] = None,
+        pipeline_workers: Optional[dict[str, int]] = None,
+        pipeline_queue_size: int = 100,
+        digest_window: float = 0.0,
+        digest_max_alerts: int = 50,
+        digest_critical_delay: float = 0.0,
+        digest_critical_severities: tuple[str, ...] = ("critical",),
+        rate_limiter: Optional[SendRateLimiter] = None,
+        rate_limit_summary_interval: float = 300.0,
+        fair_scheduler: Optional[FairScheduler] = None,
+        staleness: Optional[StalenessPolicy] = None,
+        backlog_summary_interval: float = 60.0,
+        backlog_summary_max_alerts: int = 50,
     ):
         self.alert_db = alert_db_client
         self.project_manager = project_manager_client
         self.email_sender = email_sender
+        # Optional local pre-filter for duplicates AlertDB has already reported
+        self.dedup_index = dedup_index
+        # Optional write-behind for status updates; None = update AlertDB inline
+        self.status_buffer = status_buffer
+        # Optional digest mode: one email per recipient set per window (0 = one email per alert)
+        self.digest: Optional[DigestBuffer] = None
+        if digest_window > 0:
+            self.digest = DigestBuffer(
+                self._send_digest,
+                window=digest_window,
+                max_count=digest_max_alerts,
+                critical_delay=digest_critical_delay,
+                critical_severities=digest_critical_severities,
+            )
+        # Optional per-project / per-address email limits; held back alerts go out as a periodic summary
+        self.rate_limiter = rate_limiter
+        self.rate_limit_summary_interval = rate_limit_summary_interval
+        self._summary_task: Optional[asyncio.Task] = None
+        # Optional deficit round robin across projects/vendors in front of the SMTP sends
+        self.fair_scheduler = fair_scheduler
+        # Optional age/endsAt policy applied before any network I/O; "summarize" alerts wait in _backlog,
+        # each with the future its message waits on until the summary carrying it is sent
+        self.staleness = staleness
+        self.backlog_summary_interval = backlog_summary_interval
+        self.backlog_summary_max_alerts = backlog_summary_max_alerts
+        self._backlog: list[tuple[Alert, asyncio.Future]] = []
+        self._backlog_task: Optional[asyncio.Task] = None
+        self._backlog_flushes: set[asyncio.Task] = set()
+        # Optional staged pipeline (workers per stage name); None = process each alert in one coroutine
+        self.pipeline: Optional[Pipeline] = None
+        if pipeline_workers is not None:
+            self.pipeline = self._build_pipeline(pipeline_workers, pipeline_queue_size)
+
+    def _build_pipeline(self, workers: dict[str, int], queue_size: int) -> Pipeline:
+        handlers = {
+            "resolve": self._stage_resolve,
+            "persist": self._stage_persist,
+            "render": self._stage_render,
+            "send": self._stage_send,
+            "status": self._stage_status,
+        }
+        unknown = set(workers) - set(handlers)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {sorted(unknown)}")
+        return Pipeline([
+            Stage(name, handlers[name], workers=workers.get(name, 1), queue_size=queue_size)
+            for name in PIPELINE_STAGES
+        ])
 
     async def startup(self):
         """Initialize adapter connections."""
@@ -25,28 +123,90 @@ class AlertOrchestrator:
         # Start HTTP Clients
         await self.alert_db.start()
         await self.project_manager.start()
+        # Open pooled connections before the first alert needs them
+        await asyncio.gather(self.alert_db.warmup(), self.project_manager.warmup())
         
         # Start Email Sender (if it has a start/connect method)
         if hasattr(self.email_sender, 'connect'):
             await self.email_sender.connect()
 
+        if self.pipeline is not None:
+            await self.pipeline.start()
+
+        if self.rate_limiter is not None:
+            self._summary_task = asyncio.create_task(self._summary_loop())
+
+        if self.staleness is not None and self.staleness.summarizes:
+            self._backlog_task = asyncio.create_task(self._backlog_loop())
+
     async def shutdown(self):
         """Close adapter connections."""
         logger.info("Shutting down adapters...")
+        for task in (self._summary_task, self._backlog_task):
+            if task is not None:
+                task.cancel()
+        self._summary_task = self._backlog_task = None
+        # Send open digests and suppressed summaries before the email sender and AlertDB client go away
+        if self.digest is not None:
+            await self.digest.close()
+        if self.rate_limiter is not None:
+            await self.send_suppressed_summaries()
+        if self._backlog_flushes:
+            await asyncio.gather(*self._backlog_flushes, return_exceptions=True)
+        if self._backlog:
+            await self.send_backlog_summary()
+        # The consumer has drained by now; anything still queued is redelivered by the broker
+        if self.pipeline is not None:
+            await self.pipeline.close()
+        # Flush buffered status updates while the AlertDB client is still open
+        if self.status_buffer is not None:
+            await self.status_buffer.close()
         await self.alert_db.close()
         await self.project_manager.close()
         
         if hasattr(self.email_sender, 'close'):
             await self.email_sender.close()
 
-    async def process_alert(self, alert: Alert):
+    def circuit_states(self) -> dict[str, str]:
+        """Circuit breaker state per HTTP dependency (see BaseHTTPClient)."""
+        return {
+            client.name: client.breaker.state
+            for client in (self.alert_db, self.project_manager)
+            if isinstance(getattr(client, "breaker", None), CircuitBreaker)
+        }
+
+    async def process_alert(self, alert: Alert, status: Optional[AlertStatus] = None):
         """
         Orchestrate the alert processing flow.
+        An already resolved FullAlert (see process_batch) skips recipient resolution,
+        and one already persisted in bulk comes with its `status` and skips persistence.
         """
         logger.info(f"Processing alert: {alert.dedup_key}")
 
+        if self.pipeline is not None:
+            # Wait for the alert to leave the pipeline, so the caller acks (or retries) at the right moment
+            job = _PipelineJob(alert)
+            await (await self.pipeline.submit(job))
+            if job.digest is not None:
+                await job.digest
+            return
+
+        # 0. Known duplicate: skip without any HTTP call (process_batch checks before resolving)
+        if self.dedup_index is not None and not isinstance(alert, FullAlert) and self.dedup_index.seen(alert):
+            logger.info(f"Alert deduped locally: {alert.dedup_key}")
+            return
+
+        # 0b. Too old or already ended: handled by the staleness policy, without resolving recipients
+        action = None if isinstance(alert, FullAlert) else self._stale_action(alert)
+        if action is not None:
+            await self._handle_stale(alert, action)
+            return
+
         # 1. Resolve Recipients (FIRST)
-        full_alert = await self.project_manager.resolve_recipients(alert)
+        if isinstance(alert, FullAlert):
+            full_alert = alert
+        else:
+            full_alert = await self.project_manager.resolve_recipients(alert)
         # Note: full_alert is (Alert + Recipient)
         
         if not full_alert.alert_groups:
@@ -56,25 +216,37 @@ class AlertOrchestrator:
             # Assuming we proceed to persist.
         
         # 2. Persist & Dedup (SECOND)
-        from models.models import AlertStatus
         # We persist the original alert part, or full_alert? 
         # Persistence expects Alert. FullAlert inherits Alert, so it works.
-        status = await self.alert_db.persist_alert(full_alert)
+        if status is None:
+            status = await self.alert_db.persist_alert(full_alert)
         
         if status == AlertStatus.DEDUP:
             logger.info(f"Alert deduped: {full_alert.dedup_key}")
+            if self.dedup_index is not None:
+                self.dedup_index.record(alert)
             return
 
         # 3. Send Emails
+        if full_alert.alert_groups and not self._allow_send(full_alert):
+            self._record(alert)
+            return
+
+        if full_alert.alert_groups and self.digest is not None:
+            # Sent, marked SENT/FAILED and recorded together with the rest of its digest
+            await self.digest.add(full_alert)
+            logger.info(f"Alert processing completed: {alert.dedup_key}")
+            return
+
         if full_alert.alert_groups:
             try:
                 # full_alert serves as both Recipient (1st arg) and Alert (2nd arg)
-                await self.email_sender.send_email(full_alert, full_alert)
+                await self._fair(full_alert, lambda: self.email_sender.send_email(full_alert, full_alert))
             except Exception as e:
                 logger.error(f"Failed to send email for {alert.dedup_key}: {e}")
                 # Update Status: FAILED
                 try:
-                    await self.alert_db.update_status(alert.dedup_key, AlertStatus.FAILED)
+                    await self._update_status(alert.dedup_key, AlertStatus.FAILED)
                 except Exception as db_e:
                     logger.error(f"Failed to update failures status for {alert.dedup_key}: {db_e}")
                 # Re-raise the original error (to trigger Retry or DLQ) so we don't lose the alert
@@ -86,8 +258,327 @@ class AlertOrchestrator:
             # because the email was already sent successfully.
             # We do NOT want to NACK and retry sending the email again.
             try:
-                await self.alert_db.update_status(alert.dedup_key, AlertStatus.SENT)
+                await self._update_status(alert.dedup_key, AlertStatus.SENT)
             except Exception as e:
                  logger.error(f"Failed to update status to SENT for {alert.dedup_key}: {e}")
-                
+
+        # Only fully handled alerts are recorded, so a failed attempt is retried against AlertDB
+        if self.dedup_index is not None:
+            self.dedup_index.record(alert)
         logger.info(f"Alert processing completed: {alert.dedup_key}")
+
+    async def _stage_resolve(self, job: _PipelineJob) -> Optional[_PipelineJob]:
+        if job.full_alert is None:
+            if self.dedup_index is not None and self.dedup_index.seen(job.alert):
+                logger.info(f"Alert deduped locally: {job.alert.dedup_key}")
+                return None
+            action = self._stale_action(job.alert)
+            if action is not None:
+                await self._handle_stale(job.alert, action)
+                return None
+            job.full_alert = await self.project_manager.resolve_recipients(job.alert)
+        if not job.full_alert.alert_groups:
+            logger.warning(f"No recipients found for alert: {job.full_alert.dedup_key}")
+        return job
+
+    async def _stage_persist(self, job: _PipelineJob) -> Optional[_PipelineJob]:
+        status = await self.alert_db.persist_alert(job.full_alert)
+        if status == AlertStatus.DEDUP:
+            logger.info(f"Alert deduped: {job.alert.dedup_key}")
+            self._record(job.alert)
+            return None
+        if not job.full_alert.alert_groups:
+            self._record(job.alert)
+            logger.info(f"Alert processing completed: {job.alert.dedup_key}")
+            return None
+        if not self._allow_send(job.full_alert):
+            self._record(job.alert)
+            return None
+        if self.digest is not None:
+            # Leave the pipeline now; process_alert waits for the digest email instead
+            job.digest = self.digest.add(job.full_alert)
+            return None
+        return job
+
+    async def _stage_render(self, job: _PipelineJob) -> _PipelineJob:
+        try:
+            # Template rendering is CPU work: off the event loop, PIPELINE_RENDER_WORKERS renders at a time
+            job.message = await asyncio.to_thread(self.email_sender.render_email, job.full_alert, job.full_alert)
+        except Exception as e:
+            await self._mark_failed(job.alert, e)
+            raise
+        return job
+
+    async def _stage_send(self, job: _PipelineJob) -> _PipelineJob:
+        try:
+            await self._fair(
+                job.full_alert, lambda: self.email_sender.deliver_email(job.message, job.full_alert, job.full_alert)
+            )
+        except Exception as e:
+            await self._mark_failed(job.alert, e)
+            raise
+        return job
+
+    async def _stage_status(self, job: _PipelineJob) -> None:
+        # The email is out: a failed status update is logged, never retried through the broker
+        try:
+            await self._update_status(job.alert.dedup_key, AlertStatus.SENT)
+        except Exception as e:
+            logger.error(f"Failed to update status to SENT for {job.alert.dedup_key}: {e}")
+        self._record(job.alert)
+        logger.info(f"Alert processing completed: {job.alert.dedup_key}")
+
+    async def _mark_failed(self, alert: Alert, error: Exception):
+        logger.error(f"Failed to send email for {alert.dedup_key}: {error}")
+        try:
+            await self._update_status(alert.dedup_key, AlertStatus.FAILED)
+        except Exception as db_e:
+            logger.error(f"Failed to update failures status for {alert.dedup_key}: {db_e}")
+
+    async def _fair(self, full_alert: FullAlert, send: Callable[[], Awaitable[None]]):
+        """Run an SMTP send, in this alert's fair share of the send slots when fair queuing is on."""
+        if self.fair_scheduler is None:
+            await send()
+            return
+        await self.fair_scheduler.run(full_alert, send)
+
+    def _stale_action(self, alert: Alert) -> Optional[str]:
+        """The staleness policy's action for the alert; None when it takes the normal path."""
+        if self.staleness is None:
+            return None
+        return self.staleness.evaluate(alert)
+
+    async def _handle_stale(self, alert: Alert, action: str):
+        """
+        Handle an alert caught by the staleness policy instead of sending it.
+        A "summarize" alert waits until the backlog summary carrying it is sent, and raises
+        if it could not be, so its message is only acked once the summary is out (as with digests).
+        """
+        if action == DROP:
+            return
+        status = await self.alert_db.persist_alert(alert)
+        if status != AlertStatus.DEDUP and action == SUMMARIZE:
+            future = asyncio.get_running_loop().create_future()
+            self._backlog.append((alert, future))
+            if len(self._backlog) >= self.backlog_summary_max_alerts:
+                task = asyncio.create_task(self.send_backlog_summary())
+                self._backlog_flushes.add(task)
+                task.add_done_callback(self._backlog_flushes.discard)
+            await future
+        self._record(alert)
+
+    async def _backlog_loop(self):
+        while True:
+            await asyncio.sleep(self.backlog_summary_interval)
+            if self._backlog:
+                await self.send_backlog_summary()
+
+    async def send_backlog_summary(self):
+        """
+        Email the stale alerts collected since the last call: one summary per recipient set,
+        resolved in one batch. Every alert's waiting message is released with the outcome.
+        """
+        entries, self._backlog = self._backlog, []
+        if not entries:
+            return
+        # May be flushed from a message's context; the summary is not bound by its deadline
+        with deadlines.scope(None):
+            await self._send_backlog(entries)
+
+    async def _send_backlog(self, entries: list[tuple[Alert, asyncio.Future]]):
+        alerts = [alert for alert, _ in entries]
+        try:
+            resolved = await self.project_manager.resolve_recipients_batch(alerts)
+        except Exception as e:
+            logger.error(f"Failed to resolve recipients for backlog summary of {len(alerts)} alerts: {e}")
+            for _, future in entries:
+                _settle(future, e)
+            return
+
+        groups: dict[tuple, list[int]] = {}
+        for index, outcome in enumerate(resolved):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to resolve recipients for stale alert {alerts[index].dedup_key}: {outcome}")
+                _settle(entries[index][1], outcome)
+            elif outcome.alert_groups:
+                groups.setdefault(recipient_key(outcome), []).append(index)
+            else:
+                _settle(entries[index][1])
+
+        for indexes in groups.values():
+            group = [resolved[index] for index in indexes]
+            keys = [alert.dedup_key for alert in group]
+            try:
+                message = self.email_sender.render_digest(group, subject_prefix="Backlog summary")
+                await self._fair(group[0], lambda: self.email_sender.deliver_email(message, group[0], group[0]))
+            except Exception as e:
+                logger.error(f"Failed to send backlog summary of {len(group)} alerts: {e}")
+                try:
+                    await self._update_statuses(keys, AlertStatus.FAILED)
+                except Exception as db_e:
+                    logger.error(f"Failed to update failures status for backlog summary {keys}: {db_e}")
+                for index in indexes:
+                    _settle(entries[index][1], e)
+                continue
+            logger.info(f"Backlog summary of {len(group)} stale alerts sent to {len(group[0].alert_groups)} recipients")
+            try:
+                await self._update_statuses(keys, AlertStatus.SENT)
+            except Exception as e:
+                logger.error(f"Failed to update status to SENT for backlog summary {keys}: {e}")
+            for index in indexes:
+                _settle(entries[index][1])
+
+    def _allow_send(self, full_alert: FullAlert) -> bool:
+        if self.rate_limiter is None or self.rate_limiter.allow(full_alert):
+            return True
+        logger.info(f"Alert {full_alert.dedup_key} rate limited for project {full_alert.project_id}, folded into summary")
+        return False
+
+    async def _summary_loop(self):
+        while True:
+            await asyncio.sleep(self.rate_limit_summary_interval)
+            await self.send_suppressed_summaries()
+
+    async def send_suppressed_summaries(self):
+        """Email one "N alerts suppressed" summary per rate-limited recipient set."""
+        for entry in self.rate_limiter.take_suppressed():
+            recipient = entry.recipient
+            try:
+                message = self.email_sender.render_suppressed_summary(
+                    recipient, entry.count, dict(entry.alertnames), dict(entry.severities)
+                )
+                await self._fair(recipient, lambda: self.email_sender.deliver_email(message, recipient, recipient))
+                logger.info(f"Sent summary of {entry.count} suppressed alerts for project {recipient.project_id}")
+            except Exception as e:
+                logger.error(f"Failed to send suppressed summary for project {recipient.project_id}: {e}")
+
+    async def _send_digest(self, alerts: list[FullAlert]):
+        """Send one email for all alerts of a recipient set and mark them all SENT (or FAILED) together."""
+        keys = [alert.dedup_key for alert in alerts]
+        try:
+            if len(alerts) == 1:
+                message = self.email_sender.render_email(alerts[0], alerts[0])
+            else:
+                message = self.email_sender.render_digest(alerts)
+            await self._fair(alerts[0], lambda: self.email_sender.deliver_email(message, alerts[0], alerts[0]))
+        except Exception as e:
+            logger.error(f"Failed to send digest of {len(alerts)} alerts: {e}")
+            try:
+                await self._update_statuses(keys, AlertStatus.FAILED)
+            except Exception as db_e:
+                logger.error(f"Failed to update failures status for digest {keys}: {db_e}")
+            raise
+
+        logger.info(f"Digest of {len(alerts)} alerts sent to {len(alerts[0].alert_groups)} recipients")
+        try:
+            await self._update_statuses(keys, AlertStatus.SENT)
+        except Exception as e:
+            logger.error(f"Failed to update status to SENT for digest {keys}: {e}")
+        for alert in alerts:
+            self._record(alert)
+
+    async def _update_statuses(self, dedup_keys: list[str], status: AlertStatus):
+        if self.status_buffer is not None:
+            for key in dedup_keys:
+                self.status_buffer.put(key, status)
+            return
+        failures = await self.alert_db.update_statuses({key: status for key in dedup_keys})
+        if failures:
+            logger.error(f"Failed to update status to {status.value} for {sorted(failures)}")
+
+    def _record(self, alert: Alert):
+        if self.dedup_index is not None:
+            self.dedup_index.record(alert)
+
+    async def _update_status(self, dedup_key: str, status: AlertStatus):
+        """Record the status, through the write-behind buffer when one is configured."""
+        if self.status_buffer is not None:
+            self.status_buffer.put(dedup_key, status)
+            return
+        await self.alert_db.update_status(dedup_key, status)
+
+    async def process_batch(self, alerts: list[Alert]) -> list[Disposition]:
+        """
+        Process a batch of alerts and return one Disposition per alert, in input order.
+
+        A failing alert only affects its own disposition, never the rest of the batch.
+        Alerts sharing a fingerprint are processed sequentially in batch order;
+        distinct fingerprints are processed concurrently.
+        Recipients are resolved up front, one lookup per (vendor, environment, site),
+        and the resolved alerts are persisted with one persist_alerts call (unless the
+        pipeline, which has its own persist stage, is in use).
+        Stale alerts to summarize hold the batch's dispositions until their backlog summary is sent.
+        """
+        logger.info(f"Processing batch of {len(alerts)} alerts")
+        dispositions: list[Disposition] = [Disposition.ACK] * len(alerts)
+
+        # Known duplicates are acked without resolving recipients for them
+        pending = list(range(len(alerts)))
+        if self.dedup_index is not None:
+            pending = [index for index in pending if not self.dedup_index.seen(alerts[index])]
+            if len(pending) < len(alerts):
+                logger.info(f"{len(alerts) - len(pending)} batch alerts deduped locally")
+
+        # Stale alerts are handled concurrently with the rest of the batch (summarized ones wait for their summary)
+        stale: dict[int, str] = {}
+        if self.staleness is not None:
+            for index in pending:
+                action = self._stale_action(alerts[index])
+                if action is not None:
+                    stale[index] = action
+            pending = [index for index in pending if index not in stale]
+
+        async def run_stale(index: int):
+            try:
+                await self._handle_stale(alerts[index], stale[index])
+            except Exception as e:
+                logger.error(f"Batch item {alerts[index].dedup_key} failed: {e}")
+                dispositions[index] = Disposition.from_error(e)
+
+        resolved = dict(zip(
+            pending,
+            await self.project_manager.resolve_recipients_batch([alerts[index] for index in pending]),
+        ))
+
+        # Group indexes by fingerprint, preserving arrival order within each group
+        groups: dict[str, list[int]] = {}
+        for index, outcome in resolved.items():
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch item {alerts[index].dedup_key} failed: {outcome}")
+                dispositions[index] = Disposition.from_error(outcome)
+            else:
+                groups.setdefault(alerts[index].dedup_key, []).append(index)
+
+        statuses: dict[int, AlertStatus] = {}
+        if self.pipeline is None:
+            # Batch order, so repeats of a fingerprint are deduped against the earlier ones
+            ordered = sorted(index for indexes in groups.values() for index in indexes)
+            persisted = await self.alert_db.persist_alerts([resolved[index] for index in ordered])
+            if len(persisted) != len(ordered):
+                raise DatabaseError(f"persist_alerts returned {len(persisted)} results for {len(ordered)} alerts")
+            for index, outcome in zip(ordered, persisted):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Batch item {alerts[index].dedup_key} failed: {outcome}")
+                    dispositions[index] = Disposition.from_error(outcome)
+                else:
+                    statuses[index] = outcome
+            groups = {
+                key: kept for key, indexes in groups.items()
+                if (kept := [index for index in indexes if index in statuses])
+            }
+
+        async def run_group(indexes: list[int]):
+            for index in indexes:
+                try:
+                    await self.process_alert(resolved[index], statuses.get(index))
+                except Exception as e:
+                    logger.error(f"Batch item {alerts[index].dedup_key} failed: {e}")
+                    dispositions[index] = Disposition.from_error(e)
+
+        # Started only now: if the bulk steps above raise, the whole batch is retried and no stale
+        # alert has been persisted or queued for a summary yet
+        await asyncio.gather(
+            *(run_stale(index) for index in stale),
+            *(run_group(indexes) for indexes in groups.values()),
+        )
+        return dispositions
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import deadlines
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STAGE_QUEUE_DEPTH = registry.gauge("pipeline_stage_queue_depth", "Items waiting in front of a pipeline stage", ["stage"])
+STAGE_BUSY = registry.gauge("pipeline_stage_busy_workers", "Pipeline stage workers currently handling an item", ["stage"])
+STAGE_SECONDS = registry.histogram("pipeline_stage_seconds", "Service time of one item in a pipeline stage", ["stage"])
+STAGE_ERRORS = registry.counter("pipeline_stage_errors_total", "Items that failed in a pipeline stage", ["stage"])
+
+# Returns the item for the next stage, or None when the item is finished
+StageHandler = Callable[[Any], Awaitable[Optional[Any]]]
+
+
+class Stage:
+    """
+    One step of a Pipeline: `workers` tasks running `handler` on items taken
+    from a queue holding at most `queue_size` items (0 = unbounded).
+    """
+    def __init__(self, name: str, handler: StageHandler, workers: int, queue_size: int = 0):
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker")
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue: Optional[asyncio.Queue] = None
+
+
+class Pipeline:
+    """
+    Runs items through a fixed sequence of stages connected by bounded queues.
+
+    Each stage has its own workers, so e.g. SMTP and HTTP concurrency are
+    tuned independently. A full queue blocks the stage feeding it, and
+    ultimately `submit`, which is how backpressure reaches the consumer.
+
+    `submit` returns a future resolved when the item leaves the pipeline:
+    with None once a handler finishes it (returns None) or the last stage
+    completes, or with the exception a handler raised.
+
+    Workers do not inherit the submitter's context, so the message deadline
+    (see deadlines.py) current at `submit` travels with the item.
+    """
+    def __init__(self, stages: list[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        if self.is_running:
+            return
+        for index, stage in enumerate(self.stages):
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            self._workers.extend(
+                asyncio.create_task(self._worker(stage, next_stage), name=f"pipeline-{stage.name}-{i}")
+                for i in range(stage.workers)
+            )
+        logger.info("Pipeline started: " + " -> ".join(f"{s.name}({s.workers})" for s in self.stages))
+
+    async def submit(self, item: Any) -> asyncio.Future:
+        """Queue an item on the first stage, waiting for room if it is full."""
+        if not self.is_running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._put(self.stages[0], item, future, deadlines.current())
+        return future
+
+    async def _put(self, stage: Stage, item: Any, future: asyncio.Future, deadline: Optional[float]):
+        await stage.queue.put((item, future, deadline))
+        STAGE_QUEUE_DEPTH.set(stage.queue.qsize(), stage=stage.name)
+
+    async def _worker(self, stage: Stage, next_stage: Optional[Stage]):
+        while True:
+            item, future, deadline = await stage.queue.get()
+            STAGE_QUEUE_DEPTH.set(stage.queue.qsize(), stage=stage.name)
+            try:
+                if future.done():
+                    # Abandoned (e.g. cancelled on shutdown): don't do the work
+                    continue
+                with deadlines.scope(deadline):
+                    result = await self._handle(stage, item, future)
+                if result is None or next_stage is None:
+                    if not future.done():
+                        future.set_result(None)
+                else:
+                    # Blocks this worker while the next stage is full (backpressure)
+                    await self._put(next_stage, result, future, deadline)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            finally:
+                stage.queue.task_done()
+
+    async def _handle(self, stage: Stage, item: Any, future: asyncio.Future) -> Optional[Any]:
+        """Run the stage handler; a failure finishes the item with the exception."""
+        STAGE_BUSY.inc(stage=stage.name)
+        started = time.perf_counter()
+        try:
+            return await stage.handler(item)
+        except Exception as e:
+            STAGE_ERRORS.inc(stage=stage.name)
+            if not future.done():
+                future.set_exception(e)
+            return None
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage.name)
+            STAGE_BUSY.dec(stage=stage.name)
+
+    async def close(self):
+        """Cancel the workers. Items still queued are dropped and their futures cancelled."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for stage in self.stages:
+            while stage.queue is not None and not stage.queue.empty():
+                _, future, _ = stage.queue.get_nowait()
+                future.cancel()
+            stage.queue = None
+        self._workers = []
@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Optional
+
+from metrics import registry
+from models.models import FullAlert
+from services.digest import RecipientKey, recipient_key
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DECISIONS = registry.counter(
+    "rate_limit_decisions_total", "Email send decisions by the rate limiter: allowed, or the scope (project/address) whose bucket was empty", ["scope"]
+)
+RATE_LIMIT_SUPPRESSED = registry.gauge("rate_limit_suppressed_pending", "Suppressed alerts waiting for the next summary")
+
+
+class TokenBucket:
+    """`burst` tokens, refilled at `rate` tokens per second."""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+    def refill(self, rate: float, burst: float, now: float) -> float:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        return self.tokens
+
+
+class Suppressed:
+    """Alerts held back for one recipient set since the last summary."""
+    __slots__ = ("recipient", "count", "alertnames", "severities", "first_at", "last_at")
+
+    def __init__(self, recipient: FullAlert, now: float):
+        self.recipient = recipient
+        self.count = 0
+        self.alertnames: Counter[str] = Counter()
+        self.severities: Counter[str] = Counter()
+        self.first_at = now
+        self.last_at = now
+
+    def add(self, alert: FullAlert, now: float):
+        self.count += 1
+        self.alertnames[alert.labels.get("alertname", "Unknown Alert")] += 1
+        self.severities[alert.severity] += 1
+        self.last_at = now
+
+
+class SendRateLimiter:
+    """
+    Token-bucket limits on emails per project (Recipient.project_id) and per
+    recipient address. Rates are per minute; 0 disables that scope.
+
+    `allow` takes one token from the project bucket and from every address
+    bucket, or none at all when any of them is empty; the alert is then
+    recorded as suppressed for its recipient set, and `take_suppressed`
+    hands those records out for a periodic "N alerts suppressed" summary.
+    Limits can be changed at runtime with `configure`.
+    """
+    def __init__(
+        self,
+        project_per_minute: float = 0.0,
+        project_burst: float = 20,
+        address_per_minute: float = 0.0,
+        address_burst: float = 20,
+        max_buckets: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.configure(project_per_minute, project_burst, address_per_minute, address_burst)
+        self._buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._suppressed: dict[tuple[str, RecipientKey], Suppressed] = {}
+
+    def configure(
+        self,
+        project_per_minute: Optional[float] = None,
+        project_burst: Optional[float] = None,
+        address_per_minute: Optional[float] = None,
+        address_burst: Optional[float] = None,
+    ):
+        """Change any of the limits; omitted ones keep their value. Existing buckets keep their tokens."""
+        values = {
+            "project_per_minute": project_per_minute,
+            "project_burst": project_burst,
+            "address_per_minute": address_per_minute,
+            "address_burst": address_burst,
+        }
+        merged = {name: float(getattr(self, name) if value is None else value) for name, value in values.items()}
+        if any(value < 0 for value in merged.values()):
+            raise ValueError(f"Rate limits must be >= 0: {merged}")
+        if merged["project_burst"] < 1 or merged["address_burst"] < 1:
+            raise ValueError(f"Bursts must be >= 1: {merged}")
+        for name, value in merged.items():
+            setattr(self, name, value)
+        logger.info(f"Rate limits: {self.limits()}")
+
+    def limits(self) -> dict:
+        return {
+            "project_per_minute": self.project_per_minute,
+            "project_burst": self.project_burst,
+            "address_per_minute": self.address_per_minute,
+            "address_burst": self.address_burst,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.project_per_minute > 0 or self.address_per_minute > 0
+
+    def _bucket(self, scope: str, key: str, burst: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            bucket = self._buckets[(scope, key)] = TokenBucket(burst, now)
+            # An evicted bucket is simply full again when it comes back
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((scope, key))
+        return bucket
+
+    def allow(self, alert: FullAlert) -> bool:
+        """Take a token for sending this alert, or record it as suppressed."""
+        if not self.enabled:
+            return True
+        now = self.clock()
+        buckets = []
+        if self.project_per_minute > 0:
+            buckets.append(("project", self._bucket("project", alert.project_id, self.project_burst, now),
+                            self.project_per_minute, self.project_burst))
+        if self.address_per_minute > 0:
+            buckets.extend(
+                ("address", self._bucket("address", address, self.address_burst, now),
+                 self.address_per_minute, self.address_burst)
+                for address in recipient_key(alert)
+            )
+
+        for scope, bucket, per_minute, burst in buckets:
+            if bucket.refill(per_minute / 60, burst, now) < 1:
+                RATE_LIMIT_DECISIONS.inc(scope=scope)
+                self._suppress(alert, now)
+                return False
+        for _, bucket, _, _ in buckets:
+            bucket.tokens -= 1
+        RATE_LIMIT_DECISIONS.inc(scope="allowed")
+        return True
+
+    def _suppress(self, alert: FullAlert, now: float):
+        key = (alert.project_id, recipient_key(alert))
+        entry = self._suppressed.get(key)
+        if entry is None:
+            entry = self._suppressed[key] = Suppressed(alert, now)
+        entry.add(alert, now)
+        RATE_LIMIT_SUPPRESSED.inc()
+
+    def take_suppressed(self) -> list[Suppressed]:
+        """Return and forget everything suppressed since the last call."""
+        entries = list(self._suppressed.values())
+        self._suppressed = {}
+        RATE_LIMIT_SUPPRESSED.set(0)
+        return entries
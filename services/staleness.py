@@ -0,0 +1,77 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from metrics import registry
+from models.models import Alert
+
+logger = logging.getLogger(__name__)
+
+STALE_DECISIONS = registry.counter(
+    "stale_alert_decisions_total", "Alerts caught by the staleness policy, by reason and action", ["reason", "action"]
+)
+
+DROP = "drop"
+SUMMARIZE = "summarize"
+PERSIST = "persist"
+ACTIONS = (DROP, SUMMARIZE, PERSIST)
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    # Alertmanager sends endsAt=0001-01-01T00:00:00Z for alerts without an end
+    if value is None or value.year <= 1:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class StalenessPolicy:
+    """
+    Decides, from the alert's own timestamps and before any network I/O,
+    whether an alert is too late to be emailed individually.
+
+    - expired: a firing alert whose endsAt is already in the past
+    - age: an alert older than `max_age` seconds (measured from endsAt for
+      resolved alerts, startsAt otherwise); 0 disables the check
+
+    Each reason maps to an action: "drop" (ack and forget), "persist" (store
+    in AlertDB without sending) or "summarize" (persist and fold into a
+    periodic backlog summary). `None` keeps the normal path.
+    """
+    def __init__(
+        self,
+        max_age: float = 0.0,
+        age_action: Optional[str] = None,
+        expired_action: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        for action in (age_action, expired_action):
+            if action is not None and action not in ACTIONS:
+                raise ValueError(f"Unknown staleness action {action!r}, expected one of {ACTIONS}")
+        self.max_age = max_age
+        self.age_action = age_action
+        self.expired_action = expired_action
+        self.clock = clock
+
+    @property
+    def summarizes(self) -> bool:
+        return SUMMARIZE in (self.age_action, self.expired_action)
+
+    def evaluate(self, alert: Alert) -> Optional[str]:
+        """Return the action for a stale alert (and count it), or None for a fresh one."""
+        now = self.clock()
+        ends_at = _epoch(alert.endsAt)
+        reason, action = None, None
+        if self.expired_action and alert.status == "firing" and ends_at is not None and ends_at < now:
+            reason, action = "expired", self.expired_action
+        elif self.age_action and self.max_age > 0:
+            reference = ends_at if alert.status == "resolved" and ends_at is not None else _epoch(alert.startsAt)
+            if reference is not None and now - reference > self.max_age:
+                reason, action = "age", self.age_action
+        if action is None:
+            return None
+        STALE_DECISIONS.inc(reason=reason, action=action)
+        logger.info(f"Stale alert {alert.dedup_key} ({reason}): {action}")
+        return action
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from adapters.http.alert_db import AlertDBClient
+import deadlines
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+STATUS_BUFFER_DEPTH = registry.gauge("status_buffer_depth", "Status updates waiting to be written to AlertDB")
+STATUS_BUFFER_COALESCED = registry.counter(
+    "status_buffer_coalesced_total", "Status updates replaced by a newer one for the same fingerprint before flushing"
+)
+STATUS_BUFFER_FLUSH_SECONDS = registry.histogram("status_buffer_flush_seconds", "Time to write one batch of status updates")
+STATUS_BUFFER_FLUSH_FAILURES = registry.counter(
+    "status_buffer_flush_failures_total", "Status updates that failed to write and were requeued"
+)
+
+
+class StatusWriteBuffer:
+    """
+    Write-behind buffer for AlertDB status updates.
+
+    `put` records the latest status per fingerprint and returns immediately;
+    an older pending update for the same fingerprint is replaced. Pending
+    updates are written with AlertDBClient.update_statuses once `max_size`
+    fingerprints are pending or `max_delay` seconds after the first one
+    arrived. Flushes run one at a time, so updates reach AlertDB in order.
+
+    Failed updates are requeued for the next flush unless a newer status for
+    the same fingerprint arrived in the meantime. `close` flushes everything
+    that is left and waits for it.
+    """
+    def __init__(self, alert_db: AlertDBClient, max_size: int, max_delay: float):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.alert_db = alert_db
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: dict[str, str] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def put(self, dedup_key: str, status: str):
+        """Queue a status update, flushing immediately if the buffer is full."""
+        if self._pending.pop(dedup_key, None) is not None:
+            STATUS_BUFFER_COALESCED.inc()
+        self._pending[dedup_key] = status
+        STATUS_BUFFER_DEPTH.set(len(self._pending))
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+
+    def flush(self):
+        """Start writing everything pending in the background."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        STATUS_BUFFER_DEPTH.set(0)
+        task = asyncio.create_task(self._write(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, batch: dict[str, str]):
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                # Background write: not bound by the deadline of the message that triggered the flush
+                with deadlines.scope(None):
+                    failures = await self.alert_db.update_statuses(batch)
+            except Exception as e:
+                failures = {key: e for key in batch}
+            STATUS_BUFFER_FLUSH_SECONDS.observe(time.perf_counter() - started)
+
+        if failures:
+            STATUS_BUFFER_FLUSH_FAILURES.inc(len(failures))
+            logger.warning(f"{len(failures)} of {len(batch)} status updates failed, requeued: {next(iter(failures.values()))}")
+            for key in failures:
+                # A newer status queued during the flush wins over the failed one
+                if key not in self._pending:
+                    self._pending[key] = batch[key]
+            STATUS_BUFFER_DEPTH.set(len(self._pending))
+            if self._timer is None and self._pending:
+                self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+        return failures
+
+    async def close(self):
+        """Write everything pending (including updates requeued by earlier flushes) and wait for it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            failures = await self._write(batch)
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if failures:
+                logger.error(f"Dropping {len(failures)} status updates on shutdown: {sorted(failures)}")
+                self._pending = {}
+        STATUS_BUFFER_DEPTH.set(0)
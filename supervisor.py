@@ -0,0 +1,258 @@
+import asyncio
+import json
+import multiprocessing
+import signal
+import sys
+import time
+import logging
+from multiprocessing.process import BaseProcess
+from typing import Callable, Optional
+
+from config import settings, setup_logging
+from api.health import start_health_server
+from metrics import Export
+
+logger = logging.getLogger(__name__)
+
+"""
+SUPERVISOR
+----------
+Runs N worker processes, each with its own event loop, RabbitMQ connection,
+channel and AlertOrchestrator (see main.main). The supervisor itself only:
+1. Serves a single aggregated /health endpoint, and /metrics merging every
+   worker's metrics (published on the status board with each heartbeat).
+2. Restarts workers that die, with exponential backoff.
+3. Forwards SIGTERM to workers and waits for them to drain.
+
+Usage: python supervisor.py   (worker count from WORKER_PROCESSES)
+"""
+
+
+class WorkerStatusBoard:
+    """
+    Shared-memory table of worker heartbeats and metrics exports.
+    Workers write their own slot; the supervisor reads all of them.
+    """
+    def __init__(self, size: int, ctx=multiprocessing, metrics_bytes: Optional[int] = None):
+        self.heartbeats = ctx.Array("d", size, lock=False)
+        self.connected = ctx.Array("b", size, lock=False)
+        # Latest metrics export per worker (JSON); the lock keeps the supervisor from reading a half-written one
+        metrics_bytes = settings.WORKER_METRICS_BUFFER_BYTES if metrics_bytes is None else metrics_bytes
+        self.metrics = [ctx.Array("c", metrics_bytes) for _ in range(size)]
+        self.metrics_length = ctx.Array("i", size, lock=False)
+
+    def beat(self, index: int, connected: bool):
+        self.connected[index] = int(connected)
+        self.heartbeats[index] = time.time()
+
+    def publish_metrics(self, index: int, export: Export) -> bool:
+        data = json.dumps(export).encode()
+        slot = self.metrics[index]
+        if len(data) > len(slot):
+            logger.warning(
+                f"Worker {index} metrics ({len(data)} bytes) exceed WORKER_METRICS_BUFFER_BYTES ({len(slot)}), not published"
+            )
+            return False
+        with slot.get_lock():
+            slot[:len(data)] = data
+            self.metrics_length[index] = len(data)
+        return True
+
+    def read_metrics(self, index: int) -> Optional[Export]:
+        slot = self.metrics[index]
+        with slot.get_lock():
+            data = slot[:self.metrics_length[index]]
+        return json.loads(data) if data else None
+
+    def reset(self, index: int):
+        self.connected[index] = 0
+        self.heartbeats[index] = 0.0
+        with self.metrics[index].get_lock():
+            self.metrics_length[index] = 0
+
+
+def run_worker(index: int, board: WorkerStatusBoard):
+    """
+    Worker process entry point.
+    """
+    from main import main
+    from metrics import registry
+
+    def heartbeat(connected: bool):
+        board.beat(index, connected)
+        board.publish_metrics(index, registry.export({"worker": str(index)}))
+
+    try:
+        asyncio.run(main(start_health=False, on_heartbeat=heartbeat))
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerHandle:
+    """
+    Supervisor-side bookkeeping for one worker slot.
+    """
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[BaseProcess] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.failures = 0
+        self.restart_at: Optional[float] = None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        worker_count: int = None,
+        process_factory: Optional[Callable[[int, WorkerStatusBoard], BaseProcess]] = None,
+    ):
+        self.worker_count = worker_count or settings.WORKER_PROCESSES
+        self.ctx = multiprocessing.get_context(settings.WORKER_START_METHOD)
+        self.board = WorkerStatusBoard(self.worker_count, ctx=self.ctx)
+        self.process_factory = process_factory or self._create_process
+        self.workers = [WorkerHandle(i) for i in range(self.worker_count)]
+        self._stopping = False
+
+    def _create_process(self, index: int, board: WorkerStatusBoard) -> BaseProcess:
+        return self.ctx.Process(target=run_worker, args=(index, board), name=f"alert-worker-{index}", daemon=False)
+
+    def start_worker(self, worker: WorkerHandle):
+        self.board.reset(worker.index)
+        worker.process = self.process_factory(worker.index, self.board)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        logger.info(f"Started worker {worker.index} (pid {worker.process.pid})")
+
+    def check_workers(self, now: float = None):
+        """
+        Restart dead workers. Consecutive crashes back off exponentially;
+        a worker that stayed up longer than the max backoff resets its counter.
+        """
+        if self._stopping:
+            return
+        now = time.monotonic() if now is None else now
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                continue
+
+            if worker.restart_at is None:
+                if worker.process is not None:
+                    uptime = now - worker.started_at
+                    if uptime > settings.WORKER_RESTART_BACKOFF_MAX:
+                        worker.failures = 0
+                    delay = min(
+                        settings.WORKER_RESTART_BACKOFF * (2 ** worker.failures),
+                        settings.WORKER_RESTART_BACKOFF_MAX,
+                    )
+                    worker.failures += 1
+                    logger.warning(
+                        f"Worker {worker.index} (pid {worker.process.pid}) exited with code "
+                        f"{worker.process.exitcode}, restarting in {delay:.1f}s"
+                    )
+                    worker.restart_at = now + delay
+                else:
+                    worker.restart_at = now
+
+            if now >= worker.restart_at:
+                if worker.process is not None:
+                    worker.restarts += 1
+                self.start_worker(worker)
+
+    def worker_health(self) -> list[dict]:
+        """
+        Per-worker status, as reported on /health.
+        A worker is healthy when alive, connected to RabbitMQ and heartbeating.
+        """
+        stale_after = settings.WORKER_HEARTBEAT_INTERVAL * 3
+        now = time.time()
+        report = []
+        for worker in self.workers:
+            alive = worker.process is not None and worker.process.is_alive()
+            connected = bool(self.board.connected[worker.index])
+            fresh = now - self.board.heartbeats[worker.index] <= stale_after
+            report.append({
+                "id": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": alive,
+                "rabbitmq": "connected" if connected else "disconnected",
+                "restarts": worker.restarts,
+                "healthy": alive and connected and fresh,
+            })
+        return report
+
+    def worker_metrics(self) -> list[Export]:
+        """The metrics each worker published with its last heartbeat (cleared when it restarts)."""
+        exports = (self.board.read_metrics(worker.index) for worker in self.workers)
+        return [export for export in exports if export is not None]
+
+    @property
+    def is_connected(self) -> bool:
+        return any(w["healthy"] for w in self.worker_health())
+
+    async def run(self, stop_event: asyncio.Event, poll_interval: float = 1.0):
+        """Start all workers and keep them alive until stop_event is set."""
+        logger.info(f"Supervisor starting {self.worker_count} workers")
+        self.check_workers()
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.check_workers()
+        await self.stop()
+
+    async def stop(self, timeout: float = None):
+        """
+        SIGTERM every worker so it can drain, then SIGKILL any that outlive the timeout.
+        """
+        self._stopping = True
+        timeout = settings.WORKER_SHUTDOWN_TIMEOUT if timeout is None else timeout
+        running = [w.process for w in self.workers if w.process is not None and w.process.is_alive()]
+        logger.info(f"Stopping {len(running)} workers...")
+        for process in running:
+            process.terminate()
+
+        deadline = time.monotonic() + timeout
+        for process in running:
+            await asyncio.to_thread(process.join, max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker pid {process.pid} did not stop in {timeout}s, killing")
+                process.kill()
+                await asyncio.to_thread(process.join)
+        logger.info("All workers stopped")
+
+
+async def supervise():
+    setup_logging()
+    logger.info("Supervisor starting...")
+
+    supervisor = Supervisor()
+    try:
+        health_runner = await start_health_server(supervisor=supervisor)
+    except Exception as e:
+        logger.error(f"Failed to start healthcheck server: {e}")
+        sys.exit(1)
+
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            logger.warning(f"Signal {sig} handling not supported on this platform/loop.")
+
+    try:
+        await supervisor.run(stop_event)
+    finally:
+        logger.info("Cleaning up healthcheck server...")
+        await health_runner.cleanup()
+        logger.info("Supervisor stopped")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(supervise())
+    except KeyboardInterrupt:
+        pass
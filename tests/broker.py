@@ -0,0 +1,97 @@
+"""
+In-memory stand-in for the parts of RabbitMQ the consumer relies on:
+queue declaration, publishing through the default exchange, per-queue TTL
+with dead-lettering, and settling deliveries (ack / nack / reject).
+
+Time is virtual: call `advance(ms)` to expire TTL'd messages.
+"""
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aio_pika
+
+
+class InMemoryDelivery:
+    """
+    Minimal AbstractIncomingMessage look-alike handed to the consumer.
+    """
+    def __init__(self, broker: "InMemoryBroker", queue: str, message: aio_pika.Message):
+        self.broker = broker
+        self.queue = queue
+        self.body = message.body
+        self.headers = dict(message.headers or {})
+        self.content_type = message.content_type
+        self.priority = message.priority
+        self.message_id = message.message_id
+        self._message = message
+        self.settled: Optional[str] = None
+
+    @asynccontextmanager
+    async def process(self, ignore_processed: bool = False):
+        yield self
+
+    async def ack(self):
+        self.settled = "ack"
+
+    async def nack(self, requeue: bool = True):
+        self.settled = "nack"
+        if requeue:
+            self.broker.queues[self.queue].append((self.broker.now, self._message))
+
+    async def reject(self, requeue: bool = False):
+        self.settled = "reject"
+        if requeue:
+            self.broker.queues[self.queue].append((self.broker.now, self._message))
+
+
+class InMemoryExchange:
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+
+    async def publish(self, message: aio_pika.Message, routing_key: str):
+        # Default exchange: routing key is the queue name, unroutable messages are dropped
+        if routing_key in self.broker.queues:
+            self.broker.queues[routing_key].append((self.broker.now, message))
+
+
+class InMemoryChannel:
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+        self.default_exchange = InMemoryExchange(broker)
+
+    async def declare_queue(self, name: str, durable: bool = False, arguments: dict = None):
+        self.broker.queues.setdefault(name, [])
+        self.broker.arguments[name] = arguments or {}
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self.now = 0
+        self.queues: dict[str, list[tuple[int, aio_pika.Message]]] = {}
+        self.arguments: dict[str, dict] = {}
+
+    def channel(self) -> InMemoryChannel:
+        return InMemoryChannel(self)
+
+    def get(self, queue: str) -> Optional[InMemoryDelivery]:
+        """Pop the next message from a queue as a delivery."""
+        if not self.queues.get(queue):
+            return None
+        _, message = self.queues[queue].pop(0)
+        return InMemoryDelivery(self, queue, message)
+
+    def advance(self, ms: int):
+        """Move the clock forward and dead-letter every expired message."""
+        self.now += ms
+        for name, args in self.arguments.items():
+            ttl = args.get("x-message-ttl")
+            if ttl is None:
+                continue
+            target = args.get("x-dead-letter-routing-key", name)
+            remaining = []
+            for enqueued_at, message in self.queues[name]:
+                if self.now - enqueued_at >= ttl:
+                    self.queues[target].append((self.now, message))
+                else:
+                    remaining.append((enqueued_at, message))
+            self.queues[name] = remaining
@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import MagicMock, AsyncMock
 from models.models import Alert, Recipient
 
 def create_alert(
@@ -73,3 +74,23 @@ def create_alert_payload(**overrides) -> dict:
     }
     defaults.update(overrides)
     return defaults
+
+def create_message(body: bytes = None, fingerprint: str = "test-fp", priority: int = 0) -> MagicMock:
+    """
+    Factory function to create a mocked aio-pika incoming message.
+    Defaults to a body holding a serialized Alert with the given fingerprint.
+    """
+    if body is None:
+        body = create_alert(dedup_key=fingerprint).model_dump_json(by_alias=True).encode()
+
+    message = MagicMock()
+    process_ctx = AsyncMock()
+    process_ctx.__aenter__.return_value = message
+    process_ctx.__aexit__.return_value = None
+    message.process.return_value = process_ctx
+    message.body = body
+    message.priority = priority
+    message.ack = AsyncMock()
+    message.nack = AsyncMock()
+    message.reject = AsyncMock()
+    return message
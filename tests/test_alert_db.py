@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import json
+
+import httpx
+
+from adapters.http.alert_db import AlertDBClient
+from exceptions import DatabaseError
+from models.models import AlertStatus
+from tests.factories import create_alert
+
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://alert-db/alerts/bulk")
+    return httpx.HTTPStatusError(str(status), request=request, response=httpx.Response(status, request=request))
+
+
+class TestPersistAlerts(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = AlertDBClient()
+        self.client.bulk_chunk_size = 2
+        self.client.bulk_supported = True
+        self.client._send_json_bytes = AsyncMock()
+        self.client._post = AsyncMock()
+        self.alerts = [create_alert(dedup_key=f"fp-{i}") for i in range(5)]
+
+    async def test_chunks_and_maps_results_in_order(self):
+        async def bulk(method, endpoint, content):
+            payload = json.loads(content)
+            response = MagicMock()
+            # Every odd fingerprint is a duplicate
+            response.json.return_value = {
+                "results": [{"status": "dedup" if int(a["fingerprint"][-1]) % 2 else "ok"} for a in payload]
+            }
+            return response
+
+        self.client._send_json_bytes.side_effect = bulk
+
+        results = await self.client.persist_alerts(self.alerts)
+
+        self.assertEqual(self.client._send_json_bytes.await_count, 3)
+        self.assertEqual(results, [AlertStatus.OK, AlertStatus.DEDUP, AlertStatus.OK, AlertStatus.DEDUP, AlertStatus.OK])
+        first_body = json.loads(self.client._send_json_bytes.await_args_list[0].kwargs["content"])
+        self.assertEqual([a["fingerprint"] for a in first_body], ["fp-0", "fp-1"])
+        self.client._post.assert_not_awaited()
+
+    async def test_failed_chunk_only_fails_its_own_alerts(self):
+        ok = MagicMock()
+        ok.json.return_value = {"results": [{"status": "ok"}, {"status": "ok"}]}
+        self.client._send_json_bytes.side_effect = [ok, http_error(500)]
+
+        results = await self.client.persist_alerts(self.alerts[:4])
+
+        self.assertEqual(results[:2], [AlertStatus.OK, AlertStatus.OK])
+        self.assertIsInstance(results[2], DatabaseError)
+        self.assertIsInstance(results[3], DatabaseError)
+
+    async def test_falls_back_to_capped_single_requests(self):
+        self.client._send_json_bytes.side_effect = http_error(404)
+        self.client.bulk_concurrency = 2
+        active = peak = 0
+
+        async def single(endpoint, json_payload, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if json_payload["fingerprint"] == "fp-3":
+                raise httpx.ConnectError("refused")
+            response = MagicMock()
+            response.json.return_value = {"status": "ok"}
+            return response
+
+        self.client._post.side_effect = single
+
+        results = await self.client.persist_alerts(self.alerts)
+
+        self.assertFalse(self.client.bulk_supported)
+        self.assertEqual(peak, 2)
+        self.assertEqual(results[:3], [AlertStatus.OK] * 3)
+        self.assertIsInstance(results[3], DatabaseError)
+
+        # Bulk is not attempted again
+        await self.client.persist_alerts(self.alerts[:1])
+        self.client._send_json_bytes.assert_awaited_once()
+
+    async def test_update_statuses_bulk_and_fallback(self):
+        self.client.update_status = AsyncMock()
+        updates = {"fp-1": "sent", "fp-2": "failed"}
+
+        self.assertEqual(await self.client.update_statuses(updates), {})
+        method, = self.client._send_json_bytes.await_args.args
+        self.assertEqual(method, "patch")
+        self.assertEqual(
+            json.loads(self.client._send_json_bytes.await_args.kwargs["content"]),
+            [{"fingerprint": "fp-1", "status": "sent"}, {"fingerprint": "fp-2", "status": "failed"}],
+        )
+
+        self.client._send_json_bytes.side_effect = http_error(405)
+        self.client.update_status.side_effect = [None, DatabaseError("down")]
+        failures = await self.client.update_statuses(updates)
+
+        self.assertFalse(self.client.bulk_status_supported)
+        self.assertEqual(list(failures), ["fp-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
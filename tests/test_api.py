@@ -9,6 +9,7 @@ class TestAPI(unittest.TestCase):
         # Reset state
         app.state.consumer = None
         app.state.orchestrator = None
+        app.state.supervisor = None
 
     def test_health_connected(self):
         mock_consumer = MagicMock()
@@ -35,6 +36,35 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 503)
         self.assertEqual(response.json(), {"detail": "Initializing"})
 
+    def test_health_supervisor_aggregates_workers(self):
+        mock_supervisor = MagicMock()
+        mock_supervisor.worker_health.return_value = [
+            {"id": 0, "healthy": True},
+            {"id": 1, "healthy": False},
+        ]
+        app.state.supervisor = mock_supervisor
+
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "DEGRADED")
+
+        mock_supervisor.worker_health.return_value = [{"id": 0, "healthy": False}]
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 503)
+
+    def test_supervisor_metrics_merge_workers(self):
+        mock_supervisor = MagicMock()
+        mock_supervisor.worker_metrics.return_value = [
+            {"worker_test_total": {"header": ["# TYPE worker_test_total counter"], "samples": [f'worker_test_total{{worker="{i}"}} 1.0']}}
+            for i in range(2)
+        ]
+        app.state.supervisor = mock_supervisor
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text.count("# TYPE worker_test_total counter"), 1)
+        self.assertIn('worker_test_total{worker="1"} 1.0', response.text)
+
     def test_trigger_success(self):
         # Setup a stub that has simulate_alert
         mock_consumer = MagicMock()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import AsyncMock
+import asyncio
+
+import deadlines
+from adapters.messaging.batcher import MicroBatcher
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from models.models import Disposition
+from tests.factories import create_alert, create_message
+
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_flush_on_size(self):
+        flush = AsyncMock()
+        batcher = MicroBatcher(flush, max_size=3, max_delay=10)
+
+        for i in range(7):
+            batcher.add(i)
+        await asyncio.sleep(0)
+
+        # Two full batches flushed, one item still buffered
+        self.assertEqual([c.args[0] for c in flush.await_args_list], [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(batcher.pending, 1)
+
+        await batcher.close()
+        self.assertEqual(flush.await_args_list[-1].args[0], [6])
+
+    async def test_flush_on_timeout(self):
+        flush = AsyncMock()
+        batcher = MicroBatcher(flush, max_size=100, max_delay=0.01)
+
+        batcher.add("a")
+        batcher.add("b")
+        flush.assert_not_awaited()
+
+        await asyncio.sleep(0.05)
+        flush.assert_awaited_once_with(["a", "b"])
+
+
+class TestConsumerBatchMode(unittest.IsolatedAsyncioTestCase):
+    async def test_settles_each_message_with_its_disposition(self):
+        batch_callback = AsyncMock(return_value=[Disposition.ACK, Disposition.NACK, Disposition.REJECT])
+        consumer = RabbitMQConsumer(AsyncMock(), process_batch_callback=batch_callback)
+        consumer.batcher = MicroBatcher(consumer._process_batch, max_size=3, max_delay=10)
+
+        messages = [create_message(fingerprint=f"fp-{i}") for i in range(3)]
+        for message in messages:
+            await consumer.on_message(message)
+        await consumer.batcher.close()
+        await asyncio.gather(*consumer._tasks)
+
+        batch_callback.assert_awaited_once()
+        self.assertEqual([a.dedup_key for a in batch_callback.await_args.args[0]], ["fp-0", "fp-1", "fp-2"])
+        messages[0].ack.assert_awaited_once()
+        messages[1].nack.assert_awaited_once_with(requeue=True)
+        messages[2].reject.assert_awaited_once_with(requeue=False)
+
+    async def test_whole_batch_failure_requeues(self):
+        batch_callback = AsyncMock(side_effect=RuntimeError("boom"))
+        consumer = RabbitMQConsumer(AsyncMock(), process_batch_callback=batch_callback)
+        consumer.batcher = MicroBatcher(consumer._process_batch, max_size=2, max_delay=10)
+
+        messages = [create_message(fingerprint=f"fp-{i}") for i in range(2)]
+        for message in messages:
+            await consumer.on_message(message)
+        await consumer.batcher.close()
+        await asyncio.gather(*consumer._tasks)
+
+        for message in messages:
+            message.nack.assert_awaited_once_with(requeue=True)
+
+    async def test_missing_dispositions_requeue(self):
+        batch_callback = AsyncMock(return_value=[Disposition.ACK])
+        consumer = RabbitMQConsumer(AsyncMock(), process_batch_callback=batch_callback)
+        consumer.batcher = MicroBatcher(consumer._process_batch, max_size=2, max_delay=10)
+
+        messages = [create_message(fingerprint=f"fp-{i}") for i in range(2)]
+        for message in messages:
+            await consumer.on_message(message)
+        await consumer.batcher.close()
+        await asyncio.wait_for(asyncio.gather(*consumer._tasks), 1.0)
+
+        messages[0].ack.assert_awaited_once()
+        messages[1].nack.assert_awaited_once_with(requeue=True)
+
+    async def test_batch_runs_under_latest_deadline(self):
+        seen = []
+
+        async def batch_callback(alerts):
+            seen.append(deadlines.current())
+            return [Disposition.ACK] * len(alerts)
+
+        consumer = RabbitMQConsumer(AsyncMock(), process_batch_callback=batch_callback)
+        await consumer._process_batch([
+            (create_alert(), asyncio.get_running_loop().create_future(), deadline) for deadline in (100.0, 300.0, 200.0)
+        ])
+        await consumer._process_batch([
+            (create_alert(), asyncio.get_running_loop().create_future(), deadline) for deadline in (100.0, None)
+        ])
+
+        self.assertEqual(seen, [300.0, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
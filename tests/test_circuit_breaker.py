@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from fastapi.testclient import TestClient
+
+from adapters.http.base import BaseHTTPClient
+from adapters.http.circuit_breaker import CircuitBreaker, CIRCUIT_REJECTED, CIRCUIT_STATE
+from api.health import app
+from exceptions import CircuitOpenError, RetryableError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker("dep", failure_threshold=2, reset_timeout=10, clock=lambda: self.now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "closed")
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(CIRCUIT_STATE.value(client="dep"), 2)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+
+        self.assertEqual(self.breaker.state, "half_open")
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        self.breaker.before_call()
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.now = 15
+        self.assertEqual(self.breaker.state, "open")
+
+    def test_ignored_trial_frees_slot(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        self.breaker.before_call()
+
+        self.breaker.record_ignored()
+        self.breaker.before_call()
+
+    def test_disabled(self):
+        breaker = CircuitBreaker("off", failure_threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+        breaker.before_call()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestClientCircuit(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = BaseHTTPClient(base_url="http://dep", timeout=1.0, name="dep-client")
+        self.client.breaker = CircuitBreaker("dep-client", failure_threshold=3, reset_timeout=60)
+        self.mock_httpx = AsyncMock()
+        self.mock_httpx.is_closed = False
+        self.client.client = self.mock_httpx
+        patcher = patch("asyncio.sleep", new_callable=AsyncMock)
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_open_circuit_fails_fast_without_io(self):
+        self.mock_httpx.post.side_effect = httpx.ConnectError("refused")
+        rejected = CIRCUIT_REJECTED.value(client="dep-client")
+
+        # Three attempts, each one a failure: the third opens the circuit
+        with self.assertRaises(Exception):
+            await self.client._post("alerts", {})
+        self.assertEqual(self.client.breaker.state, "open")
+        calls = self.mock_httpx.post.await_count
+
+        with self.assertRaises(CircuitOpenError) as ctx:
+            await self.client._post("alerts", {})
+
+        self.assertIsInstance(ctx.exception, RetryableError)
+        self.assertEqual(self.mock_httpx.post.await_count, calls)
+        self.assertEqual(CIRCUIT_REJECTED.value(client="dep-client") - rejected, 1)
+
+    async def test_client_errors_do_not_open(self):
+        response = MagicMock()
+        response.status_code = 404
+        response.raise_for_status.side_effect = httpx.HTTPStatusError("404", request=MagicMock(), response=response)
+        self.mock_httpx.get.return_value = response
+
+        for _ in range(5):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await self.client._get("missing")
+
+        self.assertEqual(self.client.breaker.state, "closed")
+
+
+class TestHealthCircuits(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        app.state.consumer = MagicMock(is_connected=True)
+        app.state.orchestrator = MagicMock()
+        app.state.supervisor = None
+
+    def tearDown(self):
+        app.state.consumer = None
+        app.state.orchestrator = None
+
+    def test_open_circuit_degrades_health(self):
+        app.state.orchestrator.circuit_states.return_value = {"alert_db": "open", "project_manager": "closed"}
+
+        response = self.client.get("/health")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "DEGRADED")
+        self.assertEqual(response.json()["circuits"]["alert_db"], "open")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from adapters.messaging import codec
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from tests.factories import create_alert_payload, create_message
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.body = json.dumps(create_alert_payload()).encode()
+
+    def test_pydantic_decoder(self):
+        alert = codec.decode_payload_pydantic(self.body)
+        self.assertEqual(alert.dedup_key, "test-fingerprint")
+        self.assertEqual(alert.severity, "critical")
+
+    @unittest.skipIf(codec.orjson is None, "orjson not installed")
+    def test_orjson_decoder_matches_pydantic(self):
+        self.assertEqual(codec.decode_payload_orjson(self.body), codec.decode_payload_pydantic(self.body))
+
+    def test_invalid_json_raises_value_error(self):
+        for decoder in (codec.decode_payload_pydantic, codec.decode_payload_orjson):
+            if decoder is codec.decode_payload_orjson and codec.orjson is None:
+                continue
+            with self.assertRaises(ValueError):
+                decoder(b"{not json")
+
+    def test_get_decoder_falls_back_without_orjson(self):
+        with patch.object(codec, "orjson", None):
+            self.assertIs(codec.get_decoder("orjson"), codec.decode_payload_pydantic)
+
+
+class TestConsumerDecode(unittest.IsolatedAsyncioTestCase):
+    async def test_invalid_body_is_rejected(self):
+        callback = AsyncMock()
+        consumer = RabbitMQConsumer(callback)
+        message = create_message(body=b'{"status": "firing"}')
+
+        await consumer.on_message(message)
+
+        callback.assert_not_awaited()
+        message.reject.assert_awaited_once_with(requeue=False)
+
+    async def test_non_utf8_body_is_rejected(self):
+        consumer = RabbitMQConsumer(AsyncMock())
+        message = create_message(body=b"\xff\xfe")
+
+        await consumer.on_message(message)
+
+        message.reject.assert_awaited_once_with(requeue=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
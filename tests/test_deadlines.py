@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+import deadlines
+from adapters.email.pool import SMTPConnectionPool
+from adapters.http.base import BaseHTTPClient
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from exceptions import DeadlineExceededError
+from models.models import Disposition
+from services.pipeline import Pipeline, Stage
+from tests.factories import create_message
+
+
+class TestDeadlineHelpers(unittest.TestCase):
+    def test_no_deadline_by_default(self):
+        self.assertIsNone(deadlines.after(0))
+        self.assertIsNone(deadlines.remaining())
+        self.assertEqual(deadlines.timeout(5.0, "test"), 5.0)
+
+    def test_timeout_shrinks_to_remaining_budget(self):
+        with deadlines.scope(deadlines.after(0.5)):
+            self.assertLessEqual(deadlines.timeout(5.0, "test"), 0.5)
+            self.assertEqual(deadlines.timeout(0.1, "test"), 0.1)
+        self.assertIsNone(deadlines.current())
+
+    def test_expired_deadline_raises_and_counts(self):
+        before = deadlines.DEADLINE_EXCEEDED.value(operation="test")
+        with deadlines.scope(deadlines.after(10) - 20):
+            with self.assertRaises(DeadlineExceededError):
+                deadlines.check("test")
+        self.assertEqual(deadlines.DEADLINE_EXCEEDED.value(operation="test"), before + 1)
+
+
+class TestHTTPDeadline(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = BaseHTTPClient(base_url="http://test", timeout=5.0, name="deadline-test")
+        self.mock_httpx = AsyncMock()
+        self.mock_httpx.is_closed = False
+        self.client.client = self.mock_httpx
+
+        patcher = patch("asyncio.sleep", new_callable=AsyncMock)
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_request_timeout_shrinks_to_deadline(self):
+        self.mock_httpx.get.return_value = MagicMock(status_code=200)
+        with deadlines.scope(deadlines.after(1.0)):
+            await self.client._get("endpoint")
+        self.assertLessEqual(self.mock_httpx.get.await_args.kwargs["timeout"], 1.0)
+
+    async def test_expired_deadline_skips_the_request(self):
+        with deadlines.scope(deadlines.after(10) - 20):
+            with self.assertRaises(DeadlineExceededError):
+                await self.client._get("endpoint")
+        self.mock_httpx.get.assert_not_awaited()
+
+    async def test_no_retry_when_backoff_outlasts_deadline(self):
+        self.mock_httpx.get.side_effect = httpx.ConnectError("down")
+        # The first retry would wait 2s; only 1s is left
+        with deadlines.scope(deadlines.after(1.0)):
+            with self.assertRaises(Exception):
+                await self.client._get("endpoint")
+        self.assertEqual(self.mock_httpx.get.await_count, 1)
+        self.mock_sleep.assert_not_awaited()
+
+    async def test_timeout_cut_short_by_deadline_is_not_a_dependency_failure(self):
+        self.mock_httpx.get.side_effect = httpx.ReadTimeout("slow")
+        with deadlines.scope(deadlines.after(1.0)):
+            with self.assertRaises(DeadlineExceededError):
+                await self.client._get("endpoint")
+        self.assertEqual(self.client.breaker._failures, 0)
+
+
+class TestSMTPPoolDeadline(unittest.IsolatedAsyncioTestCase):
+    async def test_acquire_gives_up_at_deadline(self):
+        pool = SMTPConnectionPool()
+        # Initialized but every connection is checked out
+        pool._pool_created = True
+        with deadlines.scope(deadlines.after(0.05)):
+            with self.assertRaises(DeadlineExceededError):
+                async with pool.acquire():
+                    pass
+
+
+class TestDeadlinePropagation(unittest.IsolatedAsyncioTestCase):
+    async def test_consumer_sets_deadline_at_receipt(self):
+        seen = []
+
+        async def process(alert):
+            seen.append(deadlines.remaining())
+
+        consumer = RabbitMQConsumer(process)
+        with patch("adapters.messaging.rabbitmq.settings.MESSAGE_DEADLINE_SECONDS", 10.0):
+            message = create_message()
+            await consumer.on_message(message)
+
+        self.assertTrue(0 < seen[0] <= 10.0)
+        self.assertIsNone(deadlines.current())
+        message.ack.assert_awaited_once()
+
+    async def test_deadline_exceeded_requeues(self):
+        consumer = RabbitMQConsumer(AsyncMock(side_effect=DeadlineExceededError("late")))
+        disposition = await consumer._process_alert(MagicMock(fingerprint="fp"), deadlines.after(1.0))
+        self.assertEqual(disposition, Disposition.NACK)
+
+    async def test_pipeline_workers_run_under_submitter_deadline(self):
+        seen = []
+
+        async def handler(item):
+            seen.append(deadlines.current())
+
+        pipeline = Pipeline([Stage("only", handler, workers=1)])
+        deadline = deadlines.after(30.0)
+        with deadlines.scope(deadline):
+            future = await pipeline.submit("item")
+        await future
+        await pipeline.close()
+        self.assertEqual(seen, [deadline])
+
+
+if __name__ == "__main__":
+    unittest.main()
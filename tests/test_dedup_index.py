@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import AsyncMock
+
+from models.models import AlertStatus, FullAlert
+from services.dedup_index import DedupIndex, DEDUP_LOOKUPS
+from services.orchestrator import AlertOrchestrator
+from tests.factories import create_alert, create_recipient
+
+
+class TestDedupIndex(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.index = DedupIndex(maxsize=2, ttl=60, clock=lambda: self.now)
+
+    def test_keyed_by_fingerprint_and_status(self):
+        self.index.record(create_alert(dedup_key="fp", status="firing"))
+
+        self.assertTrue(self.index.seen(create_alert(dedup_key="fp", status="firing")))
+        self.assertFalse(self.index.seen(create_alert(dedup_key="fp", status="resolved")))
+
+    def test_entries_expire(self):
+        alert = create_alert()
+        self.index.record(alert)
+        self.now = 60
+
+        self.assertFalse(self.index.seen(alert))
+        self.assertEqual(len(self.index), 0)
+
+    def test_bounded_lru(self):
+        for key in ("a", "b", "c"):
+            self.index.record(create_alert(dedup_key=key))
+
+        self.assertEqual(len(self.index), 2)
+        self.assertFalse(self.index.seen(create_alert(dedup_key="a")))
+        self.assertTrue(self.index.seen(create_alert(dedup_key="c")))
+
+
+class TestOrchestratorDedupIndex(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.alert_db = AsyncMock()
+        self.project_manager = AsyncMock()
+        self.email_sender = AsyncMock()
+        self.index = DedupIndex(maxsize=100, ttl=60)
+        self.orchestrator = AlertOrchestrator(
+            alert_db_client=self.alert_db,
+            project_manager_client=self.project_manager,
+            email_sender=self.email_sender,
+            dedup_index=self.index,
+        )
+        self.alert = create_alert()
+        self.project_manager.resolve_recipients.side_effect = lambda alert: FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+
+    async def test_known_duplicate_skips_all_http_calls(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.DEDUP
+        hits = DEDUP_LOOKUPS.value(result="hit")
+
+        await self.orchestrator.process_alert(self.alert)
+        await self.orchestrator.process_alert(self.alert)
+
+        self.project_manager.resolve_recipients.assert_awaited_once()
+        self.alert_db.persist_alert.assert_awaited_once()
+        self.assertEqual(DEDUP_LOOKUPS.value(result="hit") - hits, 1)
+
+    async def test_sent_alert_is_recorded(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+
+        await self.orchestrator.process_alert(self.alert)
+
+        self.email_sender.send_email.assert_awaited_once()
+        self.assertTrue(self.index.seen(self.alert))
+
+    async def test_failed_alert_is_not_recorded(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+        self.email_sender.send_email.side_effect = Exception("SMTP down")
+
+        with self.assertRaises(Exception):
+            await self.orchestrator.process_alert(self.alert)
+
+        self.assertFalse(self.index.seen(self.alert))
+
+    async def test_batch_skips_resolution_for_known_duplicates(self):
+        self.index.record(self.alert)
+        other = create_alert(dedup_key="fp-other")
+        full = FullAlert(**other.model_dump(), **create_recipient().model_dump())
+        self.project_manager.resolve_recipients_batch.return_value = [full]
+        self.alert_db.persist_alerts.return_value = [AlertStatus.OK]
+
+        await self.orchestrator.process_batch([self.alert, other])
+
+        self.project_manager.resolve_recipients_batch.assert_awaited_once_with([other])
+        self.alert_db.persist_alerts.assert_awaited_once_with([full])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+
+from adapters.email.sender import EmailSender
+from models.models import AlertStatus, FullAlert
+from services.digest import DigestBuffer, recipient_key
+from services.orchestrator import AlertOrchestrator
+from tests.factories import create_alert, create_recipient
+
+
+def full_alert(dedup_key: str, severity: str = "warning", groups=None) -> FullAlert:
+    alert = create_alert(dedup_key=dedup_key, severity=severity)
+    return FullAlert(**alert.model_dump(), **create_recipient(emails=groups).model_dump())
+
+
+class TestDigestBuffer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sent: list[list[str]] = []
+
+        async def send(alerts):
+            self.sent.append([a.dedup_key for a in alerts])
+
+        self.send = send
+        self.digest = DigestBuffer(send, window=0.05, max_count=3, critical_delay=0.01)
+
+    def test_recipient_key_is_normalized(self):
+        a = full_alert("a", groups=["Ops@Example.com", "dev@example.com"])
+        b = full_alert("b", groups=[" dev@example.com", "ops@example.com"])
+        self.assertEqual(recipient_key(a), recipient_key(b))
+
+    async def test_window_bundles_per_recipient_set(self):
+        futures = [
+            self.digest.add(full_alert("a", groups=["ops@example.com"])),
+            self.digest.add(full_alert("b", groups=["dev@example.com"])),
+            self.digest.add(full_alert("c", groups=["OPS@example.com"])),
+        ]
+        self.assertEqual(self.digest.pending, 3)
+
+        await asyncio.gather(*futures)
+
+        self.assertEqual(sorted(self.sent), [["a", "c"], ["b"]])
+
+    async def test_max_count_flushes_immediately(self):
+        futures = [self.digest.add(full_alert(f"fp-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.sent, [["fp-0", "fp-1", "fp-2"]])
+        await asyncio.gather(*futures)
+
+    async def test_critical_caps_latency(self):
+        digest = DigestBuffer(self.send, window=10, max_count=100, critical_delay=0.01)
+        first = digest.add(full_alert("a"))
+        second = digest.add(full_alert("b", severity="critical"))
+
+        await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+        self.assertEqual(self.sent, [["a", "b"]])
+
+    async def test_send_error_fails_every_bundled_alert(self):
+        digest = DigestBuffer(AsyncMock(side_effect=Exception("SMTP down")), window=10, max_count=2)
+        futures = [digest.add(full_alert("a")), digest.add(full_alert("b"))]
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        self.assertTrue(all(isinstance(r, Exception) for r in results))
+
+    async def test_close_flushes_open_windows(self):
+        digest = DigestBuffer(self.send, window=10, max_count=100)
+        future = digest.add(full_alert("a"))
+
+        await digest.close()
+
+        self.assertTrue(future.done())
+        self.assertEqual(self.sent, [["a"]])
+
+
+class TestOrchestratorDigest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.alert_db = AsyncMock()
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+        self.alert_db.update_statuses.return_value = {}
+        self.project_manager = AsyncMock()
+        self.project_manager.resolve_recipients.side_effect = lambda alert: FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+        self.email_sender = AsyncMock()
+        self.email_sender.render_email = MagicMock(return_value="single")
+        self.email_sender.render_digest = MagicMock(return_value="digest")
+        self.orchestrator = AlertOrchestrator(
+            self.alert_db, self.project_manager, self.email_sender, digest_window=0.02, digest_max_alerts=10
+        )
+
+    async def test_storm_becomes_one_email_and_one_status_update(self):
+        alerts = [create_alert(dedup_key=f"fp-{i}", severity="warning") for i in range(4)]
+
+        await asyncio.gather(*(self.orchestrator.process_alert(a) for a in alerts))
+
+        self.email_sender.render_digest.assert_called_once()
+        self.email_sender.deliver_email.assert_awaited_once()
+        self.assertEqual(self.email_sender.deliver_email.await_args.args[0], "digest")
+        self.alert_db.update_statuses.assert_awaited_once_with({a.dedup_key: AlertStatus.SENT for a in alerts})
+        self.alert_db.update_status.assert_not_awaited()
+
+    async def test_single_alert_uses_regular_template(self):
+        await self.orchestrator.process_alert(create_alert())
+
+        self.email_sender.render_digest.assert_not_called()
+        self.assertEqual(self.email_sender.deliver_email.await_args.args[0], "single")
+
+    async def test_failed_digest_marks_all_failed_and_raises(self):
+        self.email_sender.deliver_email.side_effect = Exception("SMTP down")
+        alerts = [create_alert(dedup_key=f"fp-{i}", severity="warning") for i in range(2)]
+
+        results = await asyncio.gather(*(self.orchestrator.process_alert(a) for a in alerts), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(r, Exception) for r in results))
+        self.alert_db.update_statuses.assert_awaited_once_with({a.dedup_key: AlertStatus.FAILED for a in alerts})
+
+
+class TestRenderDigest(unittest.TestCase):
+    def test_renders_every_alert(self):
+        sender = EmailSender(pool=MagicMock())
+        alerts = [full_alert("a", severity="warning"), full_alert("b", severity="critical")]
+
+        message = sender.render_digest(alerts)
+
+        self.assertIn("2 alerts", message["Subject"])
+        self.assertIn("CRITICAL", message["Subject"])
+        html = message.get_body(("html",)).get_content()
+        self.assertEqual(html.count('class="badge badge-'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import asyncio
+
+from adapters.messaging.dispatcher import ShardedDispatcher
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from tests.factories import create_message
+
+
+class TestShardedDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dispatcher = ShardedDispatcher(worker_count=4)
+        await self.dispatcher.start()
+
+    async def asyncTearDown(self):
+        await self.dispatcher.close()
+
+    async def test_same_key_runs_in_order(self):
+        seen = []
+
+        def job(i):
+            async def run():
+                # Earlier jobs sleep longer; ordering must still hold
+                await asyncio.sleep(0.01 * (5 - i))
+                seen.append(i)
+            return run
+
+        futures = [await self.dispatcher.submit("fp-1", job(i)) for i in range(5)]
+        await asyncio.gather(*futures)
+
+        self.assertEqual(seen, [0, 1, 2, 3, 4])
+
+    async def test_different_keys_run_in_parallel(self):
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        # Pick keys that land on distinct shards
+        keys, shards = [], set()
+        i = 0
+        while len(keys) < 4:
+            key = f"fp-{i}"
+            if self.dispatcher._shard_for(key) not in shards:
+                shards.add(self.dispatcher._shard_for(key))
+                keys.append(key)
+            i += 1
+
+        futures = [await self.dispatcher.submit(k, job) for k in keys]
+        await asyncio.gather(*futures)
+
+        self.assertEqual(peak, 4)
+
+    async def test_job_exception_is_propagated_to_future(self):
+        async def job():
+            raise RuntimeError("boom")
+
+        future = await self.dispatcher.submit("fp", job)
+        with self.assertRaises(RuntimeError):
+            await future
+
+
+class TestConsumerWithDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_ack_after_processing(self):
+        release = asyncio.Event()
+
+        async def callback(alert):
+            await release.wait()
+
+        consumer = RabbitMQConsumer(callback)
+        consumer.dispatcher = ShardedDispatcher(worker_count=2)
+        await consumer.dispatcher.start()
+
+        message = create_message(fingerprint="fp-1")
+        await consumer.on_message(message)
+
+        # on_message returned, but processing has not finished -> not acked yet
+        await asyncio.sleep(0)
+        message.ack.assert_not_awaited()
+
+        release.set()
+        await consumer.dispatcher.join()
+        await asyncio.gather(*consumer._tasks)
+        message.ack.assert_awaited_once()
+
+        await consumer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import AsyncMock
+import asyncio
+
+from adapters.messaging.dispatcher import ShardedDispatcher
+from adapters.messaging.rabbitmq import RabbitMQConsumer, DRAIN_ABANDONED
+from tests.factories import create_message
+
+
+class TestGracefulDrain(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.release = asyncio.Event()
+
+        async def callback(alert):
+            await self.release.wait()
+
+        self.consumer = RabbitMQConsumer(callback)
+        self.consumer.dispatcher = ShardedDispatcher(worker_count=2)
+        self.consumer.queue = AsyncMock()
+        self.consumer._consumer_tag = "ctag"
+
+    async def asyncTearDown(self):
+        await self.consumer.close()
+
+    async def test_waits_for_inflight_before_returning(self):
+        message = create_message(fingerprint="fp-1")
+        await self.consumer.on_message(message)
+        self.assertEqual(self.consumer.inflight, 1)
+
+        drain = asyncio.create_task(self.consumer.drain(timeout=5))
+        await asyncio.sleep(0.01)
+        # Consumer cancelled first, drain still waiting on the in-flight alert
+        self.consumer.queue.cancel.assert_awaited_once_with("ctag")
+        self.assertFalse(drain.done())
+
+        self.release.set()
+        abandoned = await drain
+        self.assertEqual(abandoned, 0)
+        message.ack.assert_awaited_once()
+        self.assertEqual(self.consumer.inflight, 0)
+
+    async def test_rejects_new_deliveries_while_draining(self):
+        await self.consumer.drain(timeout=1)
+        callback_message = create_message()
+
+        await self.consumer.on_message(callback_message)
+
+        callback_message.nack.assert_awaited_once_with(requeue=True)
+        self.assertEqual(self.consumer.inflight, 0)
+
+    async def test_counts_abandoned_messages_on_deadline(self):
+        before = DRAIN_ABANDONED.value()
+        await self.consumer.on_message(create_message(fingerprint="fp-1"))
+        await self.consumer.on_message(create_message(fingerprint="fp-2"))
+
+        abandoned = await self.consumer.drain(timeout=0.05)
+
+        self.assertEqual(abandoned, 2)
+        self.assertEqual(DRAIN_ABANDONED.value() - before, 2)
+
+    async def test_decode_failures_release_inflight_slot(self):
+        await self.consumer.on_message(create_message(body=b"not json"))
+        self.assertEqual(self.consumer.inflight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
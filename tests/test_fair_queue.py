@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import AsyncMock
+import asyncio
+
+from models.models import AlertStatus, FullAlert
+from services.fair_queue import FairScheduler, FAIR_QUEUE_WAIT
+from services.orchestrator import AlertOrchestrator
+from tests.factories import create_alert, create_recipient
+
+
+def full_alert(project_id: str, dedup_key: str = "fp", vendor: str = "TestVendor") -> FullAlert:
+    alert = create_alert(dedup_key=dedup_key, vendor=vendor)
+    return FullAlert(**alert.model_dump(), **{**create_recipient().model_dump(), "project_id": project_id})
+
+
+class TestFairScheduler(unittest.IsolatedAsyncioTestCase):
+    async def run_all(self, scheduler: FairScheduler, tenants: list[str]) -> list[str]:
+        """Submit sends in the given order while one slot is held, return the order they ran in."""
+        order = []
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(scheduler.run(full_alert("blocker"), gate.wait))
+        await asyncio.sleep(0)
+
+        async def send(tenant):
+            order.append(tenant)
+
+        tasks = [asyncio.create_task(scheduler.run(full_alert(t), lambda t=t: send(t))) for t in tenants]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        return order
+
+    async def test_quiet_tenant_is_not_stuck_behind_storm(self):
+        scheduler = FairScheduler(slots=1)
+
+        order = await self.run_all(scheduler, ["storm"] * 10 + ["quiet"])
+
+        self.assertLessEqual(order.index("quiet"), 1)
+
+    async def test_round_robin_between_backlogs(self):
+        scheduler = FairScheduler(slots=1)
+
+        order = await self.run_all(scheduler, ["a"] * 3 + ["b"] * 3)
+
+        self.assertEqual(order, ["a", "b", "a", "b", "a", "b"])
+
+    async def test_weights(self):
+        scheduler = FairScheduler(slots=1, weights={"a": 2})
+
+        order = await self.run_all(scheduler, ["a"] * 4 + ["b"] * 2)
+
+        self.assertEqual(order, ["a", "a", "b", "a", "a", "b"])
+
+    async def test_fractional_weight_carries_over(self):
+        scheduler = FairScheduler(slots=1, weights={"slow": 0.5})
+
+        order = await self.run_all(scheduler, ["slow"] * 2 + ["fast"] * 4)
+
+        self.assertEqual(order, ["fast", "slow", "fast", "fast", "slow", "fast"])
+
+    async def test_slots_cap_concurrency_and_errors_release(self):
+        scheduler = FairScheduler(slots=2)
+        active = peak = 0
+
+        async def send():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            raise ValueError("SMTP down")
+
+        results = await asyncio.gather(
+            *(scheduler.run(full_alert(f"p{i % 3}"), send) for i in range(6)), return_exceptions=True
+        )
+
+        self.assertEqual(peak, 2)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(scheduler._free, 2)
+
+    async def test_cancelled_waiter_is_removed(self):
+        scheduler = FairScheduler(slots=1)
+        gate = asyncio.Event()
+        holder = asyncio.create_task(scheduler.run(full_alert("a"), gate.wait))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(scheduler.run(full_alert("b"), AsyncMock()))
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.depth("b"), 1)
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        gate.set()
+        await holder
+
+        self.assertEqual(scheduler.depth(), 0)
+        self.assertEqual(scheduler._free, 1)
+
+    async def test_keyed_by_vendor(self):
+        scheduler = FairScheduler(slots=1, key="vendor")
+        waits = FAIR_QUEUE_WAIT.count(tenant="Acme")
+
+        await scheduler.run(full_alert("p1", vendor="Acme"), AsyncMock())
+
+        self.assertEqual(FAIR_QUEUE_WAIT.count(tenant="Acme") - waits, 1)
+
+    def test_invalid_config(self):
+        with self.assertRaises(ValueError):
+            FairScheduler(slots=0)
+        with self.assertRaises(ValueError):
+            FairScheduler(slots=1, key="site")
+        with self.assertRaises(ValueError):
+            FairScheduler(slots=1, weights={"a": 0})
+
+
+class TestOrchestratorFairQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_sends_go_through_scheduler(self):
+        alert_db = AsyncMock()
+        alert_db.persist_alert.return_value = AlertStatus.OK
+        project_manager = AsyncMock()
+        alert = create_alert()
+        project_manager.resolve_recipients.return_value = FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+        email_sender = AsyncMock()
+        scheduler = FairScheduler(slots=1)
+        waits = FAIR_QUEUE_WAIT.count(tenant="prj-123")
+        orchestrator = AlertOrchestrator(alert_db, project_manager, email_sender, fair_scheduler=scheduler)
+
+        await orchestrator.process_alert(alert)
+
+        email_sender.send_email.assert_awaited_once()
+        self.assertEqual(FAIR_QUEUE_WAIT.count(tenant="prj-123") - waits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
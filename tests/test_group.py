@@ -0,0 +1,122 @@
+import json
+import unittest
+from unittest.mock import AsyncMock
+
+import aio_pika
+
+from adapters.messaging.codec import decode_payload_pydantic
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from adapters.messaging.retry import RetryTopology
+from exceptions import RetryableError
+from models.models import Alert, AlertGroup
+from tests.broker import InMemoryBroker
+from tests.factories import create_alert_payload, create_message
+
+
+def create_group_body(fingerprints: list[str], **extra_children) -> bytes:
+    """Alertmanager grouped webhook payload with one child per fingerprint."""
+    children = []
+    for fp in fingerprints:
+        child = create_alert_payload(fingerprint=fp)
+        child["labels"] = {**child["labels"], "vendor": "acme", "environment": "prod", "instance": fp}
+        children.append(child)
+    children.extend(extra_children.values())
+    return json.dumps({
+        "version": "4",
+        "groupKey": "{}:{alertname=\"TestAlert\"}",
+        "status": "firing",
+        "receiver": "alert-orchestrator",
+        "groupLabels": {"alertname": "TestAlert"},
+        "commonLabels": {"alertname": "TestAlert", "vendor": "acme", "environment": "prod", "site": "New York"},
+        "commonAnnotations": {"description": "Memory usage exceeded 90%"},
+        "alerts": children,
+    }).encode()
+
+
+class TestGroupDecode(unittest.TestCase):
+    def test_single_and_grouped_payloads(self):
+        single = decode_payload_pydantic(json.dumps(create_alert_payload()).encode())
+        self.assertIsInstance(single, Alert)
+
+        group = decode_payload_pydantic(create_group_body(["fp-1", "fp-2"]))
+        self.assertIsInstance(group, AlertGroup)
+        self.assertEqual(len(group.alerts), 2)
+
+    def test_single_alert_with_alerts_label_value(self):
+        payload = create_alert_payload(labels={"team": "alerts"})
+        self.assertIsInstance(decode_payload_pydantic(json.dumps(payload).encode()), Alert)
+
+    def test_children_share_common_labels(self):
+        group = decode_payload_pydantic(create_group_body(["fp-1", "fp-2"]))
+        alerts = [Alert.model_validate(p) for p in group.iter_alert_payloads()]
+
+        self.assertEqual([a.dedup_key for a in alerts], ["fp-1", "fp-2"])
+        self.assertEqual(alerts[0].labels["instance"], "fp-1")
+        self.assertEqual(alerts[0].vendor, "acme")
+        # Same str objects as the group's commonLabels, not per-child copies
+        self.assertIs(alerts[0].labels["environment"], group.commonLabels["environment"])
+        self.assertIs(alerts[1].labels["environment"], group.commonLabels["environment"])
+        # The group is not consumed: iterating again yields the same children
+        self.assertEqual(len(group.alerts), 2)
+        self.assertEqual([p["fingerprint"] for p in group.iter_alert_payloads()], ["fp-1", "fp-2"])
+
+
+class TestConsumerGroups(unittest.IsolatedAsyncioTestCase):
+    async def test_acks_after_all_children_succeed(self):
+        callback = AsyncMock()
+        consumer = RabbitMQConsumer(callback)
+        message = create_message(body=create_group_body(["fp-1", "fp-2", "fp-3"]))
+
+        await consumer.on_message(message)
+
+        self.assertEqual(callback.await_count, 3)
+        message.ack.assert_awaited_once()
+
+    async def test_failed_children_without_retry_topology_requeue_group(self):
+        async def process(alert):
+            if alert.dedup_key == "fp-2":
+                raise RetryableError("SMTP down")
+
+        consumer = RabbitMQConsumer(AsyncMock(side_effect=process))
+        message = create_message(body=create_group_body(["fp-1", "fp-2"]))
+
+        await consumer.on_message(message)
+
+        message.ack.assert_not_awaited()
+        message.nack.assert_awaited_once_with(requeue=True)
+
+    async def test_failed_children_are_routed_individually(self):
+        broker = InMemoryBroker()
+        await broker.channel().declare_queue("alerts")
+
+        async def process(alert):
+            if alert.dedup_key == "fp-2":
+                raise RetryableError("SMTP down")
+
+        consumer = RabbitMQConsumer(AsyncMock(side_effect=process))
+        consumer.retry_topology = RetryTopology("alerts", delays_ms=[1000], max_attempts=3)
+        await consumer.retry_topology.declare(broker.channel())
+
+        invalid_child = {"status": "firing", "labels": {}}
+        body = create_group_body(["fp-1", "fp-2"], invalid=invalid_child)
+        await broker.channel().default_exchange.publish(aio_pika.Message(body=body), routing_key="alerts")
+
+        delivery = broker.get("alerts")
+        await consumer.on_message(delivery)
+
+        # Group is acked; only the failed children live on, as standalone messages
+        self.assertEqual(delivery.settled, "ack")
+        broker.advance(1000)
+        retried = broker.get("alerts")
+        child = Alert.model_validate_json(retried.body)
+        self.assertEqual(child.dedup_key, "fp-2")
+        self.assertEqual(child.vendor, "acme")
+        self.assertEqual(retried.headers[RetryTopology.ATTEMPT_HEADER], 1)
+        self.assertIsNone(broker.get("alerts"))
+
+        parked = broker.get("alerts.parking")
+        self.assertEqual(json.loads(parked.body)["status"], "firing")
+
+
+if __name__ == "__main__":
+    unittest.main()
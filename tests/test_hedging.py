@@ -0,0 +1,194 @@
+import asyncio
+import time
+import unittest
+
+from aiohttp import web
+
+from adapters.http.alert_db import AlertDBClient
+from adapters.http.hedging import HEDGE_REQUESTS, HedgePolicy
+from adapters.http.project_manager import ProjectManagerClient
+from models.models import AlertStatus
+from tests.factories import create_alert
+
+
+class StandInServer:
+    """Serves a local aiohttp app; the address is returned by `async with`."""
+    def routes(self, app: web.Application):
+        raise NotImplementedError
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        self.routes(app)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class StandInAlertDB(StandInServer):
+    """
+    Local AlertDB stand-in doing a real dedup insert: the first POST for a
+    fingerprint stores it and answers "ok" after `latency` seconds (the first
+    `slow` requests only); later ones answer "dedup" right away.
+    With `honour_keys`, a repeated Idempotency-Key gets the original answer instead.
+    """
+    def __init__(self, latency: float, slow: int = 1, honour_keys: bool = False):
+        self.latency = latency
+        self.slow = slow
+        self.honour_keys = honour_keys
+        self.keys: list[str] = []
+        self.stored: set[str] = set()
+        self.answers: dict[str, asyncio.Future] = {}
+
+    def routes(self, app: web.Application):
+        app.router.add_post("/alerts", self.persist)
+
+    async def persist(self, request: web.Request) -> web.Response:
+        key = request.headers.get("Idempotency-Key")
+        self.keys.append(key)
+        slow = len(self.keys) <= self.slow
+        if self.honour_keys and key in self.answers:
+            return web.json_response({"status": await asyncio.shield(self.answers[key])})
+        answer = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self.answers[key] = answer
+        fingerprint = (await request.json())["fingerprint"]
+        status = "dedup" if fingerprint in self.stored else "ok"
+        self.stored.add(fingerprint)
+        if slow:
+            await asyncio.sleep(self.latency)
+        answer.set_result(status)
+        return web.json_response({"status": status})
+
+
+class StandInProjectManager(StandInServer):
+    """Local Project Manager stand-in: the first `slow` lookups take `latency` seconds."""
+    def __init__(self, latency: float, slow: int = 1):
+        self.latency = latency
+        self.slow = slow
+        self.requests = 0
+
+    def routes(self, app: web.Application):
+        app.router.add_get("/resolve-recipients/{vendor}/alerts_groups", self.resolve)
+
+    async def resolve(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.requests <= self.slow:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"recipients": [{"project_id": "p1", "project_name": "P1", "alert_groups": ["ops@example.com"]}]})
+
+
+def learned_policy(name: str, max_ratio: float = 1.0) -> HedgePolicy:
+    policy = HedgePolicy(name, percentile=90, max_ratio=max_ratio, min_samples=5)
+    for _ in range(5):
+        policy.observe(0.02)
+    return policy
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_delay_is_learned_percentile(self):
+        policy = HedgePolicy("delay-test", percentile=90, min_samples=10)
+        for i in range(1, 10):
+            policy.observe(i / 100)
+        self.assertIsNone(policy.delay())
+        policy.observe(1.0)
+        self.assertEqual(policy.delay(), 0.09)
+
+    def test_hedges_capped_at_ratio_of_requests(self):
+        policy = HedgePolicy("ratio-test", max_ratio=0.25)
+        granted = 0
+        for _ in range(20):
+            policy.on_request()
+            granted += policy.try_hedge()
+        self.assertEqual(granted, 5)
+
+
+class TestHedgedPersist(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = AlertDBClient()
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_dedup_insert_not_hedged_by_default(self):
+        # A hedge would land after the primary stored the alert and come back "dedup"
+        server = StandInAlertDB(latency=0.3)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = learned_policy("hedge-default-test")
+            status = await self.client.persist_alert(create_alert())
+
+        self.assertEqual(status, AlertStatus.OK)
+        self.assertEqual(server.keys, [None])
+
+    async def test_hedge_answered_dedup_would_drop_the_alert(self):
+        # Why hedging the insert needs server-side Idempotency-Key support
+        server = StandInAlertDB(latency=1.0)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = learned_policy("hedge-unsafe-test")
+            self.client.hedge_persist = True
+            status = await self.client.persist_alert(create_alert())
+
+        self.assertEqual(len(server.keys), 2)
+        self.assertEqual(status, AlertStatus.DEDUP)
+
+    async def test_hedge_with_idempotency_keys_returns_original_answer(self):
+        server = StandInAlertDB(latency=1.0, honour_keys=True)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = learned_policy("hedge-keys-test")
+            self.client.hedge_persist = True
+            status = await self.client.persist_alert(create_alert())
+
+        self.assertEqual(status, AlertStatus.OK)
+        self.assertEqual(len(server.keys), 2)
+        self.assertIsNotNone(server.keys[0])
+        self.assertEqual(server.keys[0], server.keys[1])
+
+
+class TestHedgedRecipientLookup(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = ProjectManagerClient()
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_hedge_wins_over_slow_first_request(self):
+        server = StandInProjectManager(latency=1.0)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = learned_policy("hedge-win-test")
+            started = time.perf_counter()
+            recipient = await self.client._fetch_recipients(("v1", "prod", "s1"))
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(recipient.alert_groups, ["ops@example.com"])
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(server.requests, 2)
+        self.assertEqual(HEDGE_REQUESTS.value(client="hedge-win-test", outcome="won"), 1)
+
+    async def test_no_hedge_once_ratio_is_spent(self):
+        server = StandInProjectManager(latency=0.2)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = learned_policy("hedge-cap-test", max_ratio=0.0)
+            await self.client._fetch_recipients(("v1", "prod", "s1"))
+
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(HEDGE_REQUESTS.value(client="hedge-cap-test", outcome="capped"), 1)
+
+    async def test_no_hedge_before_latency_is_known(self):
+        server = StandInProjectManager(latency=0.2)
+        async with server as url:
+            self.client.base_url = url
+            self.client.hedge = HedgePolicy("hedge-cold-test", max_ratio=1.0, min_samples=5)
+            await self.client._fetch_recipients(("v1", "prod", "s1"))
+
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(len(self.client.hedge._samples), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
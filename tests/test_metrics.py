@@ -0,0 +1,57 @@
+import unittest
+
+from metrics import MetricsRegistry, render_exports
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge(self):
+        counter = self.registry.counter("alerts_total", "Alerts", ["status"])
+        counter.inc(status="sent")
+        counter.inc(2, status="sent")
+        gauge = self.registry.gauge("depth", "Queue depth")
+        gauge.set(5)
+        gauge.dec()
+
+        self.assertEqual(counter.value(status="sent"), 3)
+        self.assertEqual(gauge.value(), 4)
+        text = self.registry.render()
+        self.assertIn('alerts_total{status="sent"} 3.0', text)
+        self.assertIn("# TYPE depth gauge", text)
+        self.assertIn("depth 4.0", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=[0.1, 1.0])
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("latency_seconds_count 3", text)
+        self.assertEqual(histogram.count(), 3)
+
+    def test_register_is_idempotent_and_labels_are_checked(self):
+        first = self.registry.counter("c", "C", ["a"])
+        self.assertIs(self.registry.counter("c", "C", ["a"]), first)
+        with self.assertRaises(ValueError):
+            first.inc(b="x")
+
+    def test_exports_merge_into_one_family_per_metric(self):
+        counter = self.registry.counter("alerts_total", "Alerts", ["status"])
+        counter.inc(status="sent")
+        first = self.registry.export({"worker": "0"})
+        counter.inc(status="sent")
+        second = self.registry.export({"worker": "1"})
+
+        text = render_exports([first, second])
+        self.assertEqual(text.count("# TYPE alerts_total counter"), 1)
+        self.assertIn('alerts_total{worker="0",status="sent"} 1.0', text)
+        self.assertIn('alerts_total{worker="1",status="sent"} 2.0', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
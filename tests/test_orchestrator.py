@@ -8,7 +8,8 @@ from services.orchestrator import AlertOrchestrator
 
 from tests.factories import create_alert, create_recipient
 
-from models.models import AlertStatus, FullAlert
+from models.models import AlertStatus, FullAlert, Disposition
+from exceptions import DatabaseError, RetryableError, NonRetryableError, ProjectResolutionNonRetryableError
 
 class TestAlertOrchestrator(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
@@ -23,6 +24,9 @@ class TestAlertOrchestrator(unittest.IsolatedAsyncioTestCase):
         )
 
         self.sample_alert = create_alert()
+        # Batch resolution passes alerts straight through unless a test says otherwise
+        self.mock_project_manager.resolve_recipients_batch.side_effect = lambda alerts: list(alerts)
+        self.mock_alert_db.persist_alerts.side_effect = lambda alerts: [AlertStatus.OK] * len(alerts)
 
     async def test_process_alert_happy_path(self):
         # Setup Mocks
@@ -155,5 +159,77 @@ class TestAlertOrchestrator(unittest.IsolatedAsyncioTestCase):
         self.mock_email_sender.send_email.assert_awaited_once()
         self.mock_alert_db.update_status.assert_awaited_once_with(self.sample_alert.dedup_key, AlertStatus.SENT)
 
+    async def test_process_batch_per_item_dispositions(self):
+        alerts = [create_alert(dedup_key=f"fp-{i}") for i in range(3)]
+        failures = {"fp-1": RetryableError("DB Down"), "fp-2": NonRetryableError("Bad data")}
+
+        async def process(alert, status=None):
+            if alert.dedup_key in failures:
+                raise failures[alert.dedup_key]
+
+        self.orchestrator.process_alert = AsyncMock(side_effect=process)
+
+        # Run
+        dispositions = await self.orchestrator.process_batch(alerts)
+
+        # Verify: one bad alert does not fail the others
+        self.assertEqual(dispositions, [Disposition.ACK, Disposition.NACK, Disposition.REJECT])
+
+    async def test_process_batch_keeps_fingerprint_order(self):
+        alerts = [
+            create_alert(dedup_key="fp-a", status="firing"),
+            create_alert(dedup_key="fp-b"),
+            create_alert(dedup_key="fp-a", status="resolved"),
+        ]
+        seen = []
+
+        async def process(alert, status=None):
+            # First update for fp-a is the slowest; it must still finish first
+            await asyncio.sleep(0.02 if alert.status == "firing" else 0)
+            seen.append((alert.dedup_key, alert.status))
+
+        self.orchestrator.process_alert = AsyncMock(side_effect=process)
+
+        await self.orchestrator.process_batch(alerts)
+
+        fp_a = [status for key, status in seen if key == "fp-a"]
+        self.assertEqual(fp_a, ["firing", "resolved"])
+
+    async def test_process_batch_uses_batch_resolution(self):
+        alerts = [create_alert(dedup_key="fp-1"), create_alert(dedup_key="fp-2")]
+        full = FullAlert(**alerts[0].model_dump(), **create_recipient().model_dump())
+        self.mock_project_manager.resolve_recipients_batch.side_effect = None
+        self.mock_project_manager.resolve_recipients_batch.return_value = [
+            full,
+            ProjectResolutionNonRetryableError("Unknown vendor"),
+        ]
+
+        dispositions = await self.orchestrator.process_batch(alerts)
+
+        self.assertEqual(dispositions, [Disposition.ACK, Disposition.REJECT])
+        # Already resolved: no per-alert lookups, and the failed alert never reaches persistence
+        self.mock_project_manager.resolve_recipients.assert_not_awaited()
+        self.mock_alert_db.persist_alerts.assert_awaited_once_with([full])
+        self.mock_alert_db.persist_alert.assert_not_awaited()
+        self.mock_email_sender.send_email.assert_awaited_once_with(full, full)
+
+    async def test_process_batch_persists_in_bulk(self):
+        alerts = [
+            FullAlert(**create_alert(dedup_key=f"fp-{i}").model_dump(), **create_recipient().model_dump())
+            for i in range(3)
+        ]
+        self.mock_alert_db.persist_alerts.side_effect = None
+        self.mock_alert_db.persist_alerts.return_value = [
+            AlertStatus.OK, AlertStatus.DEDUP, DatabaseError("chunk failed"),
+        ]
+
+        dispositions = await self.orchestrator.process_batch(alerts)
+
+        self.assertEqual(dispositions, [Disposition.ACK, Disposition.ACK, Disposition.NACK])
+        self.mock_alert_db.persist_alerts.assert_awaited_once_with(alerts)
+        self.mock_alert_db.persist_alert.assert_not_awaited()
+        # Only the new alert is sent; the duplicate and the failed one are not
+        self.mock_email_sender.send_email.assert_awaited_once_with(alerts[0], alerts[0])
+
 if __name__ == "__main__":
     unittest.main()
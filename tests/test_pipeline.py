@@ -0,0 +1,182 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import threading
+import time
+
+from models.models import AlertStatus, FullAlert
+from services.dedup_index import DedupIndex
+from services.orchestrator import AlertOrchestrator
+from services.pipeline import Pipeline, Stage, STAGE_ERRORS
+from tests.factories import create_alert, create_recipient
+
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_items_flow_through_all_stages(self):
+        async def double(x):
+            return x * 2
+
+        results = []
+
+        async def collect(x):
+            results.append(x)
+
+        pipeline = Pipeline([Stage("double", double, workers=2), Stage("collect", collect, workers=1)])
+        futures = [await pipeline.submit(i) for i in range(5)]
+        await asyncio.gather(*futures)
+        await pipeline.close()
+
+        self.assertEqual(sorted(results), [0, 2, 4, 6, 8])
+
+    async def test_full_queue_blocks_submit(self):
+        release = asyncio.Event()
+
+        async def slow(x):
+            await release.wait()
+
+        pipeline = Pipeline([Stage("slow", slow, workers=1, queue_size=1)])
+        first = await pipeline.submit(1)
+        await asyncio.sleep(0)  # worker takes item 1
+        second = await pipeline.submit(2)  # fills the queue
+
+        blocked = asyncio.create_task(pipeline.submit(3))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        third = await blocked
+        await asyncio.gather(first, second, third)
+        await pipeline.close()
+
+    async def test_stage_workers_are_independent(self):
+        active = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        def stage(name):
+            async def handler(x):
+                active[name] += 1
+                peak[name] = max(peak[name], active[name])
+                await asyncio.sleep(0.01)
+                active[name] -= 1
+                return x
+            return handler
+
+        pipeline = Pipeline([Stage("a", stage("a"), workers=4), Stage("b", stage("b"), workers=1)])
+        await asyncio.gather(*[await pipeline.submit(i) for i in range(8)])
+        await pipeline.close()
+
+        self.assertEqual(peak, {"a": 4, "b": 1})
+
+    async def test_handler_error_resolves_future_with_exception(self):
+        later = AsyncMock()
+
+        async def fail(x):
+            raise ValueError("boom")
+
+        errors = STAGE_ERRORS.value(stage="fail")
+        pipeline = Pipeline([Stage("fail", fail, workers=1), Stage("later", later, workers=1)])
+
+        with self.assertRaises(ValueError):
+            await (await pipeline.submit(1))
+        await pipeline.close()
+
+        later.assert_not_awaited()
+        self.assertEqual(STAGE_ERRORS.value(stage="fail") - errors, 1)
+
+    async def test_close_cancels_queued_items(self):
+        async def hang(x):
+            await asyncio.Event().wait()
+
+        pipeline = Pipeline([Stage("hang", hang, workers=1)])
+        running = await pipeline.submit(1)
+        queued = await pipeline.submit(2)
+        await asyncio.sleep(0)
+
+        await pipeline.close()
+
+        self.assertTrue(running.cancelled())
+        self.assertTrue(queued.cancelled())
+
+
+class TestOrchestratorPipeline(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.alert_db = AsyncMock()
+        self.project_manager = AsyncMock()
+        self.email_sender = AsyncMock()
+        self.email_sender.render_email = MagicMock(return_value="message")
+        self.index = DedupIndex(maxsize=100, ttl=60)
+        self.orchestrator = AlertOrchestrator(
+            alert_db_client=self.alert_db,
+            project_manager_client=self.project_manager,
+            email_sender=self.email_sender,
+            dedup_index=self.index,
+            pipeline_workers={"send": 2},
+            pipeline_queue_size=10,
+        )
+        self.alert = create_alert()
+        self.full = FullAlert(**self.alert.model_dump(), **create_recipient().model_dump())
+        self.project_manager.resolve_recipients.return_value = self.full
+
+    async def asyncTearDown(self):
+        await self.orchestrator.pipeline.close()
+
+    async def test_happy_path(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+
+        await self.orchestrator.process_alert(self.alert)
+
+        self.alert_db.persist_alert.assert_awaited_once_with(self.full)
+        self.email_sender.render_email.assert_called_once_with(self.full, self.full)
+        self.email_sender.deliver_email.assert_awaited_once_with("message", self.full, self.full)
+        self.alert_db.update_status.assert_awaited_once_with(self.alert.dedup_key, AlertStatus.SENT)
+        self.assertTrue(self.index.seen(self.alert))
+
+    async def test_dedup_finishes_early(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.DEDUP
+
+        await self.orchestrator.process_alert(self.alert)
+        await self.orchestrator.process_alert(self.alert)
+
+        self.alert_db.persist_alert.assert_awaited_once()
+        self.email_sender.deliver_email.assert_not_awaited()
+
+    async def test_send_failure_propagates_and_marks_failed(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+        self.email_sender.deliver_email.side_effect = Exception("SMTP down")
+
+        with self.assertRaises(Exception):
+            await self.orchestrator.process_alert(self.alert)
+
+        self.alert_db.update_status.assert_awaited_once_with(self.alert.dedup_key, AlertStatus.FAILED)
+        self.assertFalse(self.index.seen(self.alert))
+
+    async def test_renders_run_in_threads(self):
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+        await self.orchestrator.pipeline.close()
+        self.orchestrator.pipeline = self.orchestrator._build_pipeline({"render": 2}, 10)
+        await self.orchestrator.pipeline.start()
+        threads = []
+
+        def slow_render(recipient, alert):
+            threads.append(threading.current_thread())
+            time.sleep(0.2)
+            return "message"
+
+        self.email_sender.render_email = MagicMock(side_effect=slow_render)
+        self.project_manager.resolve_recipients.side_effect = lambda alert: FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+        started = time.perf_counter()
+        await asyncio.gather(*(self.orchestrator.process_alert(create_alert(dedup_key=f"fp-{i}")) for i in range(2)))
+
+        # Both renders ran at once, neither on the event loop's thread
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_unknown_stage_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AlertOrchestrator(AsyncMock(), AsyncMock(), AsyncMock(), pipeline_workers={"sned": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
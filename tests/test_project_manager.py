@@ -1,6 +1,12 @@
 import unittest
 from unittest.mock import MagicMock, AsyncMock, patch
+import asyncio
+
+import httpx
+
 from adapters.http.project_manager import ProjectManagerClient
+from exceptions import ProjectResolutionNonRetryableError, ProjectResolutionRetryableError
+from models.models import FullAlert
 from tests.factories import create_alert
 
 class TestProjectManagerClient(unittest.IsolatedAsyncioTestCase):
@@ -44,5 +50,90 @@ class TestProjectManagerClient(unittest.IsolatedAsyncioTestCase):
         # Verify _get called TWICE
         self.assertEqual(self.client._get.call_count, 2)
 
+    async def test_resolve_recipients_returns_merged_full_alert(self):
+        alert = create_alert(vendor="V-merge")
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {
+            "recipients": [
+                {"project_id": "p1", "project_name": "n1", "alert_groups": ["a@a.com", "b@b.com"]},
+                {"project_id": "p2", "project_name": "n2", "alert_groups": ["b@b.com", "c@c.com"]},
+            ]
+        }
+        self.client._get.return_value = mock_resp
+
+        full = await self.client.resolve_recipients(alert)
+
+        self.assertIsInstance(full, FullAlert)
+        self.assertEqual(full.dedup_key, alert.dedup_key)
+        self.assertEqual((full.project_id, full.project_name), ("p1", "n1"))
+        self.assertEqual(full.alert_groups, ["a@a.com", "b@b.com", "c@c.com"])
+
+    async def test_resolve_recipients_batch_one_request_per_key(self):
+        alerts = [
+            create_alert(vendor="B1", dedup_key="fp-1"),
+            create_alert(vendor="B2", dedup_key="fp-2"),
+            create_alert(vendor="B1", dedup_key="fp-3"),
+        ]
+
+        async def get(endpoint, params):
+            response = MagicMock()
+            response.json.return_value = {
+                "recipients": [{"project_id": params["vendor"], "project_name": "n", "alert_groups": ["x@x.com"]}]
+            }
+            return response
+
+        self.client._get.side_effect = get
+
+        results = await self.client.resolve_recipients_batch(alerts)
+
+        self.assertEqual(self.client._get.await_count, 2)
+        self.assertEqual([r.dedup_key for r in results], ["fp-1", "fp-2", "fp-3"])
+        self.assertEqual([r.project_id for r in results], ["B1", "B2", "B1"])
+
+    async def test_concurrent_resolutions_share_one_request(self):
+        release = asyncio.Event()
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {"recipients": []}
+
+        async def slow_get(endpoint, params):
+            await release.wait()
+            return mock_resp
+
+        self.client._get.side_effect = slow_get
+        alerts = [create_alert(vendor="SF", dedup_key=f"fp-{i}") for i in range(5)]
+
+        tasks = [asyncio.create_task(self.client.resolve_recipients(a)) for a in alerts[:3]]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(self.client.resolve_recipients_batch(alerts[3:])))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        self.client._get.assert_awaited_once()
+        self.assertEqual(self.client.cache._loading, {})
+
+    async def test_batch_failures_are_per_key(self):
+        request = httpx.Request("GET", "http://pm")
+
+        async def get(endpoint, params):
+            if params["vendor"] == "missing":
+                raise httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+            if params["vendor"] == "down":
+                raise httpx.ConnectError("refused", request=request)
+            response = MagicMock()
+            response.json.return_value = {"recipients": []}
+            return response
+
+        self.client._get.side_effect = get
+        alerts = [create_alert(vendor=v, dedup_key=v) for v in ("missing", "down", "fine")]
+
+        results = await self.client.resolve_recipients_batch(alerts)
+
+        self.assertIsInstance(results[0], ProjectResolutionNonRetryableError)
+        self.assertIsInstance(results[1], ProjectResolutionRetryableError)
+        self.assertIsInstance(results[2], FullAlert)
+        with self.assertRaises(ProjectResolutionRetryableError):
+            await self.client.resolve_recipients(alerts[1])
+
 if __name__ == "__main__":
     unittest.main()
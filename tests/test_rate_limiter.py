@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+import dependencies
+from api.health import app
+from config import settings
+from models.models import AlertStatus, FullAlert
+from services.fair_queue import FairScheduler
+from services.orchestrator import AlertOrchestrator
+from services.rate_limiter import SendRateLimiter
+from tests.factories import create_alert, create_recipient
+
+
+def full_alert(dedup_key: str = "fp", project_id: str = "p1", emails=None, alertname: str = "TestAlert") -> FullAlert:
+    alert = create_alert(dedup_key=dedup_key, alertname=alertname)
+    recipient = create_recipient(emails=emails)
+    return FullAlert(**alert.model_dump(), **{**recipient.model_dump(), "project_id": project_id})
+
+
+class TestSendRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.limiter = SendRateLimiter(project_per_minute=60, project_burst=2, clock=lambda: self.now)
+
+    def test_unlimited_by_default(self):
+        limiter = SendRateLimiter()
+        self.assertTrue(all(limiter.allow(full_alert()) for _ in range(100)))
+        self.assertEqual(limiter.take_suppressed(), [])
+
+    def test_project_bucket_refills(self):
+        self.assertTrue(self.limiter.allow(full_alert()))
+        self.assertTrue(self.limiter.allow(full_alert()))
+        self.assertFalse(self.limiter.allow(full_alert()))
+        # Other projects are not affected
+        self.assertTrue(self.limiter.allow(full_alert(project_id="p2")))
+
+        self.now = 1.0
+        self.assertTrue(self.limiter.allow(full_alert()))
+
+    def test_address_limit_spans_projects(self):
+        limiter = SendRateLimiter(address_per_minute=60, address_burst=1, clock=lambda: self.now)
+
+        self.assertTrue(limiter.allow(full_alert(project_id="p1", emails=["ops@example.com"])))
+        self.assertFalse(limiter.allow(full_alert(project_id="p2", emails=["OPS@example.com", "dev@example.com"])))
+        # The rejected alert took no token for dev@
+        self.assertTrue(limiter.allow(full_alert(project_id="p3", emails=["dev@example.com"])))
+
+    def test_suppressed_alerts_are_summarized(self):
+        for i in range(5):
+            self.limiter.allow(full_alert(dedup_key=f"fp-{i}", alertname="DiskFull" if i % 2 else "CpuHigh"))
+
+        entry, = self.limiter.take_suppressed()
+        self.assertEqual(entry.count, 3)
+        self.assertEqual(entry.alertnames, {"CpuHigh": 2, "DiskFull": 1})
+        self.assertEqual(self.limiter.take_suppressed(), [])
+
+    def test_configure_at_runtime(self):
+        self.limiter.configure(project_per_minute=0)
+        self.assertTrue(all(self.limiter.allow(full_alert()) for _ in range(10)))
+
+        with self.assertRaises(ValueError):
+            self.limiter.configure(project_burst=0)
+        self.assertEqual(self.limiter.project_burst, 2)
+
+
+class TestOrchestratorRateLimit(unittest.IsolatedAsyncioTestCase):
+    async def test_over_limit_alerts_become_one_summary(self):
+        alert_db = AsyncMock()
+        alert_db.persist_alert.return_value = AlertStatus.OK
+        project_manager = AsyncMock()
+        project_manager.resolve_recipients.side_effect = lambda alert: FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+        email_sender = AsyncMock()
+        email_sender.render_suppressed_summary = MagicMock(return_value="summary")
+        fair_scheduler = FairScheduler(slots=1)
+        fair_scheduler.run = AsyncMock(wraps=fair_scheduler.run)
+        orchestrator = AlertOrchestrator(
+            alert_db, project_manager, email_sender,
+            rate_limiter=SendRateLimiter(project_per_minute=1, project_burst=1),
+            fair_scheduler=fair_scheduler,
+        )
+
+        for i in range(4):
+            await orchestrator.process_alert(create_alert(dedup_key=f"fp-{i}"))
+
+        self.assertEqual(email_sender.send_email.await_count, 1)
+        self.assertEqual(alert_db.persist_alert.await_count, 4)
+
+        await orchestrator.send_suppressed_summaries()
+
+        recipient, count, _, _ = email_sender.render_suppressed_summary.call_args.args
+        self.assertEqual(count, 3)
+        email_sender.deliver_email.assert_awaited_once_with("summary", recipient, recipient)
+        # The summary takes a fair-queue slot like any other send
+        self.assertEqual(fair_scheduler.run.await_count, 2)
+        self.assertIs(fair_scheduler.run.await_args.args[0], recipient)
+
+    def test_limiter_only_wired_when_a_rate_is_set(self):
+        with patch.object(settings, "RATE_LIMIT_PROJECT_PER_MINUTE", 0), \
+                patch.object(settings, "RATE_LIMIT_ADDRESS_PER_MINUTE", 0):
+            self.assertIsNone(dependencies._rate_limiter())
+        with patch.object(settings, "RATE_LIMIT_PROJECT_PER_MINUTE", 0), \
+                patch.object(settings, "RATE_LIMIT_ADDRESS_PER_MINUTE", 5):
+            self.assertIsInstance(dependencies._rate_limiter(), SendRateLimiter)
+
+
+class TestRateLimitRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.limiter = SendRateLimiter()
+        app.state.orchestrator = MagicMock(rate_limiter=self.limiter)
+
+    def tearDown(self):
+        app.state.orchestrator = None
+
+    def test_update_limits(self):
+        response = self.client.put("/debug/rate-limits", json={"project_per_minute": 30})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["project_per_minute"], 30)
+        self.assertEqual(self.limiter.project_per_minute, 30)
+        self.assertEqual(self.client.get("/debug/rate-limits").json()["project_burst"], 20)
+
+    def test_invalid_limits_rejected(self):
+        response = self.client.put("/debug/rate-limits", json={"address_burst": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import traceback
+
+from adapters.http.recipient_cache import RecipientCache, CACHE_EVICTIONS, CACHE_REQUESTS
+import deadlines
+from exceptions import DeadlineExceededError, ProjectResolutionNonRetryableError, ProjectResolutionRetryableError
+from tests.factories import create_recipient
+
+
+class TestRecipientCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = RecipientCache(
+            maxsize=2, ttl=60, stale_ttl=60, stale_if_error=600, negative_ttl=30, clock=lambda: self.now
+        )
+        self.calls = []
+        self.fail_with = None
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+
+    async def loader(self, key):
+        self.calls.append(key)
+        if self.fail_with:
+            raise self.fail_with
+        return create_recipient(project_name=f"{key}-{len(self.calls)}")
+
+    async def test_hit_within_ttl(self):
+        hits = CACHE_REQUESTS.value(result="hit")
+        first = await self.cache.get("k", self.loader)
+        self.now = 59
+        second = await self.cache.get("k", self.loader)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, ["k"])
+        self.assertEqual(CACHE_REQUESTS.value(result="hit") - hits, 1)
+
+    async def test_stale_served_while_refreshing(self):
+        await self.cache.get("k", self.loader)
+        self.now = 90
+
+        stale = await self.cache.get("k", self.loader)
+        self.assertEqual(stale.project_name, "k-1")
+        await asyncio.gather(*self.cache._refreshing.values())
+
+        fresh = await self.cache.get("k", self.loader)
+        self.assertEqual(fresh.project_name, "k-2")
+        self.assertEqual(len(self.calls), 2)
+
+    async def test_expired_entry_served_on_upstream_error(self):
+        await self.cache.get("k", self.loader)
+        self.now = 500
+        self.fail_with = ProjectResolutionRetryableError("PM down")
+
+        recipient = await self.cache.get("k", self.loader)
+        self.assertEqual(recipient.project_name, "k-1")
+
+        # Past the stale-if-error window the error surfaces
+        self.now = 700
+        with self.assertRaises(ProjectResolutionRetryableError):
+            await self.cache.get("k", self.loader)
+
+    async def test_negative_results_are_cached(self):
+        self.fail_with = ProjectResolutionNonRetryableError("unknown vendor")
+        for _ in range(2):
+            with self.assertRaises(ProjectResolutionNonRetryableError):
+                await self.cache.get("k", self.loader)
+        self.assertEqual(len(self.calls), 1)
+
+        self.now = 31
+        self.fail_with = None
+        recipient = await self.cache.get("k", self.loader)
+        self.assertEqual(recipient.project_name, "k-2")
+
+    async def test_negative_hits_raise_fresh_errors(self):
+        self.fail_with = ProjectResolutionNonRetryableError("unknown vendor")
+        with self.assertRaises(ProjectResolutionNonRetryableError):
+            await self.cache.get("k", self.loader)
+
+        raised = []
+        for _ in range(2):
+            with self.assertRaises(ProjectResolutionNonRetryableError) as ctx:
+                await self.cache.get("k", self.loader)
+            raised.append(ctx.exception)
+
+        self.assertIsNot(raised[0], raised[1])
+        self.assertEqual(str(raised[1]), "unknown vendor")
+        depth = [len(traceback.extract_tb(error.__traceback__)) for error in raised]
+        self.assertEqual(depth[0], depth[1])
+
+    async def test_lru_eviction(self):
+        evictions = CACHE_EVICTIONS.value()
+        await self.cache.get("a", self.loader)
+        await self.cache.get("b", self.loader)
+        await self.cache.get("a", self.loader)  # a is now most recently used
+        await self.cache.get("c", self.loader)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(CACHE_EVICTIONS.value() - evictions, 1)
+        await self.cache.get("a", self.loader)
+        await self.cache.get("b", self.loader)
+        self.assertEqual(self.calls, ["a", "b", "c", "b"])
+
+    async def test_concurrent_misses_share_one_load(self):
+        release = asyncio.Event()
+
+        async def slow(key):
+            self.calls.append(key)
+            await release.wait()
+            return create_recipient()
+
+        waiters = [asyncio.create_task(self.cache.get("k", slow)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        self.assertEqual(self.calls, ["k"])
+        self.assertTrue(all(r is results[0] for r in results))
+
+    async def test_shared_load_not_bound_by_first_callers_deadline(self):
+        release = asyncio.Event()
+        load_deadlines = []
+
+        async def slow(key):
+            load_deadlines.append(deadlines.current())
+            await release.wait()
+            return create_recipient()
+
+        async def get(budget):
+            with deadlines.scope(deadlines.after(budget)):
+                return await self.cache.get("k", slow)
+
+        hurried = asyncio.create_task(get(0.01))
+        patient = asyncio.create_task(get(5.0))
+        with self.assertRaises(DeadlineExceededError):
+            await hurried
+        release.set()
+
+        self.assertEqual((await patient).project_name, create_recipient().project_name)
+        self.assertEqual(load_deadlines, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
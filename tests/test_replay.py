@@ -0,0 +1,129 @@
+import unittest
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from adapters.messaging.replay import ReplayDriver, percentile
+from adapters.stubs import RabbitMQConsumerStub
+
+
+def alert_payload(fingerprint: str, severity: str = "warning") -> dict:
+    return {
+        "status": "firing",
+        "labels": {"alertname": "Replay", "severity": severity},
+        "annotations": {},
+        "startsAt": "2024-01-01T00:00:00Z",
+        "fingerprint": fingerprint,
+    }
+
+
+class TestReplayDriver(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.received = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, lines: list):
+        path = self.dir / name
+        path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+        return path
+
+    async def callback(self, alert):
+        self.received.append(alert.fingerprint)
+
+    async def test_replays_directory_and_fans_out_groups(self):
+        self.write("a.jsonl", [alert_payload("fp-1"), "", "not json"])
+        self.write("b.jsonl", [{"groupKey": "g", "alerts": [alert_payload("fp-2"), alert_payload("fp-3")]}])
+
+        report = await ReplayDriver(self.callback, str(self.dir)).run()
+
+        self.assertEqual(self.received, ["fp-1", "fp-2", "fp-3"])
+        self.assertEqual(report.sent, 3)
+        self.assertEqual(report.invalid, 1)
+        self.assertEqual(len(report.latencies), 3)
+        self.assertIn("3 alerts", report.summary())
+
+    async def test_concurrency_limit(self):
+        path = self.write("a.jsonl", [alert_payload(f"fp-{i}") for i in range(10)])
+        active = peak = 0
+
+        async def slow(alert):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        report = await ReplayDriver(slow, str(path), concurrency=3).run()
+
+        self.assertEqual(report.sent, 10)
+        self.assertEqual(peak, 3)
+
+    async def test_rate_and_burst_pacing(self):
+        path = self.write("a.jsonl", [alert_payload(f"fp-{i}") for i in range(6)])
+        arrivals = []
+
+        async def record(alert):
+            arrivals.append(time.perf_counter())
+
+        await ReplayDriver(record, str(path), rate=100, shape="burst", burst_size=3).run()
+
+        # Two bursts of 3, 30ms apart at 100/s
+        self.assertLess(arrivals[2] - arrivals[0], 0.015)
+        self.assertGreaterEqual(arrivals[3] - arrivals[0], 0.025)
+
+    async def test_failures_are_counted(self):
+        path = self.write("a.jsonl", [alert_payload("fp-1"), alert_payload("fp-2")])
+
+        async def fail(alert):
+            raise RuntimeError("boom")
+
+        report = await ReplayDriver(fail, str(path)).run()
+        self.assertEqual((report.sent, report.failed), (0, 2))
+
+    async def test_loop_runs_until_stopped(self):
+        path = self.write("a.jsonl", [alert_payload("fp-1")])
+        driver = ReplayDriver(self.callback, str(path), rate=500, loop=True)
+
+        task = asyncio.create_task(driver.run())
+        await asyncio.sleep(0.05)
+        driver.stop()
+        report = await asyncio.wait_for(task, 1)
+
+        self.assertGreater(report.sent, 1)
+
+    async def test_loop_without_valid_alerts_terminates(self):
+        path = self.write("a.jsonl", ["not json"])
+        report = await asyncio.wait_for(ReplayDriver(self.callback, str(path), loop=True).run(), 1)
+        self.assertEqual(report.invalid, 1)
+
+    def test_rejects_bad_arguments(self):
+        path = self.write("a.jsonl", [alert_payload("fp-1")])
+        with self.assertRaises(ValueError):
+            ReplayDriver(self.callback, str(path), shape="sine")
+        with self.assertRaises(FileNotFoundError):
+            ReplayDriver(self.callback, str(self.dir / "missing.jsonl"))
+
+    def test_percentile(self):
+        self.assertEqual(percentile([], 99), 0.0)
+        self.assertEqual(percentile([3, 1, 2], 50), 2)
+
+    async def test_stub_consumer_replays_on_connect(self):
+        path = self.write("a.jsonl", [alert_payload("fp-1"), alert_payload("fp-2")])
+        stub = RabbitMQConsumerStub(self.callback, replay=ReplayDriver(self.callback, str(path)))
+
+        await stub.connect()
+        await asyncio.wait_for(stub._replay_task, 1)
+        await stub.drain(timeout=1)
+        await stub.close()
+
+        self.assertEqual(sorted(self.received), ["fp-1", "fp-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import AsyncMock
+
+import aio_pika
+
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from adapters.messaging.retry import RetryTopology
+from exceptions import RetryableError
+from tests.broker import InMemoryBroker
+from tests.factories import create_alert
+
+
+class TestRetryTopology(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.broker = InMemoryBroker()
+        await self.broker.channel().declare_queue("alerts", durable=True)
+
+        self.callback = AsyncMock(side_effect=RetryableError("AlertDB down"))
+        self.consumer = RabbitMQConsumer(self.callback)
+        self.consumer.retry_topology = RetryTopology("alerts", delays_ms=[1000, 5000], max_attempts=3)
+        await self.consumer.retry_topology.declare(self.broker.channel())
+
+        body = create_alert(dedup_key="fp-1").model_dump_json(by_alias=True).encode()
+        await self.broker.channel().default_exchange.publish(aio_pika.Message(body=body, priority=5), routing_key="alerts")
+
+    async def test_declares_delay_tiers_dead_lettering_to_main_queue(self):
+        args = self.broker.arguments["alerts.retry.5000ms"]
+        self.assertEqual(args["x-message-ttl"], 5000)
+        self.assertEqual(args["x-dead-letter-exchange"], "")
+        self.assertEqual(args["x-dead-letter-routing-key"], "alerts")
+        self.assertIn("alerts.parking", self.broker.queues)
+
+    async def test_retryable_error_goes_to_delay_queue_not_requeue(self):
+        delivery = self.broker.get("alerts")
+        await self.consumer.on_message(delivery)
+
+        self.assertEqual(delivery.settled, "ack")
+        self.assertEqual(self.broker.queues["alerts"], [])
+        self.assertEqual(len(self.broker.queues["alerts.retry.1000ms"]), 1)
+
+        # Comes back to the main queue only once the TTL expires
+        self.broker.advance(999)
+        self.assertEqual(self.broker.queues["alerts"], [])
+        self.broker.advance(1)
+        redelivery = self.broker.get("alerts")
+        self.assertEqual(redelivery.headers[RetryTopology.ATTEMPT_HEADER], 1)
+        self.assertEqual(redelivery.priority, 5)
+
+    async def test_backoff_tiers_then_parking(self):
+        tiers = []
+        for _ in range(3):
+            delivery = self.broker.get("alerts")
+            await self.consumer.on_message(delivery)
+            tier = next(q for q in ("alerts.retry.1000ms", "alerts.retry.5000ms") if self.broker.queues[q])
+            tiers.append(tier)
+            self.broker.advance(5000)
+
+        # Last tier is reused once the list runs out
+        self.assertEqual(tiers, ["alerts.retry.1000ms", "alerts.retry.5000ms", "alerts.retry.5000ms"])
+
+        # Attempts exhausted -> parked
+        delivery = self.broker.get("alerts")
+        await self.consumer.on_message(delivery)
+        self.assertEqual(delivery.settled, "ack")
+        parked = self.broker.get("alerts.parking")
+        self.assertIn("retries exhausted", parked.headers[RetryTopology.PARKED_REASON_HEADER])
+        self.assertEqual(self.callback.await_count, 4)
+
+    async def test_publish_failure_falls_back_to_requeue(self):
+        self.consumer.retry_topology.exchange.publish = AsyncMock(side_effect=ConnectionError("closed"))
+        delivery = self.broker.get("alerts")
+
+        await self.consumer.on_message(delivery)
+
+        self.assertEqual(delivery.settled, "nack")
+        self.assertEqual(len(self.broker.queues["alerts"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
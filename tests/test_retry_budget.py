@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from adapters.retry_budget import RETRY_ATTEMPTS, RETRY_DENIED, RetryBudget, RetryPolicy, decorrelated_jitter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDecorrelatedJitter(unittest.TestCase):
+    def test_bounds(self):
+        self.assertEqual(decorrelated_jitter(2.0, 2.0, 10.0, rand=lambda: 0.0), 2.0)
+        self.assertEqual(decorrelated_jitter(2.0, 2.0, 10.0, rand=lambda: 1.0), 6.0)
+        self.assertEqual(decorrelated_jitter(6.0, 2.0, 10.0, rand=lambda: 1.0), 10.0)
+
+    def test_spreads_retries(self):
+        delays = {round(decorrelated_jitter(2.0, 2.0, 10.0), 3) for _ in range(50)}
+        self.assertGreater(len(delays), 1)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_floor_allows_retries_without_successes(self):
+        budget = RetryBudget("floor-test", ratio=0.5, min_retries=2, clock=self.clock)
+        denied = RETRY_DENIED.value(dependency="floor-test")
+        self.assertTrue(budget.try_acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        self.assertEqual(RETRY_ATTEMPTS.value(dependency="floor-test"), 2)
+        self.assertEqual(RETRY_DENIED.value(dependency="floor-test"), denied + 1)
+
+    def test_ratio_of_recent_successes(self):
+        budget = RetryBudget("ratio-test", ratio=0.5, min_retries=0, clock=self.clock)
+        for _ in range(4):
+            budget.record_success()
+        self.assertEqual(sum(budget.try_acquire() for _ in range(5)), 2)
+
+    def test_window_slides(self):
+        budget = RetryBudget("window-test", ratio=0.0, min_retries=1, window=10, clock=self.clock)
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        self.clock.now += 10
+        self.assertTrue(budget.try_acquire())
+
+
+class Flaky:
+    def __init__(self, budget: RetryBudget, failures: int):
+        self.retry_budget = budget
+        self.failures = failures
+        self.calls = 0
+
+    @RetryPolicy(lambda e: isinstance(e, ConnectionError), attempts=3, base=0.1, cap=1.0)
+    async def call(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("down")
+        return "ok"
+
+
+class TestRetryPolicy(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = patch("asyncio.sleep", new_callable=AsyncMock)
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_retries_with_jittered_backoff(self):
+        flaky = Flaky(RetryBudget("policy-test"), failures=2)
+        self.assertEqual(await flaky.call(), "ok")
+        self.assertEqual(flaky.calls, 3)
+        for call in self.mock_sleep.await_args_list:
+            self.assertTrue(0.1 <= call.args[0] <= 1.0)
+
+    async def test_spent_budget_raises_original_error(self):
+        flaky = Flaky(RetryBudget("spent-test", min_retries=0), failures=1)
+        with self.assertRaises(ConnectionError):
+            await flaky.call()
+        self.assertEqual(flaky.calls, 1)
+        self.mock_sleep.assert_not_awaited()
+
+    async def test_successes_feed_the_budget(self):
+        budget = RetryBudget("success-test", ratio=1.0, min_retries=0)
+        flaky = Flaky(budget, failures=0)
+        await flaky.call()
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+
+
+if __name__ == "__main__":
+    unittest.main()
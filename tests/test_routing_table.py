@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import os
+import tempfile
+import threading
+
+import httpx
+
+from adapters.http.project_manager import ProjectManagerClient
+from adapters.http.routing_table import RoutingSnapshot, RoutingTable, write_snapshot
+from config import settings
+from tests.factories import create_alert, create_recipient
+
+
+def route(vendor: str, emails: list[str]) -> dict:
+    return {
+        "vendor": vendor,
+        "environment": "TestEnv",
+        "site": "TestSite",
+        "recipients": [{"project_id": vendor, "project_name": vendor, "alert_groups": emails}],
+    }
+
+
+def response(data: dict) -> MagicMock:
+    mock = MagicMock()
+    mock.json.return_value = data
+    return mock
+
+
+class TestRoutingSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "routes.snapshot")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_lookup(self):
+        routes = [((f"v{i}", "prod", None), create_recipient(project_name=f"p{i}")) for i in range(50)]
+        write_snapshot(self.path, "42", routes)
+
+        snapshot = RoutingSnapshot(self.path)
+        try:
+            self.assertEqual((snapshot.version, len(snapshot)), ("42", 50))
+            self.assertEqual(snapshot.get(("v17", "prod", None)).project_name, "p17")
+            self.assertIsNone(snapshot.get(("v17", "dev", None)))
+            self.assertEqual(sorted(r.project_name for _, r in snapshot.items()), sorted(f"p{i}" for i in range(50)))
+        finally:
+            snapshot.close()
+
+    def test_patch_applies_upserts_and_removals(self):
+        table = RoutingTable(self.path)
+        table.install(table.write("1", [(("a", "e", "s"), create_recipient(project_name="A")),
+                                        (("b", "e", "s"), create_recipient(project_name="B"))]))
+        table.install(table.patch("2", {("c", "e", "s"): create_recipient(project_name="C")}, [("a", "e", "s")]))
+
+        self.assertEqual(table.version, "2")
+        self.assertIsNone(table.lookup(("a", "e", "s")))
+        self.assertEqual(table.lookup(("c", "e", "s")).project_name, "C")
+        table.close()
+
+    def test_unreadable_snapshot_is_ignored(self):
+        write_snapshot(self.path, "1", [(("a", "e", "s"), create_recipient())])
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+
+        self.assertFalse(RoutingTable(self.path).load())
+        self.assertFalse(RoutingTable(self.path + ".missing").load())
+
+
+class TestProjectManagerRoutingTable(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "routes.snapshot")
+        with patch.object(settings, "PROJECT_MANAGER_SNAPSHOT_PATH", self.path):
+            self.client = ProjectManagerClient()
+        self.client._get = AsyncMock()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.tmp.cleanup()
+
+    async def test_warm_start_resolves_without_project_manager(self):
+        write_snapshot(self.path, "7", [(("V1", "TestEnv", "TestSite"), create_recipient(emails=["ops@x.com"]))])
+        request = httpx.Request("GET", "http://pm")
+        self.client._get.side_effect = httpx.ConnectError("unreachable", request=request)
+
+        await self.client.start()
+        full = await self.client.resolve_recipients(create_alert(vendor="V1"))
+
+        self.assertEqual(full.alert_groups, ["ops@x.com"])
+        # Only the (failed) background sync touched the network
+        await asyncio.sleep(0)
+        self.assertTrue(all(call.kwargs["endpoint"] == "/routing-table" for call in self.client._get.await_args_list))
+
+    async def test_full_then_incremental_sync(self):
+        self.client.routing_table.load()
+        self.client._get.return_value = response({"version": 1, "routes": [route("V1", ["a@x.com"]), route("V2", ["b@x.com"])]})
+        await self.client.sync_routing_table()
+        self.assertEqual(len(self.client.routing_table.snapshot), 2)
+        self.assertIsNone(self.client._get.await_args.kwargs["params"])
+
+        await self.client.resolve_recipients(create_alert(vendor="V1"))
+        self.client._get.return_value = response({
+            "version": 2,
+            "routes": [route("V1", ["new@x.com"])],
+            "removed": [{"vendor": "V2", "environment": "TestEnv", "site": "TestSite"}],
+        })
+        await self.client.sync_routing_table()
+
+        self.assertEqual(self.client._get.await_args.kwargs["params"], {"since": "1"})
+        self.assertEqual(self.client.routing_table.version, "2")
+        # The cached V1 entry was invalidated by the sync
+        full = await self.client.resolve_recipients(create_alert(vendor="V1"))
+        self.assertEqual(full.alert_groups, ["new@x.com"])
+        self.assertIsNone(self.client.routing_table.lookup(("V2", "TestEnv", "TestSite")))
+
+    async def test_concurrent_starts_spawn_one_sync_loop(self):
+        self.client._get.return_value = response({"version": 1, "routes": []})
+
+        await asyncio.gather(self.client.start(), self.client.start())
+
+        sync_tasks = [t for t in asyncio.all_tasks() if t.get_name() == "routing-table-sync"]
+        self.assertEqual(sync_tasks, [self.client._sync_task])
+
+    async def test_close_waits_for_patch_reading_the_snapshot(self):
+        table = self.client.routing_table
+        table.install(table.write("1", [(("V1", "TestEnv", "TestSite"), create_recipient())]))
+        reading, release = threading.Event(), threading.Event()
+        items = table.snapshot.items
+
+        def slow_items():
+            reading.set()
+            release.wait(5)
+            yield from items()
+
+        table.snapshot.items = slow_items
+        patching = asyncio.create_task(asyncio.to_thread(table.patch, "2", {}, []))
+        await asyncio.to_thread(reading.wait, 5)
+        closing = asyncio.create_task(self.client.close())
+        await asyncio.sleep(0.05)
+        # Still mapped while the patch reads it
+        self.assertIsNotNone(table.snapshot)
+        release.set()
+
+        await closing
+        snapshot = await patching
+        self.assertEqual(len(snapshot), 1)
+        snapshot.close()
+        self.assertIsNone(table.snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+
+from adapters.messaging.scheduler import PriorityDispatcher
+from adapters.messaging.rabbitmq import RabbitMQConsumer
+from tests.factories import create_alert, create_message
+
+
+class TestPriorityDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await self.dispatcher.close()
+
+    async def _blocked(self, dispatcher):
+        """Occupy the single worker until the returned event is set."""
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        await dispatcher.submit("blocker", blocker)
+        await asyncio.sleep(0)
+        return gate
+
+    async def test_higher_priority_runs_first(self):
+        self.dispatcher = PriorityDispatcher(worker_count=1, aging=10)
+        gate = await self._blocked(self.dispatcher)
+        seen = []
+
+        def job(name):
+            async def run():
+                seen.append(name)
+            return run
+
+        await self.dispatcher.submit("a", job("info"), priority=0)
+        await self.dispatcher.submit("b", job("warning"), priority=3)
+        await self.dispatcher.submit("c", job("critical"), priority=10)
+        gate.set()
+        await self.dispatcher.join()
+
+        self.assertEqual(seen, ["critical", "warning", "info"])
+
+    async def test_aging_prevents_starvation(self):
+        self.dispatcher = PriorityDispatcher(worker_count=1, aging=0.01)
+        gate = await self._blocked(self.dispatcher)
+        seen = []
+
+        def job(name):
+            async def run():
+                seen.append(name)
+            return run
+
+        await self.dispatcher.submit("a", job("old-info"), priority=0)
+        # Waiting 0.2s is worth 20 priority points > critical's 10
+        await asyncio.sleep(0.2)
+        await self.dispatcher.submit("b", job("new-critical"), priority=10)
+        gate.set()
+        await self.dispatcher.join()
+
+        self.assertEqual(seen, ["old-info", "new-critical"])
+
+    async def test_same_key_keeps_order_despite_priority(self):
+        self.dispatcher = PriorityDispatcher(worker_count=4, aging=10)
+        seen = []
+
+        def job(i):
+            async def run():
+                await asyncio.sleep(0.01)
+                seen.append(i)
+            return run
+
+        # Later updates for the same fingerprint carry higher priority
+        for i in range(4):
+            await self.dispatcher.submit("fp", job(i), priority=i * 3)
+        await self.dispatcher.join()
+
+        self.assertEqual(seen, [0, 1, 2, 3])
+
+    async def test_job_exception_is_propagated_to_future(self):
+        self.dispatcher = PriorityDispatcher(worker_count=1)
+
+        async def job():
+            raise RuntimeError("boom")
+
+        future = await self.dispatcher.submit("fp", job)
+        with self.assertRaises(RuntimeError):
+            await future
+        self.assertTrue(await self.dispatcher.join(timeout=1))
+
+
+class TestConsumerPriority(unittest.TestCase):
+    def test_priority_combines_message_priority_and_severity(self):
+        message = create_message(priority=2)
+        self.assertEqual(RabbitMQConsumer._priority(message, create_alert(severity="critical")), 12)
+        self.assertEqual(RabbitMQConsumer._priority(message, create_alert(severity="info")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
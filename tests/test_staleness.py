@@ -0,0 +1,168 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta, timezone
+
+from exceptions import RetryableError
+from models.models import AlertStatus, Disposition, FullAlert
+from services.orchestrator import AlertOrchestrator
+from services.staleness import StalenessPolicy, STALE_DECISIONS
+from tests.factories import create_alert, create_recipient
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def alert_at(starts_ago: float, ends_ago: float = None, status: str = "firing", dedup_key: str = "fp"):
+    alert = create_alert(status=status, dedup_key=dedup_key, starts_at=NOW - timedelta(seconds=starts_ago))
+    if ends_ago is not None:
+        alert = alert.model_copy(update={"endsAt": NOW - timedelta(seconds=ends_ago)})
+    return alert
+
+
+class TestStalenessPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = StalenessPolicy(
+            max_age=3600, age_action="summarize", expired_action="drop", clock=NOW.timestamp
+        )
+
+    def test_fresh_alert(self):
+        self.assertIsNone(self.policy.evaluate(alert_at(60)))
+        # endsAt in the future
+        self.assertIsNone(self.policy.evaluate(alert_at(60, ends_ago=-300)))
+
+    def test_expired_firing_alert(self):
+        dropped = STALE_DECISIONS.value(reason="expired", action="drop")
+
+        self.assertEqual(self.policy.evaluate(alert_at(60, ends_ago=10)), "drop")
+        self.assertEqual(STALE_DECISIONS.value(reason="expired", action="drop") - dropped, 1)
+
+    def test_resolved_alert_is_not_expired(self):
+        self.assertIsNone(self.policy.evaluate(alert_at(600, ends_ago=10, status="resolved")))
+        self.assertEqual(self.policy.evaluate(alert_at(9000, ends_ago=7200, status="resolved")), "summarize")
+
+    def test_too_old(self):
+        self.assertEqual(self.policy.evaluate(alert_at(7200)), "summarize")
+
+    def test_zero_end_time_means_no_end(self):
+        alert = alert_at(60).model_copy(update={"endsAt": datetime(1, 1, 1, tzinfo=timezone.utc)})
+        self.assertIsNone(self.policy.evaluate(alert))
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            StalenessPolicy(expired_action="ignore")
+
+
+class TestOrchestratorStaleness(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.alert_db = AsyncMock()
+        self.alert_db.persist_alert.return_value = AlertStatus.OK
+        self.alert_db.persist_alerts.side_effect = lambda alerts: [AlertStatus.OK] * len(alerts)
+        self.alert_db.update_statuses.return_value = {}
+        self.project_manager = AsyncMock()
+        self.project_manager.resolve_recipients_batch.side_effect = lambda alerts: [
+            FullAlert(**a.model_dump(), **create_recipient().model_dump()) for a in alerts
+        ]
+        self.email_sender = AsyncMock()
+        self.email_sender.render_digest = MagicMock(return_value="summary")
+
+    def orchestrator(self, **policy) -> AlertOrchestrator:
+        return AlertOrchestrator(
+            self.alert_db, self.project_manager, self.email_sender,
+            staleness=StalenessPolicy(clock=NOW.timestamp, **policy),
+        )
+
+    async def test_drop_skips_all_network_io(self):
+        orchestrator = self.orchestrator(expired_action="drop")
+
+        await orchestrator.process_alert(alert_at(600, ends_ago=60))
+
+        self.project_manager.resolve_recipients.assert_not_awaited()
+        self.alert_db.persist_alert.assert_not_awaited()
+        self.email_sender.send_email.assert_not_awaited()
+
+    async def test_persist_only(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="persist")
+        alert = alert_at(600)
+
+        await orchestrator.process_alert(alert)
+
+        self.alert_db.persist_alert.assert_awaited_once_with(alert)
+        self.project_manager.resolve_recipients.assert_not_awaited()
+        self.email_sender.send_email.assert_not_awaited()
+
+    async def test_summarize_sends_one_backlog_email(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="summarize")
+        alerts = [alert_at(600, dedup_key=f"fp-{i}") for i in range(3)]
+
+        # Each message is held until the summary carrying it is sent
+        waiting = [asyncio.create_task(orchestrator.process_alert(alert)) for alert in alerts]
+        await asyncio.sleep(0)
+        self.email_sender.deliver_email.assert_not_awaited()
+        self.assertFalse(any(task.done() for task in waiting))
+
+        await orchestrator.send_backlog_summary()
+        await asyncio.gather(*waiting)
+
+        self.project_manager.resolve_recipients_batch.assert_awaited_once_with(alerts)
+        self.assertEqual(len(self.email_sender.render_digest.call_args.args[0]), 3)
+        self.email_sender.deliver_email.assert_awaited_once()
+        self.alert_db.update_statuses.assert_awaited_once_with({a.dedup_key: AlertStatus.SENT for a in alerts})
+
+    async def test_failed_summary_fails_its_messages(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="summarize")
+        self.email_sender.deliver_email.side_effect = RetryableError("SMTP down")
+        waiting = asyncio.create_task(orchestrator.process_alert(alert_at(600)))
+        await asyncio.sleep(0)
+
+        await orchestrator.send_backlog_summary()
+
+        with self.assertRaises(RetryableError):
+            await waiting
+        self.alert_db.update_statuses.assert_awaited_once_with({"fp": AlertStatus.FAILED})
+        self.assertEqual(orchestrator._backlog, [])
+
+    async def test_summary_sent_at_max_alerts(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="summarize")
+        orchestrator.backlog_summary_max_alerts = 2
+
+        await asyncio.gather(*(orchestrator.process_alert(alert_at(600, dedup_key=f"fp-{i}")) for i in range(2)))
+
+        self.email_sender.deliver_email.assert_awaited_once()
+
+    async def test_batch_filters_stale_before_resolving(self):
+        orchestrator = self.orchestrator(expired_action="persist")
+        stale, fresh = alert_at(600, ends_ago=60, dedup_key="stale"), alert_at(10, dedup_key="fresh")
+
+        dispositions = await orchestrator.process_batch([stale, fresh])
+
+        self.assertEqual(dispositions, [Disposition.ACK, Disposition.ACK])
+        self.project_manager.resolve_recipients_batch.assert_awaited_once_with([fresh])
+        self.assertEqual(self.email_sender.send_email.await_count, 1)
+
+    async def test_batch_handles_stale_alerts_concurrently(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="summarize")
+        orchestrator.backlog_summary_max_alerts = 2
+        stale = [alert_at(600, dedup_key=f"stale-{i}") for i in range(2)]
+
+        # Serially, the first stale alert would wait for a summary the second one completes
+        dispositions = await asyncio.wait_for(orchestrator.process_batch([*stale, alert_at(10, dedup_key="fresh")]), 1.0)
+
+        self.assertEqual(dispositions, [Disposition.ACK] * 3)
+        self.email_sender.deliver_email.assert_awaited_once()
+        self.assertEqual(self.email_sender.send_email.await_count, 1)
+
+    async def test_failed_batch_leaves_stale_alerts_unhandled(self):
+        orchestrator = self.orchestrator(max_age=60, age_action="summarize")
+        self.project_manager.resolve_recipients_batch.side_effect = RetryableError("PM down")
+
+        with self.assertRaises(RetryableError):
+            await orchestrator.process_batch([alert_at(600, dedup_key="stale"), alert_at(10, dedup_key="fresh")])
+        await asyncio.sleep(0)
+
+        # The whole batch is redelivered, so the stale alert must not have been handled in the background
+        self.alert_db.persist_alert.assert_not_awaited()
+        self.assertEqual(orchestrator._backlog, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
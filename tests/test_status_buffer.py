@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import AsyncMock
+import asyncio
+
+from exceptions import DatabaseError
+from models.models import AlertStatus, FullAlert
+from services.orchestrator import AlertOrchestrator
+from services.status_buffer import StatusWriteBuffer, STATUS_BUFFER_COALESCED
+from tests.factories import create_alert, create_recipient
+
+
+class TestStatusWriteBuffer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.alert_db = AsyncMock()
+        self.alert_db.update_statuses.return_value = {}
+        self.buffer = StatusWriteBuffer(self.alert_db, max_size=3, max_delay=0.02)
+
+    async def test_coalesces_to_last_status_per_fingerprint(self):
+        coalesced = STATUS_BUFFER_COALESCED.value()
+        self.buffer.put("fp-1", AlertStatus.FAILED)
+        self.buffer.put("fp-2", AlertStatus.SENT)
+        self.buffer.put("fp-1", AlertStatus.SENT)
+
+        await self.buffer.close()
+
+        self.alert_db.update_statuses.assert_awaited_once_with({"fp-2": AlertStatus.SENT, "fp-1": AlertStatus.SENT})
+        self.assertEqual(STATUS_BUFFER_COALESCED.value() - coalesced, 1)
+
+    async def test_flushes_on_size(self):
+        for i in range(3):
+            self.buffer.put(f"fp-{i}", AlertStatus.SENT)
+        await asyncio.sleep(0)
+
+        self.alert_db.update_statuses.assert_awaited_once()
+        self.assertEqual(self.buffer.pending, 0)
+
+    async def test_flushes_on_time(self):
+        self.buffer.put("fp-1", AlertStatus.SENT)
+        self.alert_db.update_statuses.assert_not_awaited()
+
+        await asyncio.sleep(0.05)
+        self.alert_db.update_statuses.assert_awaited_once_with({"fp-1": AlertStatus.SENT})
+
+    async def test_failed_updates_are_requeued_unless_superseded(self):
+        self.alert_db.update_statuses.side_effect = [
+            {"fp-1": DatabaseError("down"), "fp-2": DatabaseError("down")},
+            {},
+        ]
+        self.buffer.put("fp-1", AlertStatus.FAILED)
+        self.buffer.put("fp-2", AlertStatus.SENT)
+        self.buffer.flush()
+        # Newer status for fp-1 arrives while the first flush is running
+        self.buffer.put("fp-1", AlertStatus.SENT)
+
+        await self.buffer.close()
+
+        self.assertEqual(
+            self.alert_db.update_statuses.await_args_list[-1].args[0],
+            {"fp-1": AlertStatus.SENT, "fp-2": AlertStatus.SENT},
+        )
+
+    async def test_close_writes_everything_pending(self):
+        self.buffer.put("fp-1", AlertStatus.SENT)
+        await self.buffer.close()
+
+        self.alert_db.update_statuses.assert_awaited_once_with({"fp-1": AlertStatus.SENT})
+        self.assertEqual(self.buffer.pending, 0)
+
+
+class TestOrchestratorStatusBuffer(unittest.IsolatedAsyncioTestCase):
+    async def test_sent_status_is_written_behind(self):
+        alert_db = AsyncMock()
+        alert_db.update_statuses.return_value = {}
+        alert_db.persist_alert.return_value = AlertStatus.OK
+        project_manager = AsyncMock()
+        alert = create_alert()
+        project_manager.resolve_recipients.return_value = FullAlert(
+            **alert.model_dump(), **create_recipient().model_dump()
+        )
+        buffer = StatusWriteBuffer(alert_db, max_size=100, max_delay=10)
+        orchestrator = AlertOrchestrator(alert_db, project_manager, AsyncMock(), status_buffer=buffer)
+
+        await orchestrator.process_alert(alert)
+        alert_db.update_status.assert_not_awaited()
+        self.assertEqual(buffer.pending, 1)
+
+        await orchestrator.shutdown()
+        alert_db.update_statuses.assert_awaited_once_with({alert.dedup_key: AlertStatus.SENT})
+        alert_db.close.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
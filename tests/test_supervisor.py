@@ -0,0 +1,113 @@
+import unittest
+import time
+
+from config import settings
+from metrics import MetricsRegistry
+from supervisor import Supervisor, WorkerStatusBoard
+
+
+class FakeProcess:
+    _pids = iter(range(1000, 2000))
+
+    def __init__(self):
+        self.pid = next(self._pids)
+        self.alive = False
+        self.exitcode = None
+        self.terminated = False
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def die(self, code: int = 1):
+        self.alive = False
+        self.exitcode = code
+
+    def terminate(self):
+        self.terminated = True
+        self.die(0)
+
+    def join(self, timeout=None):
+        pass
+
+    def kill(self):
+        self.die(-9)
+
+
+class TestSupervisor(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.processes = []
+
+        def factory(index, board):
+            process = FakeProcess()
+            self.processes.append(process)
+            return process
+
+        self.supervisor = Supervisor(worker_count=2, process_factory=factory)
+
+    def test_starts_all_workers(self):
+        self.supervisor.check_workers(now=0)
+        self.assertEqual(len(self.processes), 2)
+        self.assertTrue(all(p.alive for p in self.processes))
+
+    def test_restarts_dead_worker_with_backoff(self):
+        self.supervisor.check_workers(now=0)
+        self.processes[0].die()
+
+        # Dead worker is scheduled, not restarted immediately
+        self.supervisor.check_workers(now=0.1)
+        self.assertEqual(len(self.processes), 2)
+
+        self.supervisor.check_workers(now=0.1 + settings.WORKER_RESTART_BACKOFF)
+        self.assertEqual(len(self.processes), 3)
+        self.assertEqual(self.supervisor.workers[0].restarts, 1)
+
+        # Crashing again doubles the delay
+        self.processes[2].die()
+        self.supervisor.check_workers(now=2.0)
+        self.assertEqual(self.supervisor.workers[0].restart_at, 2.0 + settings.WORKER_RESTART_BACKOFF * 2)
+
+    def test_worker_health_uses_heartbeats(self):
+        self.supervisor.check_workers(now=0)
+        self.supervisor.board.beat(0, connected=True)
+        self.supervisor.board.beat(1, connected=False)
+
+        health = self.supervisor.worker_health()
+        self.assertEqual([w["healthy"] for w in health], [True, False])
+        self.assertTrue(self.supervisor.is_connected)
+
+        # Stale heartbeat -> unhealthy
+        self.supervisor.board.heartbeats[0] = time.time() - settings.WORKER_HEARTBEAT_INTERVAL * 10
+        self.assertFalse(self.supervisor.worker_health()[0]["healthy"])
+
+    async def test_stop_terminates_workers_without_restart(self):
+        self.supervisor.check_workers(now=0)
+        await self.supervisor.stop(timeout=1)
+
+        self.assertTrue(all(p.terminated for p in self.processes))
+        self.supervisor.check_workers(now=100)
+        self.assertEqual(len(self.processes), 2)
+
+    def test_worker_metrics_published_through_board(self):
+        registry = MetricsRegistry()
+        registry.counter("alerts_total", "Alerts").inc()
+        self.supervisor.check_workers(now=0)
+        self.supervisor.board.publish_metrics(1, registry.export({"worker": "1"}))
+
+        exports = self.supervisor.worker_metrics()
+        self.assertEqual(exports[0]["alerts_total"]["samples"], ['alerts_total{worker="1"} 1.0'])
+
+        # Cleared when the worker slot is restarted
+        self.supervisor.board.reset(1)
+        self.assertEqual(self.supervisor.worker_metrics(), [])
+
+    def test_oversized_metrics_not_published(self):
+        board = WorkerStatusBoard(1, metrics_bytes=16)
+        self.assertFalse(board.publish_metrics(0, {"alerts_total": {"header": [], "samples": ["x" * 32]}}))
+        self.assertIsNone(board.read_metrics(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+
+from adapters.http import transport
+from adapters.http.base import BaseHTTPClient
+from adapters.http.transport import POOL_WAIT, REUSE_RATIO, transport_options
+
+
+class StandInServer:
+    """Local HTTP server answering every GET after `latency` seconds."""
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True})
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def overrides(name: str, **options):
+    return patch.object(transport.settings, "HTTP_TRANSPORT_OVERRIDES", {name: options})
+
+
+class TestTransportOptions(unittest.TestCase):
+    def test_per_client_overrides(self):
+        with overrides("opts-test", max_connections=7):
+            options = transport_options("opts-test")
+            self.assertEqual(options["max_connections"], 7)
+            self.assertEqual(transport_options("other")["max_connections"], transport.settings.HTTP_MAX_CONNECTIONS)
+
+    def test_unknown_option_rejected(self):
+        with overrides("opts-test", pool_size=7):
+            with self.assertRaises(ValueError):
+                transport_options("opts-test")
+
+    def test_http2_falls_back_without_h2(self):
+        with overrides("opts-test", http2=True), patch.object(transport, "h2", None):
+            self.assertFalse(transport_options("opts-test")["http2"])
+
+
+class TestInstrumentedTransport(unittest.IsolatedAsyncioTestCase):
+    async def make_client(self, url: str, name: str, **options) -> BaseHTTPClient:
+        with overrides(name, **options):
+            client = BaseHTTPClient(base_url=url, timeout=5.0, name=name)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_reports_connection_reuse(self):
+        async with StandInServer() as url:
+            client = await self.make_client(url, "reuse-test")
+            await client._get("/a")
+            await client._get("/b")
+
+        self.assertEqual(client.transport.opened, 1)
+        self.assertEqual(client.transport.reused, 1)
+        self.assertEqual(REUSE_RATIO.value(client="reuse-test"), 0.5)
+        self.assertEqual(POOL_WAIT.count(client="reuse-test"), 2)
+
+    async def test_reports_pool_wait(self):
+        async with StandInServer(latency=0.1) as url:
+            client = await self.make_client(url, "pool-wait-test", max_connections=1)
+            await asyncio.gather(client._get("/a"), client._get("/b"))
+
+        self.assertEqual(client.transport.opened, 1)
+        # The second request waited for the first one's connection
+        self.assertGreaterEqual(POOL_WAIT.sum(client="pool-wait-test"), 0.09)
+
+    async def test_warmup_opens_connections(self):
+        server = StandInServer(latency=0.05)
+        async with server as url:
+            client = await self.make_client(url, "warmup-test", warmup_connections=3)
+            self.assertEqual(await client.warmup(), 3)
+            await asyncio.gather(*(client._get("/alerts") for _ in range(3)))
+
+        self.assertEqual(server.requests, 6)
+        self.assertEqual(client.transport.opened, 3)
+        self.assertEqual(client.transport.reused, 3)
+
+    async def test_warmup_disabled_by_default(self):
+        client = BaseHTTPClient(base_url="http://127.0.0.1:9", timeout=1.0, name="no-warmup-test")
+        self.assertEqual(await client.warmup(), 0)
+        self.assertIsNone(client.client)
+
+
+if __name__ == "__main__":
+    unittest.main()